@@ -1,11 +1,22 @@
-from flask import Flask, render_template, request, url_for, redirect, flash, session
-from datetime import datetime
+import mysql.connector
+from flask import Flask, Response, abort, render_template, request, url_for, redirect, flash, session
+from datetime import date, datetime
 from functools import wraps
+import json
 import os
+import time
 from dotenv import load_dotenv
 # Import shared database functions from db_config.py
 # MAKE SURE db_config.py IS IN THE SAME FOLDER!
-from db_config import fetch_all, fetch_one, execute_query
+from db_config import init_app as init_db, fetch_all, execute_query
+from order_service import fetch_pending_orders, fetch_order_statuses
+from menu_cache import bump_menu_version
+from invalidation import get_channel
+from menu_admin import (MenuImportError, set_availability, update_prices, set_specials, clear_specials,
+                        import_items, import_specials, export_csv, open_export, EXPORT_QUERIES, parse_date)
+from sales_rollup import fold_new_orders, fetch_sales_report, report_range
+from order_export import EXPORT_FORMATS, ORDER_EXPORT_QUERIES, export_filename, export_orders, open_export as open_order_export
+from metrics import init_metrics, metrics_token_valid, render_prometheus
 
 # Load environment variables from .env file
 load_dotenv()
@@ -13,6 +24,10 @@ load_dotenv()
 app = Flask(__name__)
 # Do not keep any real secret in source — require users to set FLASK_SECRET_KEY in .env
 app.secret_key = os.getenv('FLASK_SECRET_KEY', '')
+# One pooled DB connection per request, released on teardown
+init_db(app)
+# Per-endpoint query/timing aggregates, served at /admin/metrics
+metrics_registry = init_metrics(app, 'admin')
 
 # Admin Credentials from .env (no sensitive defaults)
 ADMIN_USERNAME = os.getenv('ADMIN_USERNAME', '')
@@ -29,6 +44,16 @@ if not ADMIN_PASSWORD:
 if missing_env:
     raise RuntimeError(f"Missing required environment variables: {', '.join(missing_env)}.\nPlease copy .env.example to .env and set the values before running the app.")
 
+# Kitchen display stream settings
+ORDER_STREAM_POLL = float(os.getenv('ORDER_STREAM_POLL', '1'))
+ORDER_STREAM_REFRESH = 30       # re-check the DB even without a change signal
+ORDER_STREAM_MAX_SECONDS = 300  # browsers reconnect on their own after this
+ORDER_STREAM_LOOKBACK = 20      # catches orders whose ids committed out of order
+ORDER_STREAM_KEEPALIVE = 15     # seconds between comment lines that keep proxies from timing out
+
+# Signalled by student_app on checkout and by status updates here
+orders_channel = get_channel('orders')
+
 # --- Context Processor (Prevents Footer Error) ---
 @app.context_processor
 def inject_now():
@@ -80,44 +105,231 @@ def admin_dashboard():
     # 1. Fetch Menu Items
     all_items = fetch_all("SELECT * FROM item ORDER BY category, item_name")
     
-    # 2. Fetch Pending Orders
-    pending_orders = fetch_all("""
-        SELECT oi.order_id, oi.order_date, oi.order_time, oi.total_amount, oi.status, s.name as student_name
-        FROM order_info oi
-        JOIN student s ON oi.student_id = s.student_id
-        WHERE oi.status = 'Pending'
-        ORDER BY oi.order_date ASC, oi.order_time ASC
-    """)
-    
-    # 3. Fetch Items for each Order
-    for order in pending_orders:
-        order['items'] = fetch_all("""
-            SELECT i.item_name, oit.quantity
-            FROM order_item oit
-            JOIN item i ON oit.item_id = i.item_id
-            WHERE oit.order_id = %s
-        """, (order['order_id'],))
+    # 2. Fetch Pending Orders (items loaded for all of them in one query)
+    pending_orders = fetch_pending_orders()
         
     return render_template('admin_dashboard.html', menu_items=all_items, orders=pending_orders)
 
 @app.route('/admin/update_availability/<int:item_id>', methods=['POST'])
 @admin_required
 def update_availability(item_id):
-    item = fetch_one("SELECT availability_status FROM item WHERE item_id = %s", (item_id,))
-    if item:
-        new_status = 1 - item['availability_status']
-        execute_query("UPDATE item SET availability_status = %s WHERE item_id = %s", (new_status, item_id))
+    # Flip in a single statement instead of SELECT + UPDATE
+    if execute_query("UPDATE item SET availability_status = 1 - availability_status WHERE item_id = %s", (item_id,)):
+        bump_menu_version()
         flash("Item status updated.", 'success')
     return redirect(url_for('admin_dashboard'))
 
+def selected_item_ids():
+    return sorted({int(item_id) for item_id in request.form.getlist('item_ids') if item_id.isdigit()})
+
+@app.route('/admin/items/bulk', methods=['POST'])
+@admin_required
+def bulk_items():
+    """Hides, shows or (un)marks as special every selected item in one transaction."""
+    item_ids = selected_item_ids()
+    action = request.form.get('action')
+    if not item_ids:
+        flash("Select at least one item.", 'warning')
+        return redirect(url_for('admin_dashboard'))
+    try:
+        special_date = parse_date(request.form.get('date') or date.today().isoformat(), 'date')
+        if action in ('hide', 'show'):
+            set_availability(item_ids, action == 'show')
+            message = f"{len(item_ids)} item(s) marked {'available' if action == 'show' else 'unavailable'}."
+        elif action == 'special':
+            set_specials(item_ids, special_date, request.form.get('discount', ''))
+            message = f"{len(item_ids)} item(s) set as specials for {special_date:%d %b}."
+        elif action == 'unspecial':
+            clear_specials(item_ids, special_date)
+            message = f"Specials removed from {len(item_ids)} item(s) for {special_date:%d %b}."
+        else:
+            flash("Unknown bulk action.", 'danger')
+            return redirect(url_for('admin_dashboard'))
+    except MenuImportError as err:
+        flash(str(err), 'danger')
+        return redirect(url_for('admin_dashboard'))
+    except mysql.connector.Error as err:
+        print(f"Bulk Update Error: {err}")
+        flash(f"Update failed, nothing was changed: {err}", 'danger')
+        return redirect(url_for('admin_dashboard'))
+    bump_menu_version()
+    flash(message, 'success')
+    return redirect(url_for('admin_dashboard'))
+
+@app.route('/admin/items/prices', methods=['POST'])
+@admin_required
+def bulk_prices():
+    """Saves every edited price from the dashboard in one transaction."""
+    prices = {}
+    for field, value in request.form.items():
+        item_id = field[len('price-'):]
+        if field.startswith('price-') and item_id.isdigit() and value.strip() != request.form.get(f'was-{item_id}', '').strip():
+            prices[int(item_id)] = value
+    try:
+        updated = update_prices(prices)
+    except MenuImportError as err:
+        flash(str(err), 'danger')
+        return redirect(url_for('admin_dashboard'))
+    except mysql.connector.Error as err:
+        print(f"Price Update Error: {err}")
+        flash(f"Update failed, nothing was changed: {err}", 'danger')
+        return redirect(url_for('admin_dashboard'))
+    if updated:
+        bump_menu_version()
+    flash(f"{updated} price(s) updated.", 'success' if updated else 'info')
+    return redirect(url_for('admin_dashboard'))
+
+def export_unavailable(err):
+    """503 for an export whose query could not run, rather than an empty file."""
+    print(f"Export failed: {err}")
+    return Response("The database is unavailable, so the export was not started. Please try again.\n",
+                    status=503, mimetype='text/plain', headers={'Retry-After': '30'})
+
+@app.route('/admin/export/<table>.csv')
+@admin_required
+def export_table(table):
+    """Streams the item or daily_special table as CSV."""
+    if table not in EXPORT_QUERIES:
+        abort(404)
+    try:
+        rows = open_export(table)
+    except mysql.connector.Error as err:
+        return export_unavailable(err)
+    response = Response(export_csv(table, rows), mimetype='text/csv',
+                        headers={'Content-Disposition': f'attachment; filename={table}.csv'})
+    response.call_on_close(rows.close)
+    return response
+
+@app.route('/admin/import/<table>', methods=['POST'])
+@admin_required
+def import_table(table):
+    """Loads an uploaded CSV into item or daily_special; any bad row rejects the whole file."""
+    importers = {'item': import_items, 'daily_special': import_specials}
+    upload = request.files.get('file')
+    if table not in importers:
+        abort(404)
+    if not upload or not upload.filename:
+        flash("Choose a CSV file to import.", 'warning')
+        return redirect(url_for('admin_dashboard'))
+    try:
+        count = importers[table](upload.stream)
+    except (MenuImportError, UnicodeDecodeError) as err:
+        flash(f"Import failed, nothing was changed: {err}", 'danger')
+        return redirect(url_for('admin_dashboard'))
+    except mysql.connector.Error as err:
+        print(f"Import Error: {err}")
+        flash(f"Import failed, nothing was changed: {err}", 'danger')
+        return redirect(url_for('admin_dashboard'))
+    bump_menu_version()
+    flash(f"Imported {count} {table.replace('_', ' ')} row(s).", 'success')
+    return redirect(url_for('admin_dashboard'))
+
 @app.route('/admin/update_order_status/<int:order_id>', methods=['POST'])
 @admin_required
 def update_order_status(order_id):
     new_status = request.form.get('status')
-    execute_query("UPDATE order_info SET status = %s WHERE order_id = %s", (new_status, order_id))
+    if new_status == 'Completed':
+        # completed_at feeds the pickup-time estimator (pickup_eta.py)
+        execute_query("UPDATE order_info SET status = %s, completed_at = NOW(), status_changed_at = NOW() "
+                      "WHERE order_id = %s", (new_status, order_id))
+    else:
+        # status_changed_at lets sales_rollup.py correct orders folded with an older status
+        execute_query("UPDATE order_info SET status = %s, status_changed_at = NOW() WHERE order_id = %s",
+                      (new_status, order_id))
+    orders_channel.publish()
     flash(f"Order #{order_id} marked as {new_status}.", 'success')
     return redirect(url_for('admin_dashboard'))
 
+@app.route('/admin/reports')
+@admin_required
+def admin_reports():
+    """Sales report built from the daily rollup tables only."""
+    start, end = report_range(request.args.get('start'), request.args.get('end'))
+    report = fetch_sales_report(start, end)
+    return render_template('admin_reports.html', start=start, end=end, **report)
+
+@app.route('/admin/reports/refresh', methods=['POST'])
+@admin_required
+def refresh_reports():
+    folded = fold_new_orders()
+    flash(f"Sales rollups updated ({folded} orders folded).", 'success')
+    return redirect(url_for('admin_reports', start=request.form.get('start'), end=request.form.get('end')))
+
+@app.route('/admin/reports/export/<table>.<fmt>')
+@admin_required
+def export_order_table(table, fmt):
+    """Streams order_info, order_item or payment for ?start=&end= as CSV or NDJSON."""
+    if table not in ORDER_EXPORT_QUERIES or fmt not in EXPORT_FORMATS:
+        abort(404)
+    start, end = report_range(request.args.get('start'), request.args.get('end'))
+    try:
+        rows = open_order_export(table, start, end)
+    except mysql.connector.Error as err:
+        return export_unavailable(err)
+    response = Response(export_orders(table, rows, fmt), mimetype=EXPORT_FORMATS[fmt],
+                        headers={'Content-Disposition': f'attachment; filename={export_filename(table, start, end, fmt)}'})
+    response.call_on_close(rows.close)
+    return response
+
+def sse_event(event, data, event_id=None):
+    """Formats one Server-Sent Event."""
+    lines = [] if event_id is None else [f"id: {event_id}"]
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return '\n'.join(lines) + '\n\n'
+
+def generate_order_events(high_water, tracked):
+    """Yields new pending orders and status changes of tracked orders.
+
+    The DB is only queried when the 'orders' channel signals a change (or
+    every ORDER_STREAM_REFRESH seconds), and then only for orders above the
+    high-water mark plus the statuses of orders already on screen.
+    """
+    sent = set(tracked)
+    seen_token = object()
+    checked_at = 0.0
+    started = kept_alive_at = time.monotonic()
+    yield 'retry: 3000\n\n'
+    while time.monotonic() - started < ORDER_STREAM_MAX_SECONDS:
+        orders_channel.poll()
+        now = time.monotonic()
+        if orders_channel.token != seen_token or now - checked_at >= ORDER_STREAM_REFRESH:
+            seen_token = orders_channel.token
+            checked_at = now
+            for order in fetch_pending_orders(after_order_id=max(high_water - ORDER_STREAM_LOOKBACK, 0)):
+                if order['order_id'] in sent:
+                    continue
+                sent.add(order['order_id'])
+                tracked.add(order['order_id'])
+                high_water = max(high_water, order['order_id'])
+                yield sse_event('order', order, high_water)
+            if tracked:
+                for order_id, status in fetch_order_statuses(tracked).items():
+                    if status != 'Pending':
+                        tracked.discard(order_id)
+                        yield sse_event('status', {'order_id': order_id, 'status': status})
+        if now - kept_alive_at >= ORDER_STREAM_KEEPALIVE:
+            kept_alive_at = now
+            yield ': keep-alive\n\n'
+        time.sleep(ORDER_STREAM_POLL)
+
+@app.route('/admin/orders/stream')
+@admin_required
+def order_stream():
+    """Server-Sent Events feed for the kitchen screen, resumable via Last-Event-ID."""
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('after', '0')
+    high_water = int(last_id) if last_id.isdigit() else 0
+    tracked = {int(order_id) for order_id in request.args.get('ids', '').split(',') if order_id.isdigit()}
+    return Response(generate_order_events(high_water, tracked), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/admin/metrics')
+def admin_metrics():
+    """Prometheus scrape endpoint; needs an admin session or the METRICS_TOKEN bearer token."""
+    if 'admin_logged_in' not in session and not metrics_token_valid():
+        abort(403)
+    return Response(render_prometheus(metrics_registry), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     # This runs on PORT 5001 to be separate from the student app
     print("--- ADMIN APP RUNNING ON PORT 5001 ---")
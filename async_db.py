@@ -0,0 +1,86 @@
+# Async MySQL helpers for student_asgi.py, mirroring db_config's sync helpers
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+import aiomysql
+from pymysql.constants import FIELD_TYPE
+from pymysql.converters import conversions
+from pymysql.err import MySQLError
+
+from db_config import DB_CONFIG, POOL_RECYCLE, POOL_TIMEOUT
+
+ASYNC_POOL_SIZE = int(os.getenv('DB_ASYNC_POOL_SIZE', '20'))
+
+# Decode DECIMAL columns straight to float in the driver, like fetch_all does
+_CONVERSIONS = dict(conversions)
+_CONVERSIONS[FIELD_TYPE.DECIMAL] = float
+_CONVERSIONS[FIELD_TYPE.NEWDECIMAL] = float
+
+_pool = None
+
+
+async def open_pool(size=ASYNC_POOL_SIZE):
+    """Creates the bounded aiomysql pool; call once from the app's startup."""
+    global _pool
+    _pool = await aiomysql.create_pool(
+        minsize=1, maxsize=size, pool_recycle=int(POOL_RECYCLE),
+        host=DB_CONFIG['host'], user=DB_CONFIG['user'], password=DB_CONFIG['password'],
+        db=DB_CONFIG['database'], conv=_CONVERSIONS, autocommit=False,
+    )
+    return _pool
+
+
+async def close_pool():
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        await _pool.wait_closed()
+        _pool = None
+
+
+@asynccontextmanager
+async def connection():
+    """Borrows a pooled connection, waiting at most DB_POOL_TIMEOUT seconds."""
+    conn = await asyncio.wait_for(_pool.acquire(), POOL_TIMEOUT)
+    try:
+        yield conn
+    finally:
+        if conn.get_transaction_status():
+            await conn.rollback()
+        _pool.release(conn)
+
+
+async def fetch_all(query, params=None):
+    try:
+        async with connection() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(query, params or ())
+                return list(await cursor.fetchall())
+    except (MySQLError, asyncio.TimeoutError) as err:
+        print(f"Database error in fetch_all: {err!r}")
+        return []
+
+
+async def fetch_one(query, params=None):
+    try:
+        async with connection() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(query, params or ())
+                return await cursor.fetchone()
+    except (MySQLError, asyncio.TimeoutError) as err:
+        print(f"Database error in fetch_one: {err!r}")
+        return None
+
+
+@asynccontextmanager
+async def transaction():
+    """Async unit of work: yields a dict cursor, commits on exit, rolls back on error."""
+    async with connection() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            try:
+                yield cursor
+                await conn.commit()
+            except BaseException:
+                await conn.rollback()
+                raise
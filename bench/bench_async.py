@@ -0,0 +1,96 @@
+"""Compares the sync (Flask) and async (ASGI) student apps under concurrent load.
+
+Start both servers against the same database, then point this script at them:
+
+    python student_app.py                            # sync, port 5000
+    uvicorn student_asgi:app --port 5002 --workers 1 # async
+    python bench/bench_async.py --target sync=http://127.0.0.1:5000 \\
+                                --target async=http://127.0.0.1:5002 --students 500
+
+Each simulated student logs in once and then loops over the menu, cart and
+order-history pages (and, with --checkout, adds an item and pays in cash)
+until --duration expires. Reports requests/sec and p50/p95/p99 latency per
+route for each target, then a side-by-side summary.
+"""
+import argparse
+import asyncio
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from http_load import HttpClient, LatencyRecorder, percentile
+
+CHECKOUT_KEY = re.compile(r'name="checkout_key" value="([^"]+)"')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--target', action='append', required=True, metavar='NAME=URL',
+                        help='server to benchmark, e.g. sync=http://127.0.0.1:5000 (repeatable)')
+    parser.add_argument('--students', type=int, default=500, help='concurrent simulated students')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds of load per target')
+    parser.add_argument('--student-id', default='IS2101', help='eligible student id used to log in')
+    parser.add_argument('--item-id', type=int, default=1, help='item added to the cart with --checkout')
+    parser.add_argument('--checkout', action='store_true', help='include add_to_cart + cash checkout in the loop')
+    return parser.parse_args()
+
+
+async def timed(client, recorder, route, method, path, form=None):
+    started = time.perf_counter()
+    body = b''
+    try:
+        status, _, body = await client.request(method, path, form)
+        ok = status < 400
+    except (OSError, asyncio.TimeoutError, ValueError):
+        ok = False
+    recorder.record(route, (time.perf_counter() - started) * 1000, ok)
+    return body
+
+
+async def simulate_student(base_url, args, recorder, deadline):
+    client = HttpClient(base_url)
+    try:
+        await timed(client, recorder, 'POST /login', 'POST', '/login', {'student_id': args.student_id})
+        while time.monotonic() < deadline:
+            await timed(client, recorder, 'GET /', 'GET', '/')
+            await timed(client, recorder, 'GET /cart', 'GET', '/cart')
+            await timed(client, recorder, 'GET /orders', 'GET', '/orders')
+            if args.checkout:
+                await timed(client, recorder, 'POST /add_to_cart', 'POST', f'/add_to_cart/{args.item_id}', {'quantity': 1})
+                page = await timed(client, recorder, 'GET /checkout', 'GET', '/checkout')
+                key = CHECKOUT_KEY.search(page.decode(errors='replace'))
+                await timed(client, recorder, 'POST /checkout', 'POST', '/checkout',
+                            {'payment_mode': 'Cash', 'checkout_key': key.group(1) if key else ''})
+    finally:
+        await client.close()
+
+
+async def run_target(base_url, args):
+    recorder = LatencyRecorder()
+    deadline = time.monotonic() + args.duration
+    await asyncio.gather(*(simulate_student(base_url, args, recorder, deadline) for _ in range(args.students)))
+    recorder.stop()
+    return recorder
+
+
+def main():
+    args = parse_args()
+    results = []
+    for target in args.target:
+        name, _, url = target.partition('=')
+        recorder = asyncio.run(run_target(url, args))
+        recorder.report(f"{name} ({url}, {args.students} students)")
+        samples = sorted(ms for route in recorder.samples.values() for ms in route)
+        errors = sum(recorder.errors.values())
+        results.append((name, recorder.total_requests / recorder.elapsed, percentile(samples, 99), errors))
+
+    print(f"\n{'target':<10} {'req/s':>10} {'p99 ms':>10} {'errors':>8}")
+    for name, rps, p99, errors in results:
+        print(f"{name:<10} {rps:>10.1f} {p99:>10.1f} {errors:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark for order_service.place_order() across cart sizes.
+
+Places orders with 1-100 line items against the MySQL database configured
+in .env and reports the mean and p95 latency per order. With --compare it
+also times the old one-INSERT-per-line write path.
+
+    python bench/bench_place_order.py --rounds 50 --compare
+
+Orders are written for the student BENCH-ORDERS and deleted afterwards.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, date
+from decimal import Decimal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import db_config as db
+from order_service import place_order
+
+STUDENT_ID = 'BENCH-ORDERS'
+CART_SIZES = (1, 5, 10, 25, 50, 100)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=50, help='orders placed per cart size')
+    parser.add_argument('--compare', action='store_true', help='also time the per-line insert loop')
+    return parser.parse_args()
+
+
+def place_order_per_line(student_id, cart, order_total, payment_mode):
+    """The pre-batching write path: one INSERT round trip per cart line."""
+    with db.transaction() as cursor:
+        cursor.execute(
+            "INSERT INTO order_info (student_id, order_date, order_time, total_amount, status) VALUES (%s, %s, %s, %s, %s)",
+            (student_id, date.today(), datetime.now().strftime('%H:%M:%S'), Decimal(order_total), 'Pending'),
+        )
+        order_id = cursor.lastrowid
+        cursor.execute(
+            "INSERT INTO payment (order_id, payment_mode, amount_paid, payment_status, transaction_date) VALUES (%s, %s, %s, %s, %s)",
+            (order_id, payment_mode, Decimal(order_total), 'Pending', date.today()),
+        )
+        for item in cart:
+            cursor.execute(
+                "INSERT INTO order_item (order_id, item_id, quantity, subtotal) VALUES (%s, %s, %s, %s)",
+                (order_id, item['item_id'], item['quantity'], Decimal(item['line_total'])),
+            )
+    return order_id
+
+
+def build_cart(items, lines):
+    cart = [{'item_id': items[i % len(items)]['item_id'], 'quantity': 1, 'line_total': items[i % len(items)]['price']}
+            for i in range(lines)]
+    return cart, sum(line['line_total'] for line in cart)
+
+
+def time_orders(fn, cart, total, rounds):
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn(STUDENT_ID, cart, total, 'Cash')
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.mean(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    args = parse_args()
+    items = db.fetch_all("SELECT item_id, price FROM item ORDER BY item_id")
+    if not items:
+        print("No items found; load seed.sql first.")
+        return 1
+    if not db.fetch_one("SELECT student_id FROM student WHERE student_id = %s", (STUDENT_ID,)):
+        db.execute_query(
+            "INSERT INTO student (student_id, name, email, department, year) VALUES (%s, %s, %s, %s, %s)",
+            (STUDENT_ID, 'Order Bench', 'order-bench@example.com', 'IS', 2),
+        )
+
+    header = f"{'lines':>6} {'batched mean':>13} {'p95':>8}"
+    if args.compare:
+        header += f" {'per-line mean':>14} {'p95':>8} {'speedup':>8}"
+    print(header + "   (ms)")
+    try:
+        for lines in CART_SIZES:
+            cart, total = build_cart(items, lines)
+            mean, p95 = time_orders(place_order, cart, total, args.rounds)
+            row = f"{lines:>6} {mean:>13.2f} {p95:>8.2f}"
+            if args.compare:
+                old_mean, old_p95 = time_orders(place_order_per_line, cart, total, args.rounds)
+                row += f" {old_mean:>14.2f} {old_p95:>8.2f} {old_mean / mean:>7.1f}x"
+            print(row)
+    finally:
+        db.execute_query("DELETE FROM order_info WHERE student_id = %s", (STUDENT_ID,))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
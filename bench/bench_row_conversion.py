@@ -0,0 +1,96 @@
+"""Micro-benchmark for the row conversion in db_config.fetch_all().
+
+Times turning 10k raw cursor rows shaped like the admin item list into
+result rows: the old path (dictionary cursor rows, then an isinstance()
+check on every value) against db_config.convert_rows() producing dict,
+tuple and namedtuple rows. No database is needed.
+
+    python bench/bench_row_conversion.py --rows 10000 --rounds 20
+
+With --live it also times fetch_all() end to end against the configured
+database (DB_BACKEND=sqlite works), reading the item table.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from decimal import Decimal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import db_config as db
+from mysql.connector import FieldType
+
+# (name, type_code, ...) as mysql.connector reports them for SELECT * FROM item
+ITEM_DESCRIPTION = (
+    ('item_id', FieldType.LONG, None, None, None, None, 0),
+    ('item_name', FieldType.VAR_STRING, None, None, None, None, 0),
+    ('price', FieldType.NEWDECIMAL, None, None, None, None, 0),
+    ('category', FieldType.VAR_STRING, None, None, None, None, 0),
+    ('availability_status', FieldType.TINY, None, None, None, None, 0),
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000, help='rows per result set')
+    parser.add_argument('--rounds', type=int, default=20, help='timed conversions per variant')
+    parser.add_argument('--live', action='store_true', help='also time fetch_all() on the configured database')
+    return parser.parse_args()
+
+
+def synthetic_rows(count):
+    return [(i, f'Item {i:05d}', Decimal(f'{i % 500}.{i % 100:02d}'), f'Category {i % 12}', i % 2)
+            for i in range(1, count + 1)]
+
+
+def old_conversion(description, rows):
+    """The previous fetch_all: dictionary-cursor rows, then every value checked."""
+    names = tuple(column[0] for column in description)
+    result = [dict(zip(names, row)) for row in rows]
+    for row in result:
+        for key, value in row.items():
+            if isinstance(value, Decimal):
+                row[key] = float(value)
+    return result
+
+
+def time_variant(func, rounds):
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.mean(samples), min(samples)
+
+
+def report(label, mean_ms, best_ms, baseline_ms=None):
+    speedup = f"{baseline_ms / mean_ms:6.2f}x" if baseline_ms else '      -'
+    print(f"{label:28} {mean_ms:9.2f} {best_ms:9.2f} {speedup}")
+
+
+def main():
+    args = parse_args()
+    rows = synthetic_rows(args.rows)
+
+    print(f"Converting {args.rows} rows, {args.rounds} rounds each")
+    print(f"{'variant':28} {'mean ms':>9} {'best ms':>9} {'speedup':>7}")
+    baseline, best = time_variant(lambda: old_conversion(ITEM_DESCRIPTION, rows), args.rounds)
+    report('old (dict + isinstance)', baseline, best)
+    for row_type in db.ROW_TYPES:
+        mean_ms, best = time_variant(lambda: db.convert_rows(ITEM_DESCRIPTION, rows, row_type), args.rounds)
+        report(f'convert_rows({row_type})', mean_ms, best, baseline)
+
+    if args.live:
+        count = db.fetch_one("SELECT COUNT(*) AS n FROM item")
+        print(f"\nfetch_all('SELECT * FROM item') on {db.DB_BACKEND} ({count['n'] if count else 0} rows)")
+        for row_type in db.ROW_TYPES:
+            mean_ms, best = time_variant(lambda: db.fetch_all("SELECT * FROM item", row_type=row_type), args.rounds)
+            report(f'fetch_all({row_type})', mean_ms, best)
+    db.get_pool().close_all()
+
+
+if __name__ == '__main__':
+    main()
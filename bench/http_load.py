@@ -0,0 +1,149 @@
+"""Shared pieces of the HTTP load benchmarks.
+
+A minimal keep-alive HTTP/1.1 client on asyncio streams (one per simulated
+student, each with its own cookie jar), so thousands of concurrent users
+fit in a single process without extra dependencies, plus a latency
+recorder that reports throughput and p50/p95/p99 per route.
+"""
+import asyncio
+import time
+from urllib.parse import urlencode, urlsplit
+
+
+class HttpClient:
+    """One simulated browser: a persistent connection and a cookie jar."""
+
+    def __init__(self, base_url, timeout=30.0):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self.cookies = {}
+        self._reader = None
+        self._writer = None
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None
+
+    async def request(self, method, path, form=None, headers=None):
+        """Sends one request and returns (status, headers, body); retries once on a stale connection."""
+        for attempt in (1, 2):
+            try:
+                if self._writer is None:
+                    self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+                return await asyncio.wait_for(self._exchange(method, path, form, headers), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                await self.close()
+                if attempt == 2:
+                    raise
+
+    async def _exchange(self, method, path, form, extra_headers):
+        body = urlencode(form).encode() if form is not None else b''
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", "Connection: keep-alive"]
+        if self.cookies:
+            lines.append("Cookie: " + "; ".join(f"{k}={v}" for k, v in self.cookies.items()))
+        if form is not None:
+            lines.append("Content-Type: application/x-www-form-urlencoded")
+        lines.append(f"Content-Length: {len(body)}")
+        for name, value in (extra_headers or {}).items():
+            lines.append(f"{name}: {value}")
+        self._writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by server")
+        version, status = status_line.decode().split(' ', 2)[:2]
+        headers = {}
+        while True:
+            line = (await self._reader.readline()).decode().rstrip('\r\n')
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            name = name.strip().lower()
+            value = value.strip()
+            if name == 'set-cookie':
+                cookie_name, _, cookie_value = value.split(';', 1)[0].partition('=')
+                self.cookies[cookie_name] = cookie_value
+            headers[name] = value
+
+        if headers.get('transfer-encoding') == 'chunked':
+            response_body = b''
+            while True:
+                size = int((await self._reader.readline()).strip(), 16)
+                response_body += await self._reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif 'content-length' in headers:
+            response_body = await self._reader.readexactly(int(headers['content-length']))
+        else:
+            response_body = await self._reader.read()
+            await self.close()
+        if version == 'HTTP/1.0' or headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return int(status), headers, response_body
+
+
+def percentile(sorted_samples, pct):
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, max(0, int(round(pct / 100 * len(sorted_samples))) - 1))
+    return sorted_samples[index]
+
+
+class LatencyRecorder:
+    """Collects per-route latencies (ms), errors and optional DB query counts."""
+
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.queries = {}
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, route, elapsed_ms, ok=True, queries=None):
+        self.samples.setdefault(route, []).append(elapsed_ms)
+        if not ok:
+            self.errors[route] = self.errors.get(route, 0) + 1
+        if queries is not None:
+            self.queries.setdefault(route, []).append(queries)
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def total_requests(self):
+        return sum(len(samples) for samples in self.samples.values())
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def summary(self):
+        """Per-route dicts with count, errors, rps, p50/p95/p99 (ms) and mean queries."""
+        rows = []
+        for route, samples in sorted(self.samples.items()):
+            ordered = sorted(samples)
+            queries = self.queries.get(route)
+            rows.append({
+                'route': route,
+                'count': len(ordered),
+                'errors': self.errors.get(route, 0),
+                'rps': len(ordered) / self.elapsed,
+                'p50': percentile(ordered, 50),
+                'p95': percentile(ordered, 95),
+                'p99': percentile(ordered, 99),
+                'queries': sum(queries) / len(queries) if queries else None,
+            })
+        return rows
+
+    def report(self, title):
+        print(f"\n== {title}: {self.total_requests} requests in {self.elapsed:.1f}s "
+              f"({self.total_requests / self.elapsed:.1f} req/s) ==")
+        print(f"{'route':<22} {'count':>7} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}")
+        for row in self.summary():
+            queries = f"{row['queries']:.1f}" if row['queries'] is not None else '-'
+            print(f"{row['route']:<22} {row['count']:>7} {row['errors']:>6} {row['rps']:>8.1f} "
+                  f"{row['p50']:>8.1f} {row['p95']:>8.1f} {row['p99']:>8.1f} {queries:>8}")
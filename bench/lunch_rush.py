@@ -0,0 +1,256 @@
+"""Lunch-rush load test for student_app and admin_app.
+
+Seeds thousands of extra students and menu items into the MySQL database
+configured in .env, boots both apps as subprocesses (with per-request query
+headers enabled), then replays the lunch flow with concurrent simulated
+students:
+
+    login -> menu -> add_to_cart (x N) -> cart -> checkout -> orders
+
+while kitchen workers poll the admin dashboard and complete pending orders.
+Reports throughput, p50/p95/p99 latency and DB queries per request for each
+route of each app.
+
+    python bench/lunch_rush.py --students 2000 --items 300 --workers 200 --duration 60
+
+Seeded rows use the 'LR' student prefix and the 'Rush' item category;
+--cleanup removes them (and their orders). Do not run against production data.
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from http_load import HttpClient, LatencyRecorder
+
+STUDENT_PREFIX = 'LR'
+ITEM_CATEGORY = 'Rush'
+CATEGORIES = ['Breakfast', 'Lunch', 'Snacks', 'Beverages', ITEM_CATEGORY]
+WALLET_PIN = '1234'
+
+# Collapses ids in paths so latencies are grouped per route
+ROUTE_IDS = re.compile(r'/\d+')
+ORDER_IDS = re.compile(r'update_order_status/(\d+)')
+CHECKOUT_KEY = re.compile(r'name="checkout_key" value="([^"]+)"')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=2000, help='students to seed')
+    parser.add_argument('--items', type=int, default=300, help='menu items to seed')
+    parser.add_argument('--workers', type=int, default=200, help='concurrent simulated students')
+    parser.add_argument('--kitchen-workers', type=int, default=2, help='concurrent admin dashboard pollers')
+    parser.add_argument('--duration', type=float, default=60.0, help='seconds of load')
+    parser.add_argument('--max-cart-items', type=int, default=3, help='distinct items added per order')
+    parser.add_argument('--wallet-share', type=float, default=0.5, help='fraction of checkouts paid by wallet')
+    parser.add_argument('--student-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--admin-url', default='http://127.0.0.1:5001')
+    parser.add_argument('--no-boot', action='store_true', help='use already running apps instead of starting them')
+    parser.add_argument('--no-seed', action='store_true', help='reuse previously seeded rows')
+    parser.add_argument('--cleanup', action='store_true', help='delete the seeded rows and exit')
+    parser.add_argument('--seed', type=int, default=42, help='random seed for the simulated flows')
+    return parser.parse_args()
+
+
+# --- Fixtures ---
+
+def student_ids(count):
+    return [f"{STUDENT_PREFIX}{n:05d}" for n in range(1, count + 1)]
+
+
+def seed(db, students, items):
+    """Inserts (or tops up) the bench students and items in a single transaction."""
+    from menu_cache import bump_menu_version
+    from student_auth import invalidate_students
+    student_rows = [
+        (sid, f"Rush Student {n}", f"{sid.lower()}@bench.example.com", 'IS', 2 + n % 2, 100000)
+        for n, sid in enumerate(student_ids(students), 1)
+    ]
+    item_rows = [
+        (f"Rush Item {n:04d}", round(random.uniform(10, 150), 2), CATEGORIES[n % len(CATEGORIES)])
+        for n in range(1, items + 1)
+    ]
+    with db.transaction() as cursor:
+        cursor.executemany(
+            "INSERT INTO student (student_id, name, email, department, year, balance) "
+            "VALUES (%s, %s, %s, %s, %s, %s) ON DUPLICATE KEY UPDATE balance = VALUES(balance)",
+            student_rows,
+        )
+        cursor.executemany(
+            "INSERT INTO item (item_name, price, category, availability_status) "
+            "VALUES (%s, %s, %s, 1) ON DUPLICATE KEY UPDATE availability_status = 1",
+            item_rows,
+        )
+    invalidate_students()
+    bump_menu_version()
+    print(f"Seeded {len(student_rows)} students and {len(item_rows)} items.")
+
+
+def cleanup(db):
+    from menu_cache import bump_menu_version
+    from student_auth import invalidate_students
+    with db.transaction() as cursor:
+        cursor.execute("DELETE FROM student WHERE student_id LIKE %s", (STUDENT_PREFIX + '%',))
+        students = cursor.rowcount
+        cursor.execute(
+            "DELETE FROM item WHERE item_name LIKE 'Rush Item %' "
+            "AND item_id NOT IN (SELECT item_id FROM order_item)"
+        )
+        items = cursor.rowcount
+    invalidate_students()
+    bump_menu_version()
+    print(f"Removed {students} students (and their orders) and {items} items.")
+
+
+def available_item_ids(db):
+    return [row['item_id'] for row in db.fetch_all("SELECT item_id FROM item WHERE availability_status = 1")]
+
+
+# --- App processes ---
+
+def boot_app(module, url, env):
+    """Starts one app with the threaded dev server (no reloader) and waits for its port."""
+    port = int(url.rsplit(':', 1)[1])
+    code = f"import {module}; {module}.app.run(port={port}, threaded=True, debug=False, use_reloader=False)"
+    proc = subprocess.Popen([sys.executable, '-c', code], cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{module} exited with code {proc.returncode}")
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"{module} did not start listening on port {port}")
+
+
+# --- Flows ---
+
+async def timed(client, recorder, method, path, form=None):
+    """Issues one request and records its latency and X-DB-Queries under the route name."""
+    route = f"{method} {ROUTE_IDS.sub('/<id>', path.split('?', 1)[0])}"
+    started = time.perf_counter()
+    try:
+        status, headers, body = await client.request(method, path, form)
+    except (OSError, asyncio.TimeoutError, ValueError):
+        recorder.record(route, (time.perf_counter() - started) * 1000, ok=False)
+        return None, {}, b''
+    queries = headers.get('x-db-queries')
+    recorder.record(route, (time.perf_counter() - started) * 1000, ok=status < 400,
+                    queries=int(queries) if queries is not None else None)
+    return status, headers, body
+
+
+async def student_flow(args, recorder, students, item_ids, deadline, rng, stats):
+    client = HttpClient(args.student_url)
+    try:
+        while time.monotonic() < deadline:
+            await timed(client, recorder, 'POST', '/login', {'student_id': rng.choice(students)})
+            await timed(client, recorder, 'GET', '/menu')
+            for item_id in rng.sample(item_ids, min(len(item_ids), rng.randint(1, args.max_cart_items))):
+                await timed(client, recorder, 'POST', f'/add_to_cart/{item_id}', {'quantity': rng.randint(1, 3)})
+            await timed(client, recorder, 'GET', '/cart')
+            _, _, page = await timed(client, recorder, 'GET', '/checkout')
+            if rng.random() < args.wallet_share:
+                form = {'payment_mode': 'Wallet', 'wallet_pin': WALLET_PIN}
+            else:
+                form = {'payment_mode': 'Cash'}
+            key = CHECKOUT_KEY.search(page.decode(errors='replace'))
+            form['checkout_key'] = key.group(1) if key else ''
+            status, headers, _ = await timed(client, recorder, 'POST', '/checkout', form)
+            location = headers.get('location', '')
+            # With ORDER_QUEUE=sqlite, non-wallet orders land on the queued page first
+            if status == 302 and ('/order_success/' in location or '/orders/queued/' in location):
+                stats['orders'] += 1
+                await timed(client, recorder, 'GET', urlsplit(headers['location']).path)
+            else:
+                stats['failed_checkouts'] += 1
+            await timed(client, recorder, 'GET', '/orders')
+            await timed(client, recorder, 'GET', '/logout')
+    finally:
+        await client.close()
+
+
+async def kitchen_flow(args, recorder, deadline, stats):
+    """Admin side: polls the dashboard and completes the pending orders it shows."""
+    client = HttpClient(args.admin_url)
+    try:
+        await timed(client, recorder, 'POST', '/admin/login', {
+            'username': os.getenv('ADMIN_USERNAME', ''), 'password': os.getenv('ADMIN_PASSWORD', ''),
+        })
+        while time.monotonic() < deadline:
+            _, _, body = await timed(client, recorder, 'GET', '/admin/dashboard')
+            for order_id in ORDER_IDS.findall(body.decode(errors='replace'))[:20]:
+                await timed(client, recorder, 'POST', f'/admin/update_order_status/{order_id}', {'status': 'Completed'})
+                stats['completed'] += 1
+            await asyncio.sleep(1)
+    finally:
+        await client.close()
+
+
+async def run_load(args, students, item_ids):
+    student_recorder, admin_recorder = LatencyRecorder(), LatencyRecorder()
+    stats = {'orders': 0, 'failed_checkouts': 0, 'completed': 0}
+    deadline = time.monotonic() + args.duration
+    rng = random.Random(args.seed)
+    flows = [student_flow(args, student_recorder, students, item_ids, deadline, random.Random(rng.random()), stats)
+             for _ in range(args.workers)]
+    flows += [kitchen_flow(args, admin_recorder, deadline, stats) for _ in range(args.kitchen_workers)]
+    await asyncio.gather(*flows)
+    student_recorder.stop()
+    admin_recorder.stop()
+    return student_recorder, admin_recorder, stats
+
+
+def main():
+    args = parse_args()
+    from dotenv import load_dotenv
+    load_dotenv(os.path.join(ROOT, '.env'))
+    import db_config as db
+
+    if args.cleanup:
+        cleanup(db)
+        return
+    if not args.no_seed:
+        seed(db, args.students, args.items)
+    students = student_ids(args.students)
+    item_ids = available_item_ids(db)
+    if not item_ids:
+        sys.exit("No available items to order; seed the database first.")
+
+    procs = []
+    if not args.no_boot:
+        env = dict(os.environ, DB_QUERY_HEADERS='1', DB_POOL_SIZE=os.getenv('DB_POOL_SIZE', '32'))
+        procs.append(boot_app('student_app', args.student_url, env))
+        procs.append(boot_app('admin_app', args.admin_url, env))
+    try:
+        print(f"Running {args.workers} students and {args.kitchen_workers} kitchen workers for {args.duration:.0f}s...")
+        student_recorder, admin_recorder, stats = asyncio.run(run_load(args, students, item_ids))
+    finally:
+        for proc in procs:
+            proc.terminate()
+            proc.wait()
+
+    student_recorder.report(f"student_app ({args.student_url})")
+    admin_recorder.report(f"admin_app ({args.admin_url})")
+    print(f"\nOrders placed: {stats['orders']}  failed checkouts: {stats['failed_checkouts']}  "
+          f"completed by kitchen: {stats['completed']}  "
+          f"orders/s: {stats['orders'] / student_recorder.elapsed:.1f}")
+
+
+if __name__ == '__main__':
+    main()
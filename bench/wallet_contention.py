@@ -0,0 +1,121 @@
+"""Concurrency harness for the wallet debit in checkout().
+
+Fires many parallel Wallet checkouts for one student through the Flask test
+client, against the MySQL database configured in .env, then verifies that
+the wallet was never overdrawn and that the final balance equals the
+starting balance minus the orders that were actually placed.
+
+    python bench/wallet_contention.py --workers 50 --checkouts 500
+
+Creates (and resets) the student BENCH-WALLET and the item
+'Bench Wallet Item'; do not run it against production data.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+STUDENT_ID = 'BENCH-WALLET'
+ITEM_NAME = 'Bench Wallet Item'
+CHECKOUT_KEY = re.compile(r'name="checkout_key" value="([^"]+)"')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=50, help='parallel checkout threads')
+    parser.add_argument('--checkouts', type=int, default=500, help='total checkout attempts')
+    parser.add_argument('--balance', type=float, default=2000.0, help='starting wallet balance')
+    parser.add_argument('--price', type=float, default=10.0, help='price of the single cart item')
+    return parser.parse_args()
+
+
+def reset_fixtures(db, balance, price):
+    """Creates the bench student and item with a known balance and price."""
+    db.execute_query("DELETE FROM order_info WHERE student_id = %s", (STUDENT_ID,))
+    db.execute_query("DELETE FROM student WHERE student_id = %s", (STUDENT_ID,))
+    db.execute_query(
+        "INSERT INTO student (student_id, name, email, department, year, balance) VALUES (%s, %s, %s, %s, %s, %s)",
+        (STUDENT_ID, 'Wallet Bench', 'wallet-bench@example.com', 'IS', 2, balance),
+    )
+    item = db.fetch_one("SELECT item_id FROM item WHERE item_name = %s", (ITEM_NAME,))
+    if item:
+        item_id = item['item_id']
+        db.execute_query("UPDATE item SET price = %s, availability_status = 1 WHERE item_id = %s", (price, item_id))
+    else:
+        item_id = db.execute_query(
+            "INSERT INTO item (item_name, price, category, availability_status) VALUES (%s, %s, %s, 1)",
+            (ITEM_NAME, price, 'Bench'), fetch_id=True,
+        )
+    db.execute_query("DELETE FROM daily_special WHERE item_id = %s", (item_id,))
+    return item_id
+
+
+def checkout_once(app, item_id):
+    """Logs in, adds one item and pays by wallet; returns 'placed', 'rejected' or 'error'."""
+    client = app.test_client()
+    client.post('/login', data={'student_id': STUDENT_ID})
+    client.post(f'/add_to_cart/{item_id}', data={'quantity': 1})
+    # Each checkout form carries a one-shot idempotency key
+    form = client.get('/checkout').get_data(as_text=True)
+    key = CHECKOUT_KEY.search(form)
+    resp = client.post('/checkout', data={
+        'payment_mode': 'Wallet', 'wallet_pin': '1234', 'checkout_key': key.group(1) if key else '',
+    })
+    location = resp.headers.get('Location', '')
+    if resp.status_code == 302 and '/order_success/' in location:
+        return 'placed'
+    if resp.status_code == 302 and location.endswith('/checkout'):
+        return 'rejected'
+    return 'error'
+
+
+def main():
+    args = parse_args()
+    # Give every worker its own pooled connection
+    os.environ.setdefault('DB_POOL_SIZE', str(args.workers + 2))
+
+    import db_config as db
+    import student_app
+    from menu_cache import bump_menu_version
+    from student_auth import invalidate_students
+
+    item_id = reset_fixtures(db, args.balance, args.price)
+    bump_menu_version()
+    invalidate_students()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        outcomes = list(pool.map(lambda _: checkout_once(student_app.app, item_id), range(args.checkouts)))
+    elapsed = time.perf_counter() - started
+
+    placed = outcomes.count('placed')
+    final = db.fetch_one("SELECT balance FROM student WHERE student_id = %s", (STUDENT_ID,))
+    orders = db.fetch_one(
+        "SELECT COUNT(*) AS n, COALESCE(SUM(total_amount), 0) AS total FROM order_info WHERE student_id = %s",
+        (STUDENT_ID,),
+    )
+    final_balance = Decimal(str(final['balance']))
+    expected = Decimal(str(args.balance)) - Decimal(str(orders['total']))
+
+    print(f"attempts:        {args.checkouts} ({args.workers} workers)")
+    print(f"placed:          {placed}")
+    print(f"rejected:        {outcomes.count('rejected')} (insufficient balance)")
+    print(f"errors:          {outcomes.count('error')}")
+    print(f"elapsed:         {elapsed:.2f}s ({args.checkouts / elapsed:.1f} checkouts/s)")
+    print(f"orders in DB:    {orders['n']}")
+    print(f"final balance:   {final_balance} (expected {expected})")
+    print(f"pool:            {db.pool_stats()}")
+
+    ok = final_balance == expected and final_balance >= 0 and orders['n'] == placed
+    print("RESULT:          " + ("OK" if ok else "FAIL"))
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+# Server-side cart storage for student_app.py
+#
+# Carts are kept as compact [item_id, quantity] pairs keyed by student_id, so
+# the signed session cookie no longer carries (and re-serializes) full item
+# rows. Names and prices are rehydrated from the menu cache on read.
+#
+# CART_STORE=memory keeps carts in a bounded in-process LRU (single worker);
+# CART_STORE=sqlite keeps them in a local SQLite file that every worker
+# process on the host can share; carts there expire CART_STORE_TTL seconds
+# after their last change and are swept out as other carts are written.
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CART_STORE = os.getenv('CART_STORE', 'memory')
+CART_STORE_PATH = os.getenv('CART_STORE_PATH', 'carts.sqlite3')
+CART_STORE_MAX = int(os.getenv('CART_STORE_MAX', '10000'))
+CART_STORE_TTL = float(os.getenv('CART_STORE_TTL', '86400'))
+
+
+class MemoryCartStore:
+    """In-process LRU of carts; the least recently used cart is evicted past max_entries."""
+
+    def __init__(self, max_entries=CART_STORE_MAX):
+        self.max_entries = max_entries
+        self._carts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            pairs = self._carts.get(key)
+            if pairs is None:
+                return []
+            self._carts.move_to_end(key)
+            return [list(pair) for pair in pairs]
+
+    def set(self, key, pairs):
+        if not pairs:
+            self.delete(key)
+            return
+        with self._lock:
+            self._carts[key] = [tuple(pair) for pair in pairs]
+            self._carts.move_to_end(key)
+            while len(self._carts) > self.max_entries:
+                self._carts.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._carts.pop(key, None)
+
+
+class SQLiteCartStore:
+    """Carts in a local SQLite file (WAL mode), shared by all worker processes.
+
+    A cart older than `ttl` seconds (by updated_at) is no longer returned.
+    Every PURGE_EVERY writes the expired carts are deleted, along with the
+    least recently updated ones beyond max_entries, so the file stays bounded
+    like MemoryCartStore.
+    """
+
+    PURGE_EVERY = 200  # writes between sweeps of expired carts
+
+    def __init__(self, path=CART_STORE_PATH, ttl=CART_STORE_TTL, max_entries=CART_STORE_MAX):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cart (
+                    cart_key TEXT PRIMARY KEY,
+                    items TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cart_updated_at ON cart (updated_at)")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute("SELECT items FROM cart WHERE cart_key = ? AND updated_at >= ?",
+                                      (key, time.time() - self.ttl)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def set(self, key, pairs):
+        if not pairs:
+            self.delete(key)
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cart (cart_key, items, updated_at) VALUES (?, ?, ?)",
+                (key, json.dumps([list(pair) for pair in pairs], separators=(',', ':')), now),
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self._purge(conn, now)
+
+    def _purge(self, conn, now):
+        conn.execute("DELETE FROM cart WHERE updated_at < ?", (now - self.ttl,))
+        conn.execute("DELETE FROM cart WHERE cart_key IN "
+                     "(SELECT cart_key FROM cart ORDER BY updated_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cart WHERE cart_key = ?", (key,))
+
+
+def create_cart_store(kind=CART_STORE):
+    if kind == 'memory':
+        return MemoryCartStore()
+    if kind == 'sqlite':
+        return SQLiteCartStore()
+    raise ValueError(f"Unknown CART_STORE '{kind}' (expected 'memory' or 'sqlite').")
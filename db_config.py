@@ -1,6 +1,13 @@
 import mysql.connector
-from flask import flash
+from mysql.connector import FieldType, errors
+from flask import flash, g, has_app_context
 import os
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from decimal import Decimal
+from functools import lru_cache
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -15,9 +22,23 @@ DB_CONFIG = {
     'database': os.getenv('DB_NAME', 'canteen')
 }
 
+# mysql (default) or sqlite, for development, CI and benchmarks (see db_dialect.py)
+DB_BACKEND = os.getenv('DB_BACKEND', 'mysql')
+DB_SQLITE_PATH = os.getenv('DB_SQLITE_PATH', ':memory:')
+
+# Connection pool settings (see .env.example)
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '5'))
+POOL_RECYCLE = float(os.getenv('DB_POOL_RECYCLE', '300'))
+
+# Adds X-DB-Queries / X-DB-Time-Ms response headers (used by bench/lunch_rush.py)
+QUERY_HEADERS = os.getenv('DB_QUERY_HEADERS') == '1'
+
 
 def validate_db_config():
     """Checks that required DB config values are present and returns a tuple (ok, msg)."""
+    if DB_BACKEND == 'sqlite':
+        return True, 'OK'
     missing = []
     if not DB_CONFIG.get('database'):
         missing.append('DB_NAME')
@@ -27,9 +48,213 @@ def validate_db_config():
         return False, f"Missing environment variables: {', '.join(missing)}"
     return True, 'OK'
 
+class PoolExhaustedError(errors.PoolError):
+    """Raised when no pooled connection becomes free within the checkout timeout."""
+
+
+def record_query(elapsed, statement):
+    """Adds one statement and its duration to the current request's tally."""
+    if has_app_context():
+        g.db_query_count = g.get('db_query_count', 0) + 1
+        g.db_query_seconds = g.get('db_query_seconds', 0.0) + elapsed
+        if elapsed > g.get('db_slowest', (0.0, None))[0]:
+            g.db_slowest = (elapsed, statement)
+
+
+class TrackedCursor:
+    """Cursor proxy that counts every execute()/executemany() against the request."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, *args, **kwargs)
+        finally:
+            record_query(time.perf_counter() - started, operation)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+        finally:
+            record_query(time.perf_counter() - started, operation)
+
+
+class PooledConnection:
+    """Thin proxy around a MySQL connection; close() hands it back to the pool."""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise errors.InterfaceError("Connection already returned to the pool.")
+        return getattr(self._conn, name)
+
+    def cursor(self, *args, **kwargs):
+        return TrackedCursor(self.__getattr__('cursor')(*args, **kwargs))
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn)
+
+
+class ConnectionPool:
+    """Bounded pool of MySQL connections shared by every helper in this module.
+
+    Idle connections are pinged on checkout and closed once they have been
+    idle longer than `recycle` seconds, so a MySQL-side wait_timeout never
+    hands a dead socket to a request. When all `size` connections are busy,
+    acquire() waits up to `timeout` seconds and then raises PoolExhaustedError.
+    """
+
+    def __init__(self, config, size=POOL_SIZE, timeout=POOL_TIMEOUT, recycle=POOL_RECYCLE, connect=None):
+        self.config = config
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self._connect = connect or mysql.connector.connect
+        self._idle = deque()  # (connection, last_used) pairs, most recent on the right
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._in_use = 0
+        self._closed = False
+        self._stats = {
+            'connections_created': 0,
+            'checkouts': 0,
+            'reused': 0,
+            'recycled': 0,
+            'health_check_failures': 0,
+            'exhausted': 0,
+            'wait_seconds_total': 0.0,
+        }
+
+    def acquire(self):
+        """Borrows a healthy connection, opening a new one if none is idle."""
+        if self._closed:
+            raise errors.PoolError("Connection pool is closed.")
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._stats['exhausted'] += 1
+            raise PoolExhaustedError(f"No free connection in pool after {self.timeout}s (size={self.size}).")
+        waited = time.monotonic() - started
+        try:
+            conn = self._checkout_idle()
+            if conn is None:
+                conn = self._connect(**self.config)
+                with self._lock:
+                    self._stats['connections_created'] += 1
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._in_use += 1
+            self._stats['checkouts'] += 1
+            self._stats['wait_seconds_total'] += waited
+        return PooledConnection(self, conn)
+
+    def _checkout_idle(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                conn, last_used = self._idle.pop()
+            if time.monotonic() - last_used > self.recycle:
+                self._discard(conn, 'recycled')
+                continue
+            if not conn.is_connected():
+                self._discard(conn, 'health_check_failures')
+                continue
+            with self._lock:
+                self._stats['reused'] += 1
+            return conn
+
+    def _discard(self, conn, reason):
+        with self._lock:
+            self._stats[reason] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def release(self, conn):
+        """Returns a borrowed connection, rolling back anything left uncommitted."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            with self._lock:
+                pooled = not self._closed
+                if pooled:
+                    self._idle.append((conn, time.monotonic()))
+            if not pooled:
+                conn.close()
+        except mysql.connector.Error:
+            self._discard(conn, 'health_check_failures')
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    def stats(self):
+        """Snapshot of pool usage counters for monitoring."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot.update(size=self.size, in_use=self._in_use, idle=len(self._idle))
+        return snapshot
+
+    def close_all(self):
+        """Closes every idle connection and the pool itself.
+
+        Borrowed connections are closed when they are released, and further
+        acquire() calls raise PoolError.
+        """
+        with self._lock:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+        for conn, _ in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Returns the process-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                if DB_BACKEND == 'sqlite':
+                    import db_dialect
+                    _pool = ConnectionPool({'database': DB_SQLITE_PATH}, connect=db_dialect.connect)
+                else:
+                    _pool = ConnectionPool(DB_CONFIG)
+    return _pool
+
+
+def pool_stats():
+    return get_pool().stats()
+
+
 def get_db_connection():
+    """Borrows a connection from the pool; call close() to give it back."""
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
+        conn = get_pool().acquire()
         return conn
     except mysql.connector.Error as err:
         print(f"Error connecting to MySQL: {err}")
@@ -40,65 +265,292 @@ def get_db_connection():
             pass
         return None
 
-def fetch_all(query, params=None):
-    conn = get_db_connection()
+# --- Request-scoped connection & unit of work ---
+
+# Holds the connection of a transaction() opened outside a Flask request
+_local = threading.local()
+
+
+def get_request_connection():
+    """Returns this request's connection, borrowing it from the pool on first use."""
+    if 'db_conn' not in g:
+        g.db_conn = get_db_connection()
+    return g.db_conn
+
+
+def close_request_connection(exc=None):
+    """Teardown hook: hands the request's connection back to the pool."""
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        conn.close()
+
+
+def add_query_headers(response):
+    """after_request hook: reports how many statements the request ran and how long they took."""
+    response.headers['X-DB-Queries'] = str(g.get('db_query_count', 0))
+    response.headers['X-DB-Time-Ms'] = f"{g.get('db_query_seconds', 0.0) * 1000:.2f}"
+    return response
+
+
+def init_app(app):
+    """Registers the teardown hook that releases the per-request connection."""
+    app.teardown_appcontext(close_request_connection)
+    if QUERY_HEADERS:
+        app.after_request(add_query_headers)
+
+
+def _tx_scope():
+    return g if has_app_context() else _local
+
+
+def _in_transaction():
+    return getattr(_tx_scope(), 'db_tx_depth', 0) > 0
+
+
+def _borrow():
+    """Returns (conn, owned); only owned connections are closed by the caller."""
+    if has_app_context():
+        return get_request_connection(), False
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        return conn, False
+    return get_db_connection(), True
+
+
+@contextmanager
+def transaction():
+    """Unit of work: yields a dict cursor and commits on exit, rolls back on error.
+
+    Inside a request it runs on the request's connection; fetch_all/fetch_one/
+    execute_query called within the block join it instead of committing on
+    their own, and re-raise database errors so the whole unit rolls back.
+    Nested blocks join the outermost one.
+    """
+    scope = _tx_scope()
+    depth = getattr(scope, 'db_tx_depth', 0)
+    owned = False
+    if has_app_context():
+        conn = get_request_connection()
+    elif depth:
+        conn = _local.conn
+    else:
+        conn = get_db_connection()
+        owned = True
+    if conn is None:
+        raise errors.InterfaceError("Database connection unavailable.")
+    if owned:
+        _local.conn = conn
+    if depth == 0 and conn.in_transaction:
+        # End the read snapshot left open by earlier SELECTs in this request
+        conn.commit()
+
+    cursor = conn.cursor(dictionary=True)
+    scope.db_tx_depth = depth + 1
+    try:
+        yield cursor
+        if depth == 0:
+            conn.commit()
+    except Exception:
+        if depth == 0:
+            conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        scope.db_tx_depth = depth
+        if owned:
+            _local.conn = None
+            conn.close()
+
+# --- Row conversion ---
+
+# MySQL DECIMAL columns are returned as float by fetch_all/fetch_one
+DECIMAL_TYPES = (FieldType.DECIMAL, FieldType.NEWDECIMAL)
+ROW_TYPES = ('dict', 'tuple', 'namedtuple')
+
+
+def _to_float(value):
+    return None if value is None else float(value)
+
+
+def _maybe_float(value):
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def column_converters(description, sample=None):
+    """Index/converter pairs for the columns that need converting, built once per result set.
+
+    Columns are picked by their type code in cursor.description. Drivers
+    that report no type code (the SQLite backend) are judged by the first
+    row instead; a column that is NULL there is checked value by value.
+    """
+    converters = []
+    for index, column in enumerate(description):
+        type_code = column[1]
+        if type_code in DECIMAL_TYPES:
+            converters.append((index, _to_float))
+        elif type_code is None and sample is not None:
+            if isinstance(sample[index], Decimal):
+                converters.append((index, _to_float))
+            elif sample[index] is None:
+                converters.append((index, _maybe_float))
+    return converters
+
+
+@lru_cache(maxsize=256)
+def _namedtuple_class(names):
+    return namedtuple('Row', names, rename=True)
+
+
+@lru_cache(maxsize=256)
+def row_builder(names, converters, row_type):
+    """Compiles `row -> result row` for one result shape, e.g. for dicts:
+
+        lambda row: {'item_id': row[0], 'price': _to_float(row[1])}
+
+    A literal built in one expression is several times cheaper than
+    dict(zip()) plus a loop over converters; cached per shape, so each
+    query compiles it once.
+    """
+    converters = dict(converters)
+    values = [f"{converters[index].__name__}(row[{index}])" if index in converters else f"row[{index}]"
+              for index in range(len(names))]
+    namespace = {'_to_float': _to_float, '_maybe_float': _maybe_float}
+    if row_type == 'dict':
+        body = '{' + ', '.join(f"{name!r}: {value}" for name, value in zip(names, values)) + '}'
+    elif row_type == 'namedtuple':
+        namespace['Row'] = _namedtuple_class(names)
+        body = f"Row({', '.join(values)})"
+    else:
+        body = f"({', '.join(values)},)"
+    return eval(f"lambda row: {body}", namespace)
+
+
+def convert_rows(description, rows, row_type='dict'):
+    """Turns raw cursor tuples into dict, tuple or namedtuple rows with DECIMAL as float."""
+    if row_type not in ROW_TYPES:
+        raise ValueError(f"Unknown row_type '{row_type}' (expected one of {', '.join(ROW_TYPES)}).")
+    if not rows:
+        return []
+    converters = tuple(column_converters(description, rows[0]))
+    if row_type == 'tuple' and not converters:
+        return rows
+    names = tuple(column[0] for column in description)
+    return list(map(row_builder(names, converters, row_type), rows))
+
+
+# --- Query Helpers ---
+
+def fetch_all(query, params=None, row_type='dict'):
+    """All rows as dicts (or 'tuple' / 'namedtuple' rows); DECIMAL values come back as float."""
+    conn, owned = _borrow()
     if not conn: return []
     
-    cursor = conn.cursor(dictionary=True)
+    # Plain tuples from the driver; convert_rows only touches DECIMAL columns
+    cursor = conn.cursor()
     try:
         cursor.execute(query, params or ())
-        result = cursor.fetchall()
-        # Convert Decimals to float
-        from decimal import Decimal
-        for row in result:
-            for key, value in row.items():
-                if isinstance(value, Decimal):
-                    row[key] = float(value)
-        return result
+        return convert_rows(cursor.description, cursor.fetchall(), row_type)
     except mysql.connector.Error as err:
+        if _in_transaction(): raise
         print(f"Database error in fetch_all: {err}")
         return []
     finally:
         cursor.close()
-        conn.close()
+        if owned: conn.close()
 
-def fetch_one(query, params=None):
-    conn = get_db_connection()
+def fetch_one(query, params=None, row_type='dict'):
+    conn, owned = _borrow()
     if not conn: return None
     
-    cursor = conn.cursor(dictionary=True)
+    cursor = conn.cursor()
     try:
         cursor.execute(query, params or ())
-        result = cursor.fetchone()
-        if result:
-            from decimal import Decimal
-            for key, value in result.items():
-                if isinstance(value, Decimal):
-                    result[key] = float(value)
-        return result
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        # Unbuffered cursors must be drained before the next statement
+        cursor.fetchall()
+        return convert_rows(cursor.description, [row], row_type)[0]
     except mysql.connector.Error as err:
+        if _in_transaction(): raise
         print(f"Database error in fetch_one: {err}")
         return None
     finally:
         cursor.close()
-        conn.close()
+        if owned: conn.close()
 
 def execute_query(query, params=None, fetch_id=False):
-    conn = get_db_connection()
+    conn, owned = _borrow()
     if not conn: return None
         
     cursor = conn.cursor()
     try:
         cursor.execute(query, params or ())
-        conn.commit()
+        if not _in_transaction():
+            conn.commit()
         if fetch_id:
             last_id = cursor.lastrowid
             return last_id
         return True
     except mysql.connector.Error as err:
+        if _in_transaction(): raise
         print(f"Database error in execute_query: {err}")
         conn.rollback()
         return False
     finally:
         cursor.close()
-        conn.close()
\ No newline at end of file
+        if owned: conn.close()
+
+class QueryStream:
+    """Rows of one query, read lazily in fetchmany() batches from an unbuffered cursor.
+
+    Iterating yields row tuples. close() hands the connection back to the
+    pool; it runs on its own once the rows run out and is safe to repeat.
+    """
+
+    def __init__(self, conn, cursor, batch_size):
+        self._conn = conn
+        self._cursor = cursor
+        self.batch_size = batch_size
+
+    def __iter__(self):
+        try:
+            while self._conn is not None:
+                rows = self._cursor.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            self.close()
+
+    def close(self):
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        try:
+            self._cursor.close()
+        except mysql.connector.Error:
+            pass  # closing an unbuffered cursor early may complain about unread rows
+        conn.close()
+
+
+def iter_query(query, params=None, batch_size=500):
+    """Streams result tuples without buffering the whole result set.
+
+    Uses its own pooled connection (not the request's), so it can back a
+    streamed Response that outlives the request context. The connection is
+    taken and the query run right away, so a failure raises here
+    (InterfaceError when no connection is available) while the caller can
+    still answer with an error status; only the rows arrive lazily. Returns
+    a QueryStream; close it if it may not be read to the end.
+    """
+    conn = get_db_connection()
+    if conn is None:
+        raise errors.InterfaceError("Database connection unavailable.")
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, params or ())
+    except mysql.connector.Error:
+        QueryStream(conn, cursor, batch_size).close()
+        raise
+    return QueryStream(conn, cursor, batch_size)
@@ -0,0 +1,398 @@
+# SQLite backend for db_config.py, for development, CI and benchmarks
+#
+# The apps keep writing MySQL SQL with %s placeholders. With DB_BACKEND=sqlite
+# the pool in db_config.py opens SQLiteConnection objects instead, whose
+# cursors translate each statement once (translate_sql is memoized) and hand
+# rows back the way mysql.connector does: dicts for cursor(dictionary=True),
+# DECIMAL as Decimal, DATE/DATETIME as date/datetime and TIME as timedelta.
+# sqlite3 errors are re-raised as the matching mysql.connector error, so the
+# apps' existing `except mysql.connector.Error` handling applies unchanged.
+#
+# The SQLite schema is generated from schema.sql (and seed.sql, on request),
+# so there is no second copy to keep in step. DECIMAL columns are stored as
+# REAL: close enough for dev data and benchmarks, but not exact money.
+# DB_SQLITE_PATH=:memory: gives a private in-memory database per process,
+# created on first connect; use a file (WAL mode) when several processes or
+# many threads share the data:
+#
+#   python db_dialect.py canteen.sqlite3 --seed   # create (or recreate) a file
+#   DB_BACKEND=sqlite DB_SQLITE_PATH=canteen.sqlite3 python student_app.py
+import argparse
+import os
+import re
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from functools import lru_cache
+
+from mysql.connector import errors
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SCHEMA_FILE = os.path.join(ROOT, 'schema.sql')
+SEED_FILE = os.path.join(ROOT, 'seed.sql')
+
+LOCAL_NOW = "DATETIME('now', 'localtime')"
+
+# --- Statement translation ---
+
+# Single-quoted literals are copied through untouched
+_LITERAL_RE = re.compile(r"('(?:[^']|'')*')")
+
+_SIMPLE_REWRITES = [
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'%%'), '%'),
+    (re.compile(r'\bCURDATE\(\)', re.I), "DATE('now', 'localtime')"),
+    (re.compile(r'\bNOW\(\)', re.I), LOCAL_NOW),
+    (re.compile(r'\bINSERT\s+IGNORE\b', re.I), 'INSERT OR IGNORE'),
+    (re.compile(r'\s+FOR\s+UPDATE\b', re.I), ''),
+]
+
+_UPSERT_RE = re.compile(r'\bON\s+DUPLICATE\s+KEY\s+UPDATE\b', re.I)
+_UPSERT_VALUE_RE = re.compile(r'\bVALUES\((\w+)\)', re.I)
+
+
+def _call_args(sql, open_paren):
+    """Splits the arguments of the call whose '(' is at open_paren; returns (args, index after ')')."""
+    depth = 0
+    args, start = [], open_paren + 1
+    for i in range(open_paren, len(sql)):
+        char = sql[i]
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                args.append(sql[start:i].strip())
+                return args, i + 1
+        elif char == ',' and depth == 1:
+            args.append(sql[start:i].strip())
+            start = i + 1
+    raise errors.ProgrammingError(f"Unbalanced parentheses in: {sql}")
+
+
+def _rewrite_calls(sql, name, build):
+    pattern = re.compile(rf'\b{name}\s*\(', re.I)
+    match = pattern.search(sql)
+    while match:
+        args, end = _call_args(sql, match.end() - 1)
+        replacement = build(*args)
+        sql = sql[:match.start()] + replacement + sql[end:]
+        match = pattern.search(sql, match.start() + len(replacement))
+    return sql
+
+
+def _timestamp(value, time_of_day=None):
+    return f"DATETIME({value} || ' ' || {time_of_day})" if time_of_day else f"DATETIME({value})"
+
+
+def _timestampdiff(unit, start, end):
+    seconds = f"ROUND((JULIANDAY({end}) - JULIANDAY({start})) * 86400)"
+    divisor = {'SECOND': 1, 'MINUTE': 60, 'HOUR': 3600, 'DAY': 86400}[unit.upper()]
+    return f"CAST({seconds} AS INTEGER)" if divisor == 1 else f"CAST({seconds} / {divisor} AS INTEGER)"
+
+
+@lru_cache(maxsize=1024)
+def translate_sql(sql):
+    """MySQL statement as used by the apps -> equivalent SQLite statement."""
+    parts = _LITERAL_RE.split(sql)
+    for i in range(0, len(parts), 2):
+        for pattern, replacement in _SIMPLE_REWRITES:
+            parts[i] = pattern.sub(replacement, parts[i])
+    sql = ''.join(parts)
+    upsert = _UPSERT_RE.search(sql)
+    if upsert:
+        # ON DUPLICATE KEY UPDATE c = VALUES(c) -> ON CONFLICT DO UPDATE SET c = excluded.c
+        sql = (sql[:upsert.start()] + 'ON CONFLICT DO UPDATE SET'
+               + _UPSERT_VALUE_RE.sub(r'excluded.\1', sql[upsert.end():]))
+    sql = _rewrite_calls(sql, 'TIMESTAMP', _timestamp)
+    sql = _rewrite_calls(sql, 'TIMESTAMPDIFF', _timestampdiff)
+    return sql
+
+
+# --- Schema generation from schema.sql ---
+
+_COMMENT_RE = re.compile(r'--[^\n]*')
+_CREATE_RE = re.compile(r'CREATE\s+TABLE\s+(\w+)\s*\((.*)\)[^)]*$', re.I | re.S)
+_INDEX_RE = re.compile(r'(UNIQUE\s+)?KEY\s+(\w+)\s*(\(.*\))$', re.I | re.S)
+_TEXT_TYPES = ('VARCHAR', 'CHAR', 'TEXT', 'ENUM')
+
+
+def _statements(script):
+    """The ';'-separated statements of a SQL script, without comments."""
+    script = _COMMENT_RE.sub('', script)
+    return [statement.strip() for statement in script.split(';') if statement.strip()]
+
+
+def _top_level_items(body):
+    items, depth, start = [], 0, 0
+    for i, char in enumerate(body):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            items.append(body[start:i].strip())
+            start = i + 1
+    items.append(body[start:].strip())
+    return [item for item in items if item]
+
+
+def _column(definition):
+    """Maps one MySQL column definition; returns (sqlite_definition, auto_increment, on_update)."""
+    name, col_type, rest = (definition.split(None, 2) + [''])[:3]
+    auto_increment = re.search(r'\bAUTO_INCREMENT\b', rest, re.I) is not None
+    on_update = re.search(r'\bON\s+UPDATE\s+CURRENT_TIMESTAMP\b', rest, re.I) is not None
+    rest = re.sub(r'\bAUTO_INCREMENT\b|\bUNSIGNED\b|\bON\s+UPDATE\s+CURRENT_TIMESTAMP\b', '', rest, flags=re.I)
+    rest = re.sub(r'\bCHARACTER\s+SET\s+\w+|\bCOLLATE\s+\w+', '', rest, flags=re.I)
+    rest = re.sub(r'\bDEFAULT\s+CURRENT_TIMESTAMP\b', f'DEFAULT ({LOCAL_NOW})', rest, flags=re.I)
+    base_type = re.match(r'\w+', col_type).group(0).upper()
+    if base_type in ('INT', 'INTEGER', 'TINYINT', 'SMALLINT', 'MEDIUMINT', 'BIGINT'):
+        col_type = 'INTEGER'
+    elif base_type == 'ENUM':
+        col_type = 'TEXT'
+    elif base_type in ('DECIMAL', 'NUMERIC'):
+        # REAL affinity, or 10.00 is stored as the integer 10 and `x / 100`
+        # divides as integers; the leading DECIMAL still picks the converter
+        col_type = 'DECIMAL REAL' + col_type[len(base_type):]
+    if base_type in _TEXT_TYPES:
+        # Matches the case-insensitive utf8mb4_unicode_ci comparisons of the MySQL schema
+        col_type += ' COLLATE NOCASE'
+    return f"{name} {col_type} {' '.join(rest.split())}".strip(), auto_increment, on_update
+
+
+def _create_table(statement):
+    """One MySQL CREATE TABLE -> list of SQLite statements (table, indexes, triggers)."""
+    match = _CREATE_RE.match(statement)
+    table, body = match.group(1), match.group(2)
+    columns, constraints, indexes, triggers = [], [], [], []
+    auto_column = None
+    for item in _top_level_items(body):
+        upper = item.upper()
+        index = _INDEX_RE.match(item)
+        if upper.startswith('PRIMARY KEY'):
+            constraints.append(item)
+        elif index:
+            unique = 'UNIQUE ' if index.group(1) else ''
+            indexes.append(f"CREATE {unique}INDEX {index.group(2)} ON {table} {index.group(3)}")
+        elif upper.startswith('CONSTRAINT') or upper.startswith('FOREIGN KEY'):
+            constraints.append(item)
+        else:
+            definition, auto_increment, on_update = _column(item)
+            name = definition.split()[0]
+            if auto_increment:
+                auto_column = name
+            if on_update:
+                triggers.append(
+                    f"CREATE TRIGGER trg_{table}_{name}_touch AFTER UPDATE ON {table} "
+                    f"FOR EACH ROW WHEN NEW.{name} IS OLD.{name} "
+                    f"BEGIN UPDATE {table} SET {name} = {LOCAL_NOW} WHERE rowid = NEW.rowid; END"
+                )
+            columns.append(definition)
+
+    if auto_column:
+        # SQLite only auto-assigns ids to an INTEGER PRIMARY KEY column
+        constraints = [c for c in constraints if not re.fullmatch(rf'PRIMARY\s+KEY\s*\(\s*{auto_column}\s*\)', c, re.I)]
+        columns = [re.sub(r'^(\w+) INTEGER', r'\1 INTEGER PRIMARY KEY AUTOINCREMENT', c) if c.split()[0] == auto_column
+                   else c for c in columns]
+    create = f"CREATE TABLE {table} (\n  " + ',\n  '.join(columns + constraints) + "\n)"
+    return [create] + indexes + triggers
+
+
+def sqlite_script(mysql_script):
+    """Translates schema.sql / seed.sql style scripts into SQLite statements."""
+    translated = []
+    for statement in _statements(mysql_script):
+        upper = statement.upper()
+        if upper.startswith(('SET ', 'USE ')):
+            continue
+        if upper.startswith('CREATE TABLE'):
+            translated.extend(_create_table(statement))
+        else:
+            translated.append(translate_sql(statement))
+    return translated
+
+
+def create_schema(conn, seed=False):
+    """Creates every table of schema.sql (dropping existing ones), plus seed.sql if asked."""
+    files = [SCHEMA_FILE] + ([SEED_FILE] if seed else [])
+    conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        for path in files:
+            with open(path, encoding='utf-8') as f:
+                for statement in sqlite_script(f.read()):
+                    conn.execute(statement)
+        conn.commit()
+    finally:
+        conn.execute("PRAGMA foreign_keys = ON")
+
+
+# --- mysql.connector-compatible connection ---
+
+def _time_to_timedelta(value):
+    hours, minutes, seconds = value.split(':')
+    return timedelta(hours=int(hours), minutes=int(minutes), seconds=float(seconds))
+
+
+def _convert(parse):
+    def converter(raw):
+        text = raw.decode()
+        try:
+            return parse(text)
+        except ValueError:
+            return text
+    return converter
+
+
+def _timedelta_to_time(value):
+    seconds = int(value.total_seconds())
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' ', timespec='seconds'))
+sqlite3.register_adapter(timedelta, _timedelta_to_time)
+sqlite3.register_converter('DECIMAL', _convert(Decimal))
+sqlite3.register_converter('DATE', _convert(date.fromisoformat))
+sqlite3.register_converter('DATETIME', _convert(datetime.fromisoformat))
+sqlite3.register_converter('TIMESTAMP', _convert(datetime.fromisoformat))
+sqlite3.register_converter('TIME', _convert(_time_to_timedelta))
+
+
+def _mysql_error(err):
+    """sqlite3 error -> the mysql.connector error class callers already handle."""
+    message = str(err)
+    if isinstance(err, sqlite3.IntegrityError):
+        return errors.IntegrityError(msg=message)
+    if isinstance(err, sqlite3.OperationalError) and ('locked' in message or 'busy' in message):
+        return errors.OperationalError(msg=message)
+    if isinstance(err, (sqlite3.OperationalError, sqlite3.ProgrammingError)):
+        return errors.ProgrammingError(msg=message)
+    return errors.DatabaseError(msg=message)
+
+
+class SQLiteCursor:
+    """Cursor with the parts of the mysql.connector cursor API the apps use."""
+
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        self._dictionary = dictionary
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, operation, params=None):
+        try:
+            self._cursor.execute(translate_sql(operation), tuple(params or ()))
+        except sqlite3.Error as err:
+            raise _mysql_error(err) from err
+
+    def executemany(self, operation, seq_params):
+        try:
+            self._cursor.executemany(translate_sql(operation), [tuple(params) for params in seq_params])
+        except sqlite3.Error as err:
+            raise _mysql_error(err) from err
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip((column[0] for column in self._cursor.description), row))
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size=1):
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """sqlite3 connection behind the subset of the mysql.connector connection API the pool uses."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    @property
+    def in_transaction(self):
+        return self._conn.in_transaction
+
+    def cursor(self, dictionary=False, **kwargs):
+        return SQLiteCursor(self._conn.cursor(), dictionary)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def is_connected(self):
+        try:
+            self._conn.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def close(self):
+        self._conn.close()
+
+
+_memory_lock = threading.Lock()
+_memory_anchor = None  # keeps the shared in-memory database alive between connections
+
+
+def connect(database=':memory:', **kwargs):
+    """Pool connect function for DB_BACKEND=sqlite; creates the schema in a new database.
+
+    Other keyword arguments (the MySQL user/password/host) are ignored.
+    """
+    global _memory_anchor
+    options = dict(detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False, timeout=5)
+    if database == ':memory:':
+        uri = f'file:canteen-{os.getpid()}?mode=memory&cache=shared'
+        with _memory_lock:
+            if _memory_anchor is None:
+                _memory_anchor = sqlite3.connect(uri, uri=True, **options)
+                create_schema(_memory_anchor, seed=os.getenv('DB_SQLITE_SEED') == '1')
+        conn = sqlite3.connect(uri, uri=True, **options)
+    else:
+        conn = sqlite3.connect(database, **options)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' LIMIT 1").fetchone() is None:
+            create_schema(conn, seed=os.getenv('DB_SQLITE_SEED') == '1')
+    conn.execute("PRAGMA foreign_keys = ON")
+    return SQLiteConnection(conn)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Create a SQLite database from schema.sql for DB_BACKEND=sqlite.")
+    parser.add_argument('path', help='database file to (re)create')
+    parser.add_argument('--seed', action='store_true', help='also load seed.sql')
+    parser.add_argument('--print', action='store_true', help='print the translated schema instead')
+    args = parser.parse_args()
+    if args.print:
+        with open(SCHEMA_FILE, encoding='utf-8') as f:
+            print(';\n\n'.join(sqlite_script(f.read())) + ';')
+    else:
+        conn = sqlite3.connect(args.path)
+        create_schema(conn, seed=args.seed)
+        conn.close()
+        print(f"Created {args.path} from schema.sql{' and seed.sql' if args.seed else ''}.")
@@ -0,0 +1,66 @@
+# Conditional GET (ETag / Last-Modified) for the menu pages, shared by
+# student_app.py and student_asgi.py.
+#
+# Framework-free: callers pass the request's If-None-Match and
+# If-Modified-Since headers and get back whether a 304 will do, plus the
+# validator headers to send with either answer. The menu pages carry
+# per-student bits (name, cart), so callers fold those into the ETag and send
+# no Last-Modified: a date cannot tell one student's cart state from another,
+# so only shared pages should pass last_modified. Cache-Control keeps
+# responses private and revalidated on every visit.
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+CACHE_CONTROL = 'private, no-cache'
+
+
+def make_etag(*parts):
+    """Weak ETag over the given parts; equal parts give equal tags in every process."""
+    digest = hashlib.blake2b('\x1f'.join(map(str, parts)).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def http_date(moment):
+    return format_datetime(moment.astimezone(timezone.utc).replace(microsecond=0), usegmt=True)
+
+
+def parse_http_date(value):
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def _opaque(tag):
+    tag = tag.strip()
+    return tag[2:] if tag.startswith('W/') else tag
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison against an If-None-Match list, as GET requires."""
+    if if_none_match.strip() == '*':
+        return True
+    return _opaque(etag) in {_opaque(tag) for tag in if_none_match.split(',')}
+
+
+def is_not_modified(if_none_match, if_modified_since, etag, last_modified=None):
+    """True when the client's copy is current.
+
+    If-None-Match wins when present; If-Modified-Since is only consulted
+    without it (RFC 9110, 13.2.2). Browsers send both once they have an ETag.
+    """
+    if if_none_match:
+        return etag_matches(if_none_match, etag)
+    if if_modified_since and last_modified is not None:
+        since = parse_http_date(if_modified_since)
+        return since is not None and last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def validator_headers(etag, last_modified=None):
+    headers = {'ETag': etag, 'Cache-Control': CACHE_CONTROL}
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified)
+    return headers
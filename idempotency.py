@@ -0,0 +1,177 @@
+# Idempotency keys for checkout in student_app.py
+#
+# Every checkout form carries a fresh key issued to the student on GET. The
+# first POST with a key claims it and places the order; the order_id is
+# then recorded against the key. A repeated POST (double click, browser
+# retry) finds the key done, or still pending, and is answered from this
+# store without touching MySQL, so no second order/payment/items are written.
+#
+# CHECKOUT_KEY_STORE=memory keeps keys in a bounded in-process LRU (single
+# worker); CHECKOUT_KEY_STORE=sqlite keeps them in a local SQLite file that
+# every worker process on the host can share. Keys expire after
+# CHECKOUT_KEY_TTL seconds.
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CHECKOUT_KEY_STORE = os.getenv('CHECKOUT_KEY_STORE', 'memory')
+CHECKOUT_KEY_STORE_PATH = os.getenv('CHECKOUT_KEY_STORE_PATH', 'checkout_keys.sqlite3')
+CHECKOUT_KEY_MAX = int(os.getenv('CHECKOUT_KEY_MAX', '10000'))
+CHECKOUT_KEY_TTL = float(os.getenv('CHECKOUT_KEY_TTL', '1800'))
+CHECKOUT_KEY_WAIT = 5.0  # how long a duplicate POST waits for the first one to finish
+
+# claim() outcomes
+CLAIMED = 'claimed'   # caller owns the key and must complete() or release() it
+PENDING = 'pending'   # another request is placing this order right now
+DONE = 'done'         # order already placed; order_id is returned with it
+QUEUED = 'queued'     # order accepted by order_queue.py; its queue id is returned instead
+UNKNOWN = 'unknown'   # never issued, expired, or issued to someone else
+
+
+def new_key():
+    return secrets.token_urlsafe(18)
+
+
+class MemoryIdempotencyStore:
+    """In-process LRU of checkout keys; the least recently issued key is evicted past max_entries."""
+
+    def __init__(self, max_entries=CHECKOUT_KEY_MAX, ttl=CHECKOUT_KEY_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._keys = OrderedDict()  # key -> [owner, state, order_id, expires_at]
+        self._lock = threading.Lock()
+
+    def issue(self, owner):
+        key = new_key()
+        with self._lock:
+            self._keys[key] = [owner, 'issued', None, time.monotonic() + self.ttl]
+            while len(self._keys) > self.max_entries:
+                self._keys.popitem(last=False)
+        return key
+
+    def _live(self, key, owner):
+        entry = self._keys.get(key)
+        if entry is None or entry[0] != owner:
+            return None
+        if entry[3] < time.monotonic():
+            del self._keys[key]
+            return None
+        return entry
+
+    def claim(self, key, owner):
+        """Atomically moves an issued key to pending; returns (outcome, order_id)."""
+        with self._lock:
+            entry = self._live(key, owner)
+            if entry is None:
+                return UNKNOWN, None
+            if entry[1] == 'issued':
+                entry[1] = PENDING
+                return CLAIMED, None
+            return entry[1], entry[2]
+
+    def complete(self, key, order_id, state=DONE):
+        with self._lock:
+            entry = self._keys.get(key)
+            if entry is not None:
+                entry[1], entry[2] = state, order_id
+
+    def release(self, key):
+        """Returns a claimed key to 'issued' after a failed attempt, so the form can be resubmitted."""
+        with self._lock:
+            entry = self._keys.get(key)
+            if entry is not None and entry[1] == PENDING:
+                entry[1] = 'issued'
+
+
+class SQLiteIdempotencyStore:
+    """Checkout keys in a local SQLite file (WAL mode), shared by all worker processes."""
+
+    PURGE_EVERY = 200  # issues between sweeps of expired keys
+
+    def __init__(self, path=CHECKOUT_KEY_STORE_PATH, ttl=CHECKOUT_KEY_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._issued = 0
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS checkout_key (
+                    idem_key TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    order_id INTEGER,
+                    expires_at REAL NOT NULL
+                )
+            """)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def issue(self, owner):
+        key = new_key()
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT INTO checkout_key (idem_key, owner, state, expires_at) VALUES (?, ?, 'issued', ?)",
+                         (key, owner, now + self.ttl))
+            self._issued += 1
+            if self._issued % self.PURGE_EVERY == 0:
+                conn.execute("DELETE FROM checkout_key WHERE expires_at < ?", (now,))
+        return key
+
+    def claim(self, key, owner):
+        with self._connect() as conn:
+            claimed = conn.execute(
+                "UPDATE checkout_key SET state = 'pending' "
+                "WHERE idem_key = ? AND owner = ? AND state = 'issued' AND expires_at >= ?",
+                (key, owner, time.time()),
+            ).rowcount
+            if claimed:
+                return CLAIMED, None
+            row = conn.execute(
+                "SELECT state, order_id FROM checkout_key WHERE idem_key = ? AND owner = ? AND expires_at >= ?",
+                (key, owner, time.time()),
+            ).fetchone()
+        return (row[0], row[1]) if row else (UNKNOWN, None)
+
+    def complete(self, key, order_id, state=DONE):
+        with self._connect() as conn:
+            conn.execute("UPDATE checkout_key SET state = ?, order_id = ? WHERE idem_key = ?", (state, order_id, key))
+
+    def release(self, key):
+        with self._connect() as conn:
+            conn.execute("UPDATE checkout_key SET state = 'issued' WHERE idem_key = ? AND state = 'pending'", (key,))
+
+
+def wait_for_order(store, key, owner, timeout=CHECKOUT_KEY_WAIT):
+    """Claims the key, waiting out a concurrent attempt; returns the final (outcome, order_id).
+
+    If the first attempt fails and releases the key meanwhile, this request
+    gets CLAIMED and places the order itself.
+    """
+    deadline = time.monotonic() + timeout
+    outcome, order_id = store.claim(key, owner)
+    while outcome == PENDING and time.monotonic() < deadline:
+        time.sleep(0.1)
+        outcome, order_id = store.claim(key, owner)
+    return outcome, order_id
+
+
+def create_idempotency_store(kind=CHECKOUT_KEY_STORE):
+    if kind == 'memory':
+        return MemoryIdempotencyStore()
+    if kind == 'sqlite':
+        return SQLiteIdempotencyStore()
+    raise ValueError(f"Unknown CHECKOUT_KEY_STORE '{kind}' (expected 'memory' or 'sqlite').")
@@ -0,0 +1,94 @@
+# Cross-process cache invalidation between student_app.py and admin_app.py
+#
+# Both apps run as separate processes on the same host, so each channel is a
+# tiny file in a shared directory holding the token of the latest change.
+# Publishing rewrites the file atomically; readers re-read it at most every
+# POLL_INTERVAL seconds and notify their in-process subscribers when the
+# token changes. No external service is needed, and caches still expire by
+# TTL if the directory is unavailable.
+import os
+import tempfile
+import threading
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+INVALIDATION_DIR = os.getenv('CACHE_INVALIDATION_DIR', os.path.join(tempfile.gettempdir(), 'canteen-invalidation'))
+POLL_INTERVAL = float(os.getenv('CACHE_INVALIDATION_POLL', '0.25'))
+
+
+class InvalidationChannel:
+    """Named change signal shared by every process using the same directory."""
+
+    def __init__(self, name, directory=INVALIDATION_DIR, poll_interval=POLL_INTERVAL):
+        self.name = name
+        self.path = os.path.join(directory, f'{name}.version')
+        self.poll_interval = poll_interval
+        self._subscribers = []
+        self._token = self._read()
+        self._checked_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def token(self):
+        """Token of the latest change seen by this process (None if never published)."""
+        return self._token
+
+    def subscribe(self, callback):
+        """Registers callback(token), called whenever a change is seen."""
+        self._subscribers.append(callback)
+
+    def publish(self):
+        """Signals a change to every process; local subscribers are told immediately."""
+        token = f'{time.time_ns()}-{os.getpid()}'
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f'{self.path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'w') as f:
+                f.write(token)
+            os.replace(tmp_path, self.path)
+        except OSError as err:
+            print(f"Could not publish '{self.name}' invalidation: {err}")
+        with self._lock:
+            self._token = token
+        self._notify(token)
+
+    def poll(self):
+        """Re-reads the shared token if the poll interval has passed; cheap to call per request."""
+        now = time.monotonic()
+        if now - self._checked_at < self.poll_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self.poll_interval:
+                return
+            self._checked_at = now
+            token = self._read()
+            if token is None or token == self._token:
+                return
+            self._token = token
+        self._notify(token)
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _notify(self, token):
+        for callback in self._subscribers:
+            callback(token)
+
+
+_channels = {}
+_channels_lock = threading.Lock()
+
+
+def get_channel(name):
+    """Returns this process's channel object for `name`."""
+    with _channels_lock:
+        if name not in _channels:
+            _channels[name] = InvalidationChannel(name)
+        return _channels[name]
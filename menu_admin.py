@@ -0,0 +1,207 @@
+# Bulk menu management for admin_app.py: availability, prices, daily
+# specials and CSV import/export of the item and daily_special tables.
+#
+# Every bulk write runs in one transaction() and bumps the menu version once.
+# CSV exports stream from an unbuffered cursor and imports read the upload
+# row by row in batches, so neither side holds a whole file in memory.
+import csv
+import io
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from db_config import iter_query, transaction
+
+IMPORT_BATCH_SIZE = 500
+
+ITEM_COLUMNS = ('item_id', 'item_name', 'price', 'category', 'availability_status')
+SPECIAL_COLUMNS = ('item_id', 'date', 'discount_percentage')
+
+EXPORT_QUERIES = {
+    'item': "SELECT item_id, item_name, price, category, availability_status FROM item ORDER BY item_id",
+    'daily_special': "SELECT item_id, date, discount_percentage FROM daily_special ORDER BY date, item_id",
+}
+EXPORT_COLUMNS = {'item': ITEM_COLUMNS, 'daily_special': SPECIAL_COLUMNS}
+
+ITEM_UPSERT = """
+INSERT INTO item (item_id, item_name, price, category, availability_status)
+VALUES (%s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE item_name = VALUES(item_name), price = VALUES(price),
+                        category = VALUES(category), availability_status = VALUES(availability_status)
+"""
+SPECIAL_DELETE = "DELETE FROM daily_special WHERE date = %s AND item_id = %s"
+SPECIAL_INSERT = "INSERT INTO daily_special (item_id, date, discount_percentage) VALUES (%s, %s, %s)"
+PRICE_UPDATE = "UPDATE item SET price = %s WHERE item_id = %s"
+
+
+class MenuImportError(ValueError):
+    """Bad input for a bulk update or CSV import; nothing was written."""
+
+
+def in_clause(values):
+    return ', '.join(['%s'] * len(values))
+
+
+# --- Bulk updates ---
+
+def set_availability(item_ids, available):
+    """Shows or hides many items with one UPDATE; returns rows changed."""
+    if not item_ids:
+        return 0
+    with transaction() as cursor:
+        cursor.execute(f"UPDATE item SET availability_status = %s WHERE item_id IN ({in_clause(item_ids)})",
+                       [1 if available else 0] + list(item_ids))
+        return cursor.rowcount
+
+
+def update_prices(prices):
+    """Applies {item_id: price} in one transaction; returns how many prices were sent."""
+    rows = [(parse_price(price, f"item {item_id}"), item_id) for item_id, price in prices.items()]
+    if not rows:
+        return 0
+    with transaction() as cursor:
+        cursor.executemany(PRICE_UPDATE, rows)
+    return len(rows)
+
+
+def set_specials(item_ids, special_date, discount):
+    """Makes the items specials on special_date at `discount` percent, replacing existing ones."""
+    if not item_ids:
+        return 0
+    discount = parse_discount(discount, 'discount')
+    with transaction() as cursor:
+        cursor.executemany(SPECIAL_DELETE, [(special_date, item_id) for item_id in item_ids])
+        cursor.executemany(SPECIAL_INSERT, [(item_id, special_date, discount) for item_id in item_ids])
+    return len(item_ids)
+
+
+def clear_specials(item_ids, special_date):
+    if not item_ids:
+        return 0
+    with transaction() as cursor:
+        cursor.execute(f"DELETE FROM daily_special WHERE date = %s AND item_id IN ({in_clause(item_ids)})",
+                       [special_date] + list(item_ids))
+        return cursor.rowcount
+
+
+# --- Validation ---
+
+def parse_price(value, where):
+    try:
+        price = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise MenuImportError(f"{where}: price '{value}' is not a number.")
+    if not price.is_finite():
+        raise MenuImportError(f"{where}: price '{value}' is not a number.")
+    if price < 0 or price >= Decimal('100000000'):
+        raise MenuImportError(f"{where}: price {price} is out of range.")
+    return price.quantize(Decimal('0.01'))
+
+
+def parse_discount(value, where):
+    try:
+        discount = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise MenuImportError(f"{where}: discount '{value}' is not a number.")
+    if not discount.is_finite():
+        raise MenuImportError(f"{where}: discount '{value}' is not a number.")
+    if not 0 < discount <= 100:
+        raise MenuImportError(f"{where}: discount must be between 0 and 100.")
+    return discount.quantize(Decimal('0.01'))
+
+
+def parse_date(value, where):
+    try:
+        return date.fromisoformat(str(value).strip())
+    except ValueError:
+        raise MenuImportError(f"{where}: date '{value}' is not YYYY-MM-DD.")
+
+
+def parse_item_row(row, where):
+    item_name = (row.get('item_name') or '').strip()
+    category = (row.get('category') or '').strip()
+    if not item_name or not category:
+        raise MenuImportError(f"{where}: item_name and category are required.")
+    item_id = (row.get('item_id') or '').strip()
+    if item_id and not item_id.isdigit():
+        raise MenuImportError(f"{where}: item_id '{item_id}' is not a number.")
+    status = (row.get('availability_status') or '1').strip()
+    if status not in ('0', '1'):
+        raise MenuImportError(f"{where}: availability_status must be 0 or 1.")
+    # A blank item_id inserts a new item (or updates the one with the same name)
+    return (int(item_id) if item_id else None, item_name, parse_price(row.get('price', ''), where), category, int(status))
+
+
+def parse_special_row(row, where):
+    item_id = (row.get('item_id') or '').strip()
+    if not item_id.isdigit():
+        raise MenuImportError(f"{where}: item_id '{item_id}' is not a number.")
+    return (int(item_id), parse_date(row.get('date', ''), where),
+            parse_discount(row.get('discount_percentage', ''), where))
+
+
+# --- CSV ---
+
+def csv_reader(stream):
+    """Row-by-row DictReader over an uploaded (binary) file stream."""
+    return csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+
+
+def _batches(reader, parse):
+    batch = []
+    for row in reader:
+        batch.append(parse(row, f"line {reader.line_num}"))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def check_columns(reader, required):
+    missing = [column for column in required if column not in (reader.fieldnames or ())]
+    if missing:
+        raise MenuImportError(f"CSV is missing column(s): {', '.join(missing)}.")
+
+
+def import_items(stream):
+    """Upserts items from CSV (matched by item_id, else by unique item_name); all or nothing."""
+    reader = csv_reader(stream)
+    check_columns(reader, ('item_name', 'price', 'category'))
+    count = 0
+    with transaction() as cursor:
+        for batch in _batches(reader, parse_item_row):
+            cursor.executemany(ITEM_UPSERT, batch)
+            count += len(batch)
+    return count
+
+
+def import_specials(stream):
+    """Sets daily specials from CSV, replacing any existing (date, item) special; all or nothing."""
+    reader = csv_reader(stream)
+    check_columns(reader, SPECIAL_COLUMNS)
+    count = 0
+    with transaction() as cursor:
+        for batch in _batches(reader, parse_special_row):
+            cursor.executemany(SPECIAL_DELETE, [(special_date, item_id) for item_id, special_date, _ in batch])
+            cursor.executemany(SPECIAL_INSERT, batch)
+            count += len(batch)
+    return count
+
+
+def open_export(table):
+    """Runs the export query for the table; raises mysql.connector.Error on failure."""
+    return iter_query(EXPORT_QUERIES[table])
+
+
+def export_csv(table, rows):
+    """Yields the rows from open_export() as CSV text chunks."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS[table])
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() > 8192:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -0,0 +1,131 @@
+# In-process cache of today's menu, shared by the menu pages of student_app.py
+import hashlib
+import itertools
+import os
+import threading
+import time
+from datetime import date, datetime, timezone
+
+from db_config import fetch_all
+from invalidation import get_channel
+
+# Upper bound on staleness if an invalidation is ever missed
+MENU_CACHE_TTL = float(os.getenv('MENU_CACHE_TTL', '300'))
+
+MENU_QUERY = """
+SELECT i.item_id, i.item_name, i.price, i.category, i.availability_status,
+       ds.discount_percentage,
+       CASE WHEN ds.item_id IS NOT NULL THEN 1 ELSE 0 END AS is_special,
+       CASE WHEN ds.item_id IS NOT NULL 
+            THEN ROUND(i.price * (1 - ds.discount_percentage / 100), 2)
+            ELSE i.price 
+       END AS discounted_price
+FROM item i
+LEFT JOIN daily_special ds ON i.item_id = ds.item_id AND ds.date = CURDATE()
+ORDER BY i.category, i.item_name;
+"""
+
+
+def group_by_category(items):
+    """Groups menu rows into an ordered {category: [items]} dict."""
+    categories = {}
+    for item in items:
+        categories.setdefault(item['category'], []).append(item)
+    return categories
+
+
+# Distinct for every snapshot ever built, so caches derived from one can key on it
+_price_versions = itertools.count(1)
+
+
+class MenuSnapshot:
+    """Today's menu as loaded for one (date, version) key; treat as read-only.
+
+    items_by_id doubles as the price table (price, discounted_price,
+    is_special, availability_status) for cart pricing. Rendered menu
+    fragments are kept on the snapshot, so they go when the menu changes.
+    """
+
+    def __init__(self, key, rows):
+        self.key = key
+        self.price_version = next(_price_versions)
+        self.loaded_at = time.monotonic()
+        self.modified_at = datetime.now(timezone.utc)  # Last-Modified of pages built from this snapshot
+        self._fragments = {}
+        self.items_by_id = {row['item_id']: row for row in rows}
+        self.available = [row for row in rows if row['availability_status'] == 1]
+        self.categories = group_by_category(self.available)
+        self.special_categories = group_by_category(row for row in self.available if row['is_special'])
+
+    def fragment(self, name, render):
+        """Returns (html, digest) for the fragment `name`, calling render() only the first time.
+
+        Two threads may race to render the same fragment; both get the same HTML.
+        """
+        cached = self._fragments.get(name)
+        if cached is None:
+            html = render()
+            cached = self._fragments[name] = (html, hashlib.blake2b(html.encode(), digest_size=12).hexdigest())
+        return cached
+
+
+class MenuCache:
+    """Holds one MenuSnapshot and rebuilds it when the date or version changes.
+
+    Writers call bump_version() after changing item or daily_special rows;
+    with a channel, the change also reaches other processes. Readers call
+    get() and only the first reader after a change hits MySQL. Snapshots
+    older than `ttl` seconds are reloaded regardless.
+    """
+
+    def __init__(self, query=MENU_QUERY, channel=None, ttl=MENU_CACHE_TTL):
+        self.query = query
+        self.channel = channel
+        self.ttl = ttl
+        self.version = 0
+        self._snapshot = None
+        self._lock = threading.Lock()
+        if channel is not None:
+            channel.subscribe(self.invalidate)
+
+    def invalidate(self, token=None):
+        """Drops the current snapshot by moving to a new version."""
+        with self._lock:
+            self.version += 1
+
+    def bump_version(self):
+        if self.channel is not None:
+            self.channel.publish()
+        else:
+            self.invalidate()
+
+    def _is_stale(self, snapshot, key):
+        return snapshot is None or snapshot.key != key or time.monotonic() - snapshot.loaded_at > self.ttl
+
+    def get(self):
+        if self.channel is not None:
+            self.channel.poll()
+        key = (date.today(), self.version)
+        snapshot = self._snapshot
+        if self._is_stale(snapshot, key):
+            with self._lock:
+                key = (date.today(), self.version)
+                snapshot = self._snapshot
+                if self._is_stale(snapshot, key):
+                    snapshot = MenuSnapshot(key, fetch_all(self.query))
+                    # An empty result may be a DB error (fetch_all returns []); retry next time
+                    if snapshot.items_by_id:
+                        self._snapshot = snapshot
+        return snapshot
+
+
+menu_cache = MenuCache(channel=get_channel('menu'))
+
+
+def get_menu():
+    return menu_cache.get()
+
+
+def bump_menu_version():
+    """Call after any write to item or daily_special."""
+    menu_cache.bump_version()
@@ -0,0 +1,220 @@
+"""Per-request instrumentation shared by student_app and admin_app.
+
+init_metrics(app, name) records, for every request, the wall time, the DB
+query count and time (tallied on flask.g by db_config.TrackedCursor), the
+slowest statement and the template render time. Aggregates per endpoint
+are rendered in Prometheus text format by render_prometheus(), and
+requests slower than SLOW_REQUEST_MS are printed to the slow-request log.
+"""
+import hmac
+import os
+import re
+import threading
+import time
+from flask import before_render_template, g, request, template_rendered
+from db_config import pool_stats
+
+SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', '500'))
+# Bearer token for scrapers; /admin/metrics also accepts a logged-in admin
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+STATEMENT_LOG_MAX = 200
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def compact_sql(statement):
+    """Single-line, length-capped form of a statement for the slow-request log."""
+    if isinstance(statement, bytes):
+        statement = statement.decode(errors='replace')
+    return _WHITESPACE.sub(' ', str(statement or '')).strip()[:STATEMENT_LOG_MAX]
+
+
+class EndpointStats:
+    """Running totals for one (endpoint, method) pair."""
+
+    __slots__ = ('statuses', 'seconds', 'buckets', 'db_queries', 'db_seconds',
+                 'max_queries', 'template_seconds', 'slowest_seconds')
+
+    def __init__(self):
+        self.statuses = {}
+        self.seconds = 0.0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.max_queries = 0
+        self.template_seconds = 0.0
+        self.slowest_seconds = 0.0
+
+    @property
+    def count(self):
+        return sum(self.statuses.values())
+
+
+class MetricsRegistry:
+    """Thread-safe per-endpoint aggregates for one app process."""
+
+    def __init__(self, app_name):
+        self.app_name = app_name
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def observe(self, endpoint, method, status, seconds, queries, db_seconds, template_seconds, slowest):
+        with self._lock:
+            stats = self._endpoints.get((endpoint, method))
+            if stats is None:
+                stats = self._endpoints[(endpoint, method)] = EndpointStats()
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.seconds += seconds
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if seconds <= bound:
+                    stats.buckets[i] += 1
+            stats.db_queries += queries
+            stats.db_seconds += db_seconds
+            stats.max_queries = max(stats.max_queries, queries)
+            stats.template_seconds += template_seconds
+            # Statement text stays in the slow-request log: as a label it would be unbounded cardinality
+            stats.slowest_seconds = max(stats.slowest_seconds, slowest[0])
+
+    def snapshot(self):
+        with self._lock:
+            return [(key, _copy(stats)) for key, stats in sorted(self._endpoints.items())]
+
+
+def _copy(stats):
+    clone = EndpointStats()
+    for name in EndpointStats.__slots__:
+        value = getattr(stats, name)
+        setattr(clone, name, value.copy() if isinstance(value, (dict, list)) else value)
+    return clone
+
+
+# --- Request hooks ---
+
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+
+def _template_started(sender, template, context, **extra):
+    g.template_started = time.perf_counter()
+
+
+def _template_finished(sender, template, context, **extra):
+    started = g.pop('template_started', None)
+    if started is not None:
+        g.template_seconds = g.get('template_seconds', 0.0) + time.perf_counter() - started
+
+
+def init_metrics(app, name):
+    """Hooks request/template timing into `app` and returns its registry."""
+    registry = MetricsRegistry(name)
+    app.extensions['canteen_metrics'] = registry
+    app.before_request(_start_timer)
+    before_render_template.connect(_template_started, app)
+    template_rendered.connect(_template_finished, app)
+
+    @app.after_request
+    def record_request(response):
+        started = g.get('request_started')
+        if started is None:
+            return response
+        seconds = time.perf_counter() - started
+        endpoint = request.endpoint or 'unmatched'
+        queries = g.get('db_query_count', 0)
+        db_seconds = g.get('db_query_seconds', 0.0)
+        template_seconds = g.get('template_seconds', 0.0)
+        slowest = g.get('db_slowest', (0.0, None))
+        registry.observe(endpoint, request.method, response.status_code, seconds,
+                         queries, db_seconds, template_seconds, slowest)
+        if seconds * 1000 >= SLOW_REQUEST_MS:
+            line = (f"[slow-request] {name} {request.method} {request.path} {seconds * 1000:.1f}ms "
+                    f"status={response.status_code} queries={queries} db={db_seconds * 1000:.1f}ms "
+                    f"template={template_seconds * 1000:.1f}ms")
+            if slowest[1]:
+                line += f" slowest={slowest[0] * 1000:.1f}ms \"{compact_sql(slowest[1])}\""
+            print(line)
+        return response
+
+    return registry
+
+
+def metrics_token_valid():
+    """True when the request carries METRICS_TOKEN in an Authorization: Bearer header.
+
+    A query-string token is not accepted, since it would end up in access
+    logs and proxy caches.
+    """
+    if not METRICS_TOKEN:
+        return False
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        return False
+    return hmac.compare_digest(header[7:].encode(), METRICS_TOKEN.encode())
+
+
+# --- Prometheus exposition ---
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{key}="{_label(value)}"' for key, value in labels.items()) + '}'
+
+
+def render_prometheus(registry):
+    """Renders the registry plus connection pool gauges in Prometheus text format."""
+    app = registry.app_name
+    lines = []
+
+    def family(metric, kind, help_text):
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+
+    endpoints = registry.snapshot()
+
+    family('canteen_requests_total', 'counter', 'Requests handled, by endpoint and status.')
+    for (endpoint, method), stats in endpoints:
+        for status, count in sorted(stats.statuses.items()):
+            lines.append(f"canteen_requests_total{_labels(app=app, endpoint=endpoint, method=method, status=status)} {count}")
+
+    family('canteen_request_duration_seconds', 'histogram', 'Wall time per request.')
+    for (endpoint, method), stats in endpoints:
+        for bound, count in zip(DURATION_BUCKETS, stats.buckets):
+            lines.append(f"canteen_request_duration_seconds_bucket{_labels(app=app, endpoint=endpoint, method=method, le=bound)} {count}")
+        lines.append(f"canteen_request_duration_seconds_bucket{_labels(app=app, endpoint=endpoint, method=method, le='+Inf')} {stats.count}")
+        lines.append(f"canteen_request_duration_seconds_sum{_labels(app=app, endpoint=endpoint, method=method)} {stats.seconds:.6f}")
+        lines.append(f"canteen_request_duration_seconds_count{_labels(app=app, endpoint=endpoint, method=method)} {stats.count}")
+
+    simple = (
+        ('canteen_db_queries_total', 'counter', 'SQL statements executed.', 'db_queries', '{}'),
+        ('canteen_db_seconds_total', 'counter', 'Time spent executing SQL statements.', 'db_seconds', '{:.6f}'),
+        ('canteen_db_queries_per_request_max', 'gauge', 'Most statements issued by a single request (N+1 detector).', 'max_queries', '{}'),
+        ('canteen_template_seconds_total', 'counter', 'Time spent rendering templates.', 'template_seconds', '{:.6f}'),
+    )
+    for metric, kind, help_text, attr, fmt in simple:
+        family(metric, kind, help_text)
+        for (endpoint, method), stats in endpoints:
+            lines.append(f"{metric}{_labels(app=app, endpoint=endpoint, method=method)} {fmt.format(getattr(stats, attr))}")
+
+    family('canteen_db_slowest_statement_seconds', 'gauge', 'Slowest SQL statement seen per endpoint.')
+    for (endpoint, method), stats in endpoints:
+        if stats.slowest_seconds:
+            labels = _labels(app=app, endpoint=endpoint, method=method)
+            lines.append(f"canteen_db_slowest_statement_seconds{labels} {stats.slowest_seconds:.6f}")
+
+    pool = pool_stats()
+    family('canteen_db_pool_connections', 'gauge', 'Connection pool size and usage.')
+    for state in ('size', 'in_use', 'idle'):
+        lines.append(f"canteen_db_pool_connections{_labels(app=app, state=state)} {pool[state]}")
+    family('canteen_db_pool_events_total', 'counter', 'Connection pool checkouts, reuse, recycling and exhaustion.')
+    for event in ('connections_created', 'checkouts', 'reused', 'recycled', 'health_check_failures', 'exhausted'):
+        lines.append(f"canteen_db_pool_events_total{_labels(app=app, event=event)} {pool[event]}")
+    family('canteen_db_pool_wait_seconds_total', 'counter', 'Time requests spent waiting for a pooled connection.')
+    lines.append(f"canteen_db_pool_wait_seconds_total{_labels(app=app)} {pool['wait_seconds_total']:.6f}")
+
+    family('canteen_process_start_time_seconds', 'gauge', 'Unix time the app process started.')
+    lines.append(f"canteen_process_start_time_seconds{_labels(app=app)} {registry.started:.0f}")
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,22 @@
+-- Digital Canteen - Migration 001
+-- Covering indexes for the hottest query paths
+-- Run once against an existing `canteen` database:
+--   mysql -u root -p canteen < migrations/001_hot_query_indexes.sql
+-- (schema.sql already includes these indexes for fresh installs)
+
+-- Admin pending-orders queue:
+--   WHERE status = 'Pending' ORDER BY order_date, order_time
+ALTER TABLE order_info
+  ADD KEY idx_order_info_status_date (status, order_date, order_time, student_id, total_amount);
+
+-- Student order history:
+--   WHERE student_id = ? ORDER BY order_date DESC, order_time DESC
+-- Its leftmost column also serves the student FK, so the old
+-- single-column index becomes redundant.
+ALTER TABLE order_info
+  ADD KEY idx_order_info_student_date (student_id, order_date, order_time, status, total_amount),
+  DROP KEY idx_order_info_student;
+
+-- Every menu query: LEFT JOIN daily_special ds ON ds.item_id = i.item_id AND ds.date = CURDATE()
+ALTER TABLE daily_special
+  ADD KEY idx_daily_special_date_item (date, item_id, discount_percentage);
@@ -0,0 +1,9 @@
+-- Digital Canteen - Migration 002
+-- Order history is paginated by keyset on (order_date, order_time, order_id).
+-- Put order_id directly after the sort columns so each page is a plain
+-- index range read with no filesort on ties.
+--   mysql -u root -p canteen < migrations/002_order_history_keyset_index.sql
+
+ALTER TABLE order_info
+  ADD KEY idx_order_info_student_keyset (student_id, order_date, order_time, order_id),
+  DROP KEY idx_order_info_student_date;
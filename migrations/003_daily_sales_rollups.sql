@@ -0,0 +1,41 @@
+-- Digital Canteen - Migration 003
+-- Pre-aggregated daily sales for the admin reports page. sales_rollup.py
+-- folds finalized orders above the watermark into these tables, so reports
+-- never scan order_info/order_item history.
+--   mysql -u root -p canteen < migrations/003_daily_sales_rollups.sql
+
+CREATE TABLE IF NOT EXISTS sales_daily (
+  sale_date DATE NOT NULL,
+  order_count INT NOT NULL DEFAULT 0,
+  revenue DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+  cancelled_count INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (sale_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS sales_daily_item (
+  sale_date DATE NOT NULL,
+  item_id INT NOT NULL,
+  quantity INT NOT NULL DEFAULT 0,
+  revenue DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+  order_count INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (sale_date, item_id),
+  KEY idx_sales_daily_item_item (item_id, sale_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS sales_daily_category (
+  sale_date DATE NOT NULL,
+  category VARCHAR(50) NOT NULL,
+  quantity INT NOT NULL DEFAULT 0,
+  revenue DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+  order_count INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (sale_date, category)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS rollup_watermark (
+  name VARCHAR(50) NOT NULL,
+  last_order_id INT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+INSERT IGNORE INTO rollup_watermark (name, last_order_id) VALUES ('daily_sales', 0);
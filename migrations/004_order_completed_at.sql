@@ -0,0 +1,8 @@
+-- Digital Canteen - Migration 004
+-- Record when the kitchen completes an order, so pickup_eta.py can learn
+-- recent turnaround times. The index serves its "completions since" query.
+--   mysql -u root -p canteen < migrations/004_order_completed_at.sql
+
+ALTER TABLE order_info
+  ADD COLUMN completed_at DATETIME NULL DEFAULT NULL AFTER status,
+  ADD KEY idx_order_info_completed (completed_at);
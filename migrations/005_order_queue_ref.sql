@@ -0,0 +1,10 @@
+-- Digital Canteen - Migration 005
+-- Orders written by the write-behind queue (order_queue.py, ORDER_QUEUE=sqlite)
+-- carry the random ref they were queued under. The unique key lets the
+-- drainer recognise orders it already committed before a crash, so none is
+-- inserted twice. Orders placed directly at checkout leave it NULL.
+--   mysql -u root -p canteen < migrations/005_order_queue_ref.sql
+
+ALTER TABLE order_info
+  ADD COLUMN queue_ref CHAR(32) NULL DEFAULT NULL AFTER completed_at,
+  ADD UNIQUE KEY uq_order_info_queue_ref (queue_ref);
@@ -0,0 +1,8 @@
+-- Digital Canteen - Migration 006
+-- Accounting exports (order_export.py) select a date range of orders and
+-- read them in (order_date, order_id) order. This key turns that into an
+-- index range scan with no filesort, however large order_info grows.
+--   mysql -u root -p canteen < migrations/006_order_date_index.sql
+
+ALTER TABLE order_info
+  ADD KEY idx_order_info_date (order_date, order_id);
@@ -0,0 +1,27 @@
+-- Digital Canteen - Migration 007
+-- sales_rollup.py used to stop its watermark below the first Pending order,
+-- so one stuck order froze the reports. It now records the status each
+-- order was folded with, folds Pending orders once they settle, and applies
+-- later status changes (found through status_changed_at, migration 008) as deltas.
+--   mysql -u root -p canteen < migrations/007_rollup_order_ledger.sql
+
+CREATE TABLE IF NOT EXISTS sales_rollup_order (
+  order_id INT NOT NULL,
+  folded_status VARCHAR(20) NULL DEFAULT NULL,
+  PRIMARY KEY (order_id),
+  KEY idx_sales_rollup_order_status (folded_status),
+  CONSTRAINT fk_sales_rollup_order FOREIGN KEY (order_id) REFERENCES order_info(order_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+ALTER TABLE rollup_watermark
+  ADD COLUMN last_change_at DATETIME NULL DEFAULT NULL AFTER last_order_id;
+
+-- Orders below the watermark were folded already; take their current status
+-- as the folded one (changes made before this migration cannot be recovered)
+INSERT IGNORE INTO sales_rollup_order (order_id, folded_status)
+SELECT oi.order_id, CASE WHEN oi.status = 'Pending' THEN NULL ELSE oi.status END
+FROM order_info oi
+JOIN rollup_watermark w ON w.name = 'daily_sales'
+WHERE oi.order_id <= w.last_order_id;
+
+UPDATE rollup_watermark SET last_change_at = NOW() WHERE name = 'daily_sales';
@@ -0,0 +1,13 @@
+-- Digital Canteen - Migration 008
+-- sales_rollup.py finds folded orders whose status changed afterwards (say
+-- Completed to Canceled) by this timestamp. completed_at cannot serve: it is
+-- only set when an order is completed. admin_app.py stamps status_changed_at
+-- on every status update.
+--   mysql -u root -p canteen < migrations/008_order_status_changed_at.sql
+
+ALTER TABLE order_info
+  ADD COLUMN status_changed_at DATETIME NULL DEFAULT NULL AFTER queue_ref,
+  ADD KEY idx_order_info_status_changed (status_changed_at);
+
+-- Completions already carry their time
+UPDATE order_info SET status_changed_at = completed_at WHERE completed_at IS NOT NULL;
@@ -0,0 +1,110 @@
+# Month-end accounting exports of order_info, order_item and payment for
+# admin_app.py, as CSV or NDJSON.
+#
+# Rows stream from an unbuffered cursor (db_config.iter_query) through a
+# generator that hands the response out in ~EXPORT_CHUNK_BYTES pieces, so
+# memory stays flat however many orders fall in the date range. The query
+# runs before the response starts, so a database failure becomes an error
+# status instead of a silently empty file. Every table is filtered on
+# order_info.order_date and read in (order_date, order_id) order, which
+# idx_order_info_date serves as an index range scan without a filesort.
+import csv
+import io
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from db_config import iter_query
+
+EXPORT_CHUNK_BYTES = 64 * 1024
+EXPORT_FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+ORDER_EXPORT_COLUMNS = {
+    'order_info': ('order_id', 'student_id', 'order_date', 'order_time', 'total_amount', 'status', 'completed_at'),
+    'order_item': ('order_item_id', 'order_id', 'order_date', 'item_id', 'quantity', 'subtotal'),
+    'payment': ('payment_id', 'order_id', 'order_date', 'payment_mode', 'amount_paid', 'payment_status',
+                'transaction_date'),
+}
+
+ORDER_EXPORT_QUERIES = {
+    'order_info': """
+        SELECT order_id, student_id, order_date, order_time, total_amount, status, completed_at
+        FROM order_info
+        WHERE order_date BETWEEN %s AND %s
+        ORDER BY order_date, order_id
+    """,
+    'order_item': """
+        SELECT oit.order_item_id, oit.order_id, oi.order_date, oit.item_id, oit.quantity, oit.subtotal
+        FROM order_info oi
+        JOIN order_item oit ON oit.order_id = oi.order_id
+        WHERE oi.order_date BETWEEN %s AND %s
+        ORDER BY oi.order_date, oi.order_id
+    """,
+    'payment': """
+        SELECT p.payment_id, p.order_id, oi.order_date, p.payment_mode, p.amount_paid, p.payment_status,
+               p.transaction_date
+        FROM order_info oi
+        JOIN payment p ON p.order_id = oi.order_id
+        WHERE oi.order_date BETWEEN %s AND %s
+        ORDER BY oi.order_date, oi.order_id
+    """,
+}
+
+
+def export_filename(table, start, end, fmt):
+    return f"{table}_{start.isoformat()}_{end.isoformat()}.{fmt}"
+
+
+def json_value(value):
+    """JSON-safe form of a column value; DECIMAL(10,2) amounts round-trip exactly as floats."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        # mysql.connector returns TIME columns as timedelta
+        seconds = int(value.total_seconds())
+        return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+    return value
+
+
+def _chunked(lines, chunk_bytes=EXPORT_CHUNK_BYTES):
+    """Joins small text pieces into chunks of about chunk_bytes characters."""
+    parts, size = [], 0
+    for line in lines:
+        parts.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield ''.join(parts)
+            parts, size = [], 0
+    if parts:
+        yield ''.join(parts)
+
+
+def _csv_lines(table, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(ORDER_EXPORT_COLUMNS[table])
+    for row in rows:
+        writer.writerow([json_value(value) if isinstance(value, timedelta) else value for value in row])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _ndjson_lines(table, rows):
+    columns = ORDER_EXPORT_COLUMNS[table]
+    for row in rows:
+        yield json.dumps(dict(zip(columns, map(json_value, row))), separators=(',', ':')) + '\n'
+
+
+def open_export(table, start, end):
+    """Runs the export query for orders dated start..end (inclusive); raises mysql.connector.Error on failure."""
+    return iter_query(ORDER_EXPORT_QUERIES[table], (start, end))
+
+
+def export_orders(table, rows, fmt='csv'):
+    """Yields text chunks of the rows from open_export() as CSV or NDJSON."""
+    lines = _csv_lines(table, rows) if fmt == 'csv' else _ndjson_lines(table, rows)
+    return _chunked(lines)
@@ -0,0 +1,356 @@
+# Write-behind order queue for checkout spikes
+#
+# With ORDER_QUEUE=sqlite, checkout validates the cart and appends the order
+# to a local SQLite file (WAL mode) instead of writing order_info, payment
+# and order_item rows while the request waits. The student gets a
+# provisional queue id at once; a background OrderDrainer moves queued
+# orders to MySQL in batched transactions and records the real order_id.
+#
+# Every queued order carries a random queue_ref that is stored in the unique
+# order_info.queue_ref column (migrations/005_order_queue_ref.sql). Before a
+# batch is written, refs already in MySQL are matched back, so an order
+# committed just before a crash is never inserted twice on restart. Leases
+# let every worker process on the host drain the same file safely.
+#
+# Wallet orders are never queued: the debit must succeed or fail while the
+# student is still on the checkout page.
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import mysql.connector
+from dotenv import load_dotenv
+
+from db_config import fetch_all, transaction
+from order_service import (ORDER_INFO_QUEUED_INSERT, PAYMENT_INSERT, ORDER_ITEM_INSERT, order_info_params,
+                           payment_params, order_item_params)
+
+load_dotenv()
+
+ORDER_QUEUE = os.getenv('ORDER_QUEUE', 'off')
+ORDER_QUEUE_PATH = os.getenv('ORDER_QUEUE_PATH', 'order_queue.sqlite3')
+ORDER_QUEUE_MAX = int(os.getenv('ORDER_QUEUE_MAX', '2000'))          # queued orders before checkout refuses more
+ORDER_QUEUE_BATCH = int(os.getenv('ORDER_QUEUE_BATCH', '50'))        # orders per MySQL transaction
+ORDER_QUEUE_INTERVAL = float(os.getenv('ORDER_QUEUE_INTERVAL', '0.5'))
+ORDER_QUEUE_LEASE = 30            # seconds a drainer may hold a batch before another takes it over
+ORDER_QUEUE_MAX_ATTEMPTS = 5      # database errors before an order is marked failed
+ORDER_QUEUE_KEEP = 24 * 3600      # placed/failed rows are purged after this many seconds
+
+# Queue states
+QUEUED = 'queued'
+PLACED = 'placed'
+FAILED = 'failed'
+
+QUEUE_REF_LOOKUP = "SELECT order_id, queue_ref FROM order_info WHERE queue_ref IN ({})"
+
+# MySQL being unreachable says nothing about the order itself: these errors
+# stop the batch without counting an attempt against any queued order
+OUTAGE_ERRORS = (mysql.connector.errors.InterfaceError, mysql.connector.errors.OperationalError)
+
+
+class OrderQueueFull(Exception):
+    """Raised by enqueue() when ORDER_QUEUE_MAX orders are already waiting for MySQL."""
+
+
+class OrderQueue:
+    """Durable local queue of validated orders, shared by all worker processes."""
+
+    def __init__(self, path=ORDER_QUEUE_PATH, max_depth=ORDER_QUEUE_MAX):
+        self.path = path
+        self.max_depth = max_depth
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS queued_order (
+                    queue_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    queue_ref TEXT NOT NULL UNIQUE,
+                    student_id TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    order_id INTEGER,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    lease_owner TEXT,
+                    lease_until REAL NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_queued_order_state ON queued_order (state, queue_id)")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # FULL: an accepted order must survive a power cut, not just a crash
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    # --- Producer side (checkout) ---
+
+    def enqueue(self, student_id, cart, order_total, payment_mode):
+        """Stores a validated order and returns its provisional queue id.
+
+        Raises OrderQueueFull when the backlog is at max_depth, so a stalled
+        MySQL makes checkout refuse new orders instead of piling them up.
+        """
+        now = time.time()
+        placed_at = datetime.now()
+        payload = json.dumps({
+            'cart': [{'item_id': item['item_id'], 'quantity': item['quantity'], 'line_total': str(item['line_total'])}
+                     for item in cart],
+            'order_total': str(order_total),
+            'payment_mode': payment_mode,
+            'placed_at': placed_at.isoformat(timespec='seconds'),
+        }, separators=(',', ':'))
+        conn = self._connect()
+        # BEGIN IMMEDIATE takes the write lock first, so the depth check and
+        # the insert cannot interleave with another process's enqueue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            depth = conn.execute("SELECT COUNT(*) FROM queued_order WHERE state = ?", (QUEUED,)).fetchone()[0]
+            if depth >= self.max_depth:
+                raise OrderQueueFull(f"{depth} orders are already waiting.")
+            queue_id = conn.execute(
+                "INSERT INTO queued_order (queue_ref, student_id, payload, state, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (uuid.uuid4().hex, student_id, payload, QUEUED, now, now),
+            ).lastrowid
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return queue_id
+
+    def status(self, queue_id, student_id):
+        """The student's queued order as a dict (state, order_id, error, ahead), or None."""
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT queue_id, state, order_id, error FROM queued_order WHERE queue_id = ? AND student_id = ?",
+            (queue_id, student_id),
+        ).fetchone()
+        if row is None:
+            return None
+        status = dict(row)
+        status['ahead'] = 0
+        if status['state'] == QUEUED:
+            status['ahead'] = conn.execute("SELECT COUNT(*) FROM queued_order WHERE state = ? AND queue_id < ?",
+                                           (QUEUED, queue_id)).fetchone()[0]
+        return status
+
+    def depth(self):
+        return self._connect().execute("SELECT COUNT(*) FROM queued_order WHERE state = ?", (QUEUED,)).fetchone()[0]
+
+    # --- Consumer side (OrderDrainer) ---
+
+    def lease(self, owner, limit):
+        """Claims up to `limit` of the oldest queued orders not leased by a live drainer."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("""
+                UPDATE queued_order SET lease_owner = ?, lease_until = ?
+                WHERE queue_id IN (
+                    SELECT queue_id FROM queued_order
+                    WHERE state = ? AND lease_until < ?
+                    ORDER BY queue_id
+                    LIMIT ?
+                )
+            """, (owner, now + ORDER_QUEUE_LEASE, QUEUED, now, limit))
+            rows = conn.execute(
+                "SELECT queue_id, queue_ref, student_id, payload, attempts FROM queued_order "
+                "WHERE state = ? AND lease_owner = ? AND lease_until > ? ORDER BY queue_id",
+                (QUEUED, owner, now),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def mark_placed(self, placed):
+        """Records {queue_ref: order_id} for orders now in MySQL."""
+        if not placed:
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE queued_order SET state = ?, order_id = ?, lease_owner = NULL, updated_at = ? "
+                "WHERE queue_ref = ?",
+                [(PLACED, order_id, now, queue_ref) for queue_ref, order_id in placed.items()],
+            )
+
+    def mark_retry(self, entry, error):
+        """Releases the lease after a database error; gives up after ORDER_QUEUE_MAX_ATTEMPTS."""
+        attempts = entry['attempts'] + 1
+        state = FAILED if attempts >= ORDER_QUEUE_MAX_ATTEMPTS else QUEUED
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE queued_order SET state = ?, attempts = ?, error = ?, lease_owner = NULL, lease_until = 0, "
+                "updated_at = ? WHERE queue_id = ?",
+                (state, attempts, str(error)[:500], time.time(), entry['queue_id']),
+            )
+        return state
+
+    def release(self, owner):
+        """Hands this drainer's unfinished leases back (clean shutdown)."""
+        with self._connect() as conn:
+            conn.execute("UPDATE queued_order SET lease_owner = NULL, lease_until = 0 "
+                         "WHERE state = ? AND lease_owner = ?", (QUEUED, owner))
+
+    def purge(self, older_than=ORDER_QUEUE_KEEP):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM queued_order WHERE state IN (?, ?) AND updated_at < ?",
+                         (PLACED, FAILED, time.time() - older_than))
+
+
+# --- Draining to MySQL ---
+
+def already_placed(queue_refs):
+    """{queue_ref: order_id} for refs that reached MySQL (e.g. committed just before a crash)."""
+    if not queue_refs:
+        return {}
+    rows = fetch_all(QUEUE_REF_LOOKUP.format(', '.join(['%s'] * len(queue_refs))), list(queue_refs))
+    return {row['queue_ref']: row['order_id'] for row in rows}
+
+
+def insert_queued_order(cursor, entry):
+    """Writes one queued order with the SQL of order_service.place_order; returns its order_id."""
+    payload = json.loads(entry['payload'])
+    placed_at = datetime.fromisoformat(payload['placed_at'])
+    cursor.execute(ORDER_INFO_QUEUED_INSERT,
+                   order_info_params(entry['student_id'], payload['order_total'], placed_at) + (entry['queue_ref'],))
+    order_id = cursor.lastrowid
+    cursor.execute(PAYMENT_INSERT, payment_params(order_id, payload['order_total'], payload['payment_mode'], placed_at))
+    cursor.executemany(ORDER_ITEM_INSERT, order_item_params(order_id, payload['cart']))
+    return order_id
+
+
+def drain_batch(queue, owner, limit=ORDER_QUEUE_BATCH):
+    """Moves up to `limit` queued orders to MySQL; returns how many were placed.
+
+    The batch goes in one transaction. If it fails, each order is retried in
+    its own transaction so one bad order (say, an item deleted meanwhile)
+    cannot hold back the rest. Raises OUTAGE_ERRORS while MySQL is down.
+    """
+    entries = queue.lease(owner, limit)
+    if not entries:
+        return 0
+    placed = already_placed([entry['queue_ref'] for entry in entries])
+    queue.mark_placed(placed)
+    entries = [entry for entry in entries if entry['queue_ref'] not in placed]
+    if not entries:
+        return len(placed)
+
+    try:
+        written = {}
+        with transaction() as cursor:
+            for entry in entries:
+                written[entry['queue_ref']] = insert_queued_order(cursor, entry)
+        queue.mark_placed(written)
+        return len(placed) + len(written)
+    except OUTAGE_ERRORS:
+        raise
+    except mysql.connector.Error as err:
+        if len(entries) == 1:
+            state = queue.mark_retry(entries[0], err)
+            print(f"[order-queue] order {entries[0]['queue_id']} {'failed' if state == FAILED else 'will retry'}: {err}")
+            return len(placed)
+        print(f"[order-queue] batch of {len(entries)} failed, retrying one by one: {err}")
+
+    count = len(placed)
+    for entry in entries:
+        try:
+            with transaction() as cursor:
+                order_id = insert_queued_order(cursor, entry)
+            queue.mark_placed({entry['queue_ref']: order_id})
+            count += 1
+        except OUTAGE_ERRORS:
+            raise
+        except mysql.connector.Error as err:
+            state = queue.mark_retry(entry, err)
+            print(f"[order-queue] order {entry['queue_id']} {'failed' if state == FAILED else 'will retry'}: {err}")
+    return count
+
+
+class OrderDrainer:
+    """Background thread that keeps draining the queue while the app runs.
+
+    Orders left behind by a crash are picked up on the next start once their
+    lease runs out; already_placed() stops them from being written twice.
+    """
+
+    def __init__(self, queue, on_placed=None, interval=ORDER_QUEUE_INTERVAL):
+        self.queue = queue
+        self.on_placed = on_placed
+        self.interval = interval
+        self.owner = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name='order-drainer', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._release()
+
+    def run(self):
+        purged_at = 0.0
+        while not self._stop.is_set():
+            try:
+                placed = drain_batch(self.queue, self.owner)
+            except Exception as err:  # keep the worker alive through DB/SQLite outages
+                print(f"[order-queue] drain paused: {err!r}")
+                self._release()
+                placed = 0
+            if placed and self.on_placed:
+                self.on_placed()
+            if time.monotonic() - purged_at > 3600:
+                self.queue.purge()
+                purged_at = time.monotonic()
+            if placed < ORDER_QUEUE_BATCH:
+                # Full batches mean a backlog: keep going without waiting
+                self._stop.wait(self.interval)
+
+    def _release(self):
+        try:
+            self.queue.release(self.owner)
+        except sqlite3.Error as err:
+            print(f"[order-queue] could not release leases: {err}")
+
+
+def create_order_queue(kind=ORDER_QUEUE):
+    """The shared OrderQueue, or None when checkout writes to MySQL directly."""
+    if kind == 'off':
+        return None
+    if kind == 'sqlite':
+        return OrderQueue()
+    raise ValueError(f"Unknown ORDER_QUEUE '{kind}' (expected 'off' or 'sqlite').")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Inspect or drain the write-behind order queue.")
+    parser.add_argument('--drain', action='store_true', help='move every queued order to MySQL, then exit')
+    args = parser.parse_args()
+    queue = OrderQueue()
+    if args.drain:
+        owner = f'cli-{os.getpid()}'
+        total = 0
+        while True:
+            placed = drain_batch(queue, owner)
+            if not placed:
+                break
+            total += placed
+        queue.release(owner)
+        print(f"Placed {total} queued orders.")
+    failed = queue._connect().execute("SELECT COUNT(*) FROM queued_order WHERE state = ?", (FAILED,)).fetchone()[0]
+    print(f"Queued: {queue.depth()}  Failed: {failed}")
@@ -0,0 +1,221 @@
+# Order-related queries shared by student_app.py and admin_app.py
+import os
+import re
+from datetime import datetime, date
+from decimal import Decimal
+
+from db_config import fetch_all, transaction
+
+ORDER_HISTORY_PAGE_SIZE = int(os.getenv('ORDER_HISTORY_PAGE_SIZE', '10'))
+ORDER_HISTORY_MAX_PAGE_SIZE = 50
+
+# Keyset cursor: "<order_date>_<order_time>_<order_id>" of the last order on a page
+_CURSOR_RE = re.compile(r'^(\d{4}-\d{2}-\d{2})_(\d{1,2}:\d{2}:\d{2})_(\d+)$')
+
+
+class InsufficientBalanceError(Exception):
+    """Raised by debit_wallet when the student's balance does not cover the amount."""
+
+
+WALLET_DEBIT_QUERY = "UPDATE student SET balance = balance - %s WHERE student_id = %s AND balance >= %s"
+
+
+def debit_wallet(cursor, student_id, amount):
+    """Debits a student's wallet in one conditional UPDATE.
+
+    The balance check and the write happen atomically in MySQL, so
+    concurrent checkouts can neither lose an update nor overdraw the
+    wallet, and only the student's own row is locked. Run it inside
+    transaction() so a later failure also undoes the debit.
+    """
+    if amount <= 0:
+        # Nothing to debit; MySQL would also report 0 affected rows here
+        return
+    cursor.execute(WALLET_DEBIT_QUERY, (amount, student_id, amount))
+    if cursor.rowcount != 1:
+        raise InsufficientBalanceError(f"Balance of {student_id} is below {amount}.")
+
+
+def order_items_query(order_ids):
+    """Builds the batched line-item query; returns (sql, params)."""
+    placeholders = ', '.join(['%s'] * len(order_ids))
+    items_query = f"""
+    SELECT oit.order_id, i.item_name, oit.quantity, oit.subtotal
+    FROM order_item oit
+    JOIN item i ON oit.item_id = i.item_id
+    WHERE oit.order_id IN ({placeholders})
+    ORDER BY oit.order_id, oit.order_item_id
+    """
+    return items_query, list(order_ids)
+
+
+def group_order_items(order_ids, rows):
+    grouped = {order_id: [] for order_id in order_ids}
+    for row in rows:
+        grouped[row['order_id']].append(row)
+    return grouped
+
+
+def fetch_order_items(order_ids):
+    """Loads the line items of many orders in a single query.
+
+    Returns a dict mapping every requested order_id to its list of items
+    (item_name, quantity, subtotal), so callers can attach them without
+    issuing one query per order.
+    """
+    order_ids = list(dict.fromkeys(order_ids))
+    if not order_ids:
+        return {}
+    return group_order_items(order_ids, fetch_all(*order_items_query(order_ids)))
+
+
+def encode_history_cursor(order):
+    return f"{order['order_date']}_{order['order_time']}_{order['order_id']}"
+
+
+def decode_history_cursor(cursor):
+    """Parses a history cursor into (order_date, order_time, order_id); None if malformed."""
+    match = _CURSOR_RE.match(cursor or '')
+    if not match:
+        return None
+    try:
+        order_date = date.fromisoformat(match.group(1))
+    except ValueError:
+        return None
+    # Zero-padded, so the time also compares correctly as text (SQLite backend)
+    order_time = match.group(2).zfill(8)
+    return order_date, order_time, int(match.group(3))
+
+
+def order_history_query(student_id, before=None, page_size=ORDER_HISTORY_PAGE_SIZE):
+    """Builds the keyset-paginated history query; returns (sql, params, page_size)."""
+    page_size = max(1, min(page_size, ORDER_HISTORY_MAX_PAGE_SIZE))
+    keyset_filter = ''
+    params = [student_id]
+    if before:
+        keyset_filter = 'AND (oi.order_date, oi.order_time, oi.order_id) < (%s, %s, %s)'
+        params.extend(before)
+    params.append(page_size + 1)
+
+    history_query = f"""
+    SELECT oi.order_id, oi.order_date, oi.order_time, oi.total_amount, oi.status, p.payment_mode
+    FROM order_info oi
+    LEFT JOIN payment p ON oi.order_id = p.order_id
+    WHERE oi.student_id = %s {keyset_filter}
+    ORDER BY oi.order_date DESC, oi.order_time DESC, oi.order_id DESC
+    LIMIT %s
+    """
+    return history_query, params, page_size
+
+
+def split_history_page(rows, page_size):
+    """Trims the look-ahead row; returns (orders, next_cursor)."""
+    orders_list = rows[:page_size]
+    next_cursor = encode_history_cursor(orders_list[-1]) if len(rows) > page_size else None
+    return orders_list, next_cursor
+
+
+def fetch_order_history(student_id, before=None, page_size=ORDER_HISTORY_PAGE_SIZE):
+    """One page of a student's orders, newest first, with their items attached.
+
+    Uses keyset pagination on (order_date, order_time, order_id): `before`
+    is the decoded cursor of the last order on the previous page, so every
+    page is an index range scan of `page_size` rows no matter how long the
+    history is. Returns (orders, next_cursor); next_cursor is None on the
+    last page.
+    """
+    history_query, params, page_size = order_history_query(student_id, before, page_size)
+    orders_list, next_cursor = split_history_page(fetch_all(history_query, params), page_size)
+
+    items_by_order = fetch_order_items(order['order_id'] for order in orders_list)
+    for order in orders_list:
+        order['order_items'] = items_by_order[order['order_id']]
+    return orders_list, next_cursor
+
+
+def fetch_pending_orders(after_order_id=0):
+    """Pending orders newer than after_order_id, oldest first, with their items attached."""
+    pending_orders = fetch_all("""
+        SELECT oi.order_id, oi.order_date, oi.order_time, oi.total_amount, oi.status, s.name as student_name
+        FROM order_info oi
+        JOIN student s ON oi.student_id = s.student_id
+        WHERE oi.status = 'Pending' AND oi.order_id > %s
+        ORDER BY oi.order_date ASC, oi.order_time ASC
+    """, (after_order_id,))
+
+    items_by_order = fetch_order_items(order['order_id'] for order in pending_orders)
+    for order in pending_orders:
+        order['items'] = items_by_order[order['order_id']]
+    return pending_orders
+
+
+def fetch_order_statuses(order_ids):
+    """Returns {order_id: status} for the given orders (deleted orders are absent)."""
+    order_ids = list(order_ids)
+    if not order_ids:
+        return {}
+    placeholders = ', '.join(['%s'] * len(order_ids))
+    rows = fetch_all(f"SELECT order_id, status FROM order_info WHERE order_id IN ({placeholders})", order_ids)
+    return {row['order_id']: row['status'] for row in rows}
+
+
+ORDER_INFO_INSERT = """
+INSERT INTO order_info (student_id, order_date, order_time, total_amount, status)
+VALUES (%s, %s, %s, %s, %s)
+"""
+
+# Orders drained from order_queue.py carry their queue_ref (unique), so a
+# retried batch can never insert the same order twice
+ORDER_INFO_QUEUED_INSERT = """
+INSERT INTO order_info (student_id, order_date, order_time, total_amount, status, queue_ref)
+VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+PAYMENT_INSERT = """
+INSERT INTO payment (order_id, payment_mode, amount_paid, payment_status, transaction_date)
+VALUES (%s, %s, %s, %s, %s)
+"""
+
+ORDER_ITEM_INSERT = """
+INSERT INTO order_item (order_id, item_id, quantity, subtotal)
+VALUES (%s, %s, %s, %s)
+"""
+
+
+def order_info_params(student_id, order_total, placed_at=None):
+    placed_at = placed_at or datetime.now()
+    return (student_id, placed_at.date(), placed_at.strftime('%H:%M:%S'), Decimal(order_total), 'Pending')
+
+
+def payment_params(order_id, order_total, payment_mode, placed_at=None):
+    payment_status = 'Completed' if payment_mode in ['UPI', 'Card', 'Wallet'] else 'Pending'
+    return (order_id, payment_mode, Decimal(order_total), payment_status, (placed_at or datetime.now()).date())
+
+
+def order_item_params(order_id, cart):
+    return [(order_id, item['item_id'], item['quantity'], Decimal(item['line_total'])) for item in cart]
+
+
+def wallet_amount(order_total):
+    return Decimal(order_total).quantize(Decimal('0.01'))
+
+
+def place_order(student_id, cart, order_total, payment_mode):
+    """Writes a complete order in one transaction and returns its order_id.
+
+    Debits the wallet for 'Wallet' payments, then inserts order_info,
+    payment and every order_item row. Line items go out as a single
+    multi-row INSERT (executemany), so the round trips no longer grow with
+    the size of the cart. `cart` holds dicts with item_id, quantity and
+    line_total. Raises InsufficientBalanceError or mysql.connector.Error;
+    nothing is written in either case.
+    """
+    with transaction() as cursor:
+        if payment_mode == 'Wallet':
+            debit_wallet(cursor, student_id, wallet_amount(order_total))
+
+        cursor.execute(ORDER_INFO_INSERT, order_info_params(student_id, order_total))
+        order_id = cursor.lastrowid
+        cursor.execute(PAYMENT_INSERT, payment_params(order_id, order_total, payment_mode))
+        cursor.executemany(ORDER_ITEM_INSERT, order_item_params(order_id, cart))
+    return order_id
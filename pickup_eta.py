@@ -0,0 +1,199 @@
+# Pickup-time estimates for placed orders, shown on order_success.html
+#
+# The kitchen's recent pace is learned from orders that moved Pending ->
+# Completed (order_info.completed_at, set by admin_app). A sliding window of
+# those completions keeps running per-item turnaround sums, so adding or
+# evicting one completion is O(1) per item and an estimate never scans
+# history. The window is topped up incrementally from the DB when the
+# 'orders' channel signals a status change.
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, time as dt_time, timedelta
+
+from db_config import fetch_all, fetch_one
+from invalidation import get_channel
+
+ETA_WINDOW_SIZE = int(os.getenv('ETA_WINDOW_SIZE', '200'))          # completions kept
+ETA_WINDOW_SECONDS = int(os.getenv('ETA_WINDOW_SECONDS', '3600'))    # ...and at most this old
+ETA_DEFAULT_SECONDS = int(os.getenv('ETA_DEFAULT_SECONDS', '600'))   # before any completion is seen
+ETA_REFRESH = 30          # re-check the DB even without a change signal
+ETA_ITEM_MIN_SAMPLES = 3  # fewer completions than this fall back to the window mean
+ETA_POLL_MIN = 10
+ETA_POLL_MAX = 60
+
+RECENT_COMPLETIONS_QUERY = """
+SELECT order_id, completed_at,
+       TIMESTAMPDIFF(SECOND, TIMESTAMP(order_date, order_time), completed_at) AS turnaround
+FROM order_info
+WHERE completed_at >= %s
+ORDER BY completed_at DESC, order_id DESC
+LIMIT %s
+"""
+
+ORDER_ETA_QUERY = """
+SELECT order_id, order_date, order_time, status, completed_at
+FROM order_info
+WHERE order_id = %s AND student_id = %s
+"""
+
+QUEUE_AHEAD_QUERY = "SELECT COUNT(*) AS ahead FROM order_info WHERE status = 'Pending' AND order_id < %s"
+
+
+class TurnaroundWindow:
+    """Recent completions with running totals per item; all updates are O(1) per item."""
+
+    def __init__(self, size=ETA_WINDOW_SIZE, max_age=ETA_WINDOW_SECONDS):
+        self.size = size
+        self.max_age = timedelta(seconds=max_age)
+        self._events = deque()  # (completed_at, turnaround_seconds, item_ids), oldest on the left
+        self._total = 0.0
+        self._items = {}        # item_id -> [turnaround_sum, count]
+
+    def __len__(self):
+        return len(self._events)
+
+    def add(self, completed_at, seconds, item_ids):
+        self._events.append((completed_at, seconds, item_ids))
+        self._total += seconds
+        for item_id in item_ids:
+            stats = self._items.setdefault(item_id, [0.0, 0])
+            stats[0] += seconds
+            stats[1] += 1
+        if len(self._events) > self.size:
+            self._drop_oldest()
+
+    def evict_expired(self, now):
+        cutoff = now - self.max_age
+        while self._events and self._events[0][0] < cutoff:
+            self._drop_oldest()
+
+    def _drop_oldest(self):
+        _, seconds, item_ids = self._events.popleft()
+        self._total -= seconds
+        for item_id in item_ids:
+            stats = self._items[item_id]
+            stats[0] -= seconds
+            stats[1] -= 1
+            if stats[1] == 0:
+                del self._items[item_id]
+
+    def mean(self):
+        return self._total / len(self._events) if self._events else None
+
+    def item_mean(self, item_id):
+        stats = self._items.get(item_id)
+        if not stats or stats[1] < ETA_ITEM_MIN_SAMPLES:
+            return None
+        return stats[0] / stats[1]
+
+    def completion_interval(self):
+        """Average seconds between completions: how fast the queue drains."""
+        if len(self._events) < 2:
+            return None
+        span = (self._events[-1][0] - self._events[0][0]).total_seconds()
+        return span / (len(self._events) - 1) if span > 0 else None
+
+
+class PickupEstimator:
+    """Keeps a TurnaroundWindow in sync with the DB and turns it into ready times."""
+
+    def __init__(self, channel, window=None):
+        self.window = window if window is not None else TurnaroundWindow()
+        self._channel = channel
+        self._seen_token = object()
+        self._refreshed_at = 0.0
+        self._since = None       # completed_at of the newest completion loaded
+        self._since_ids = set()  # orders already loaded with exactly that completed_at
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Loads completions newer than the last ones seen, if a change was signalled."""
+        self._channel.poll()
+        if self._channel.token == self._seen_token and time.monotonic() - self._refreshed_at < ETA_REFRESH:
+            return
+        with self._lock:
+            self._seen_token = self._channel.token
+            self._refreshed_at = time.monotonic()
+            now = datetime.now()
+            since = self._since or now - self.window.max_age
+            rows = fetch_all(RECENT_COMPLETIONS_QUERY, (since, self.window.size))
+            rows = [row for row in reversed(rows)
+                    if row['order_id'] not in self._since_ids
+                    and row['turnaround'] is not None and row['turnaround'] >= 0]
+            if rows:
+                items = item_ids_by_order([row['order_id'] for row in rows])
+                for row in rows:
+                    self.window.add(row['completed_at'], float(row['turnaround']), items.get(row['order_id'], ()))
+                newest = rows[-1]['completed_at']
+                if newest != self._since:
+                    self._since_ids = set()
+                self._since = newest
+                self._since_ids.update(row['order_id'] for row in rows if row['completed_at'] == newest)
+            self.window.evict_expired(now)
+
+    def estimate_seconds(self, item_ids, ahead):
+        """Expected seconds from placing an order to it being ready.
+
+        The slowest item's recent turnaround (or the window mean) is the
+        baseline; a long queue ahead stretches it by the current completion
+        interval per order.
+        """
+        baseline = max((m for m in map(self.window.item_mean, item_ids) if m is not None), default=None)
+        if baseline is None:
+            baseline = self.window.mean() or ETA_DEFAULT_SECONDS
+        interval = self.window.completion_interval()
+        queue = ahead * interval if interval else 0.0
+        return max(baseline, queue)
+
+
+def item_ids_by_order(order_ids):
+    """Distinct item ids of many orders in one query."""
+    if not order_ids:
+        return {}
+    placeholders = ', '.join(['%s'] * len(order_ids))
+    rows = fetch_all(f"SELECT DISTINCT order_id, item_id FROM order_item WHERE order_id IN ({placeholders})",
+                     list(order_ids))
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row['order_id'], []).append(row['item_id'])
+    return {order_id: tuple(item_ids) for order_id, item_ids in grouped.items()}
+
+
+def placed_at(order):
+    # TIME columns come back as timedelta
+    return datetime.combine(order['order_date'], dt_time()) + order['order_time']
+
+
+def order_eta(order_id, student_id):
+    """Ready-time estimate for one of the student's orders as a JSON-friendly dict, or None."""
+    order = fetch_one(ORDER_ETA_QUERY, (order_id, student_id))
+    if not order:
+        return None
+    eta = {'order_id': order_id, 'status': order['status'], 'ready_at': None, 'eta_seconds': None, 'poll_after': None}
+    if order['status'] == 'Completed':
+        eta['ready_at'] = order['completed_at'].isoformat() if order['completed_at'] else None
+        eta['message'] = "Your order is ready for pickup!"
+        return eta
+    if order['status'] != 'Pending':
+        eta['message'] = f"This order was {order['status'].lower()}."
+        return eta
+
+    pickup_estimator.refresh()
+    ahead = fetch_one(QUEUE_AHEAD_QUERY, (order_id,))
+    item_ids = item_ids_by_order([order_id]).get(order_id, ())
+    ready_at = placed_at(order) + timedelta(seconds=pickup_estimator.estimate_seconds(item_ids, ahead['ahead'] if ahead else 0))
+    remaining = max(0, int((ready_at - datetime.now()).total_seconds()))
+    eta['ready_at'] = ready_at.isoformat(timespec='seconds')
+    eta['eta_seconds'] = remaining
+    eta['poll_after'] = min(ETA_POLL_MAX, max(ETA_POLL_MIN, remaining // 3))
+    if remaining >= 60:
+        eta['message'] = f"Estimated ready at {ready_at:%I:%M %p} (about {round(remaining / 60)} min)."
+    else:
+        eta['message'] = "Almost ready, should be up any moment."
+    return eta
+
+
+# Shared by every request of this process
+pickup_estimator = PickupEstimator(get_channel('orders'))
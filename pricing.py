@@ -0,0 +1,74 @@
+# Cart pricing against the menu cache's in-memory price table
+import os
+import threading
+from collections import OrderedDict
+
+CART_PRICE_MEMO_MAX = int(os.getenv('CART_PRICE_MEMO_MAX', '4096'))
+
+
+class PricedCart:
+    """Result of pricing one cart; shared between requests, so treat as read-only."""
+
+    def __init__(self, lines, total, removed):
+        self.lines = lines
+        self.total = total
+        self.removed = removed
+
+
+def price_cart(pairs, snapshot):
+    """Prices [item_id, quantity] pairs using a MenuSnapshot's items_by_id table.
+
+    Unavailable or unknown items are left out and their names returned in
+    `removed` so the caller can tell the student.
+    """
+    lines = []
+    removed = []
+    total = 0.0
+    for item_id, quantity in pairs:
+        live_item = snapshot.items_by_id.get(item_id)
+        if live_item and live_item['availability_status'] == 1:
+            line_total = live_item['discounted_price'] * quantity
+            lines.append({
+                'item_id': item_id,
+                'item_name': live_item['item_name'],
+                'price': live_item['price'],
+                'is_special': live_item['is_special'],
+                'discounted_price': live_item['discounted_price'],
+                'quantity': quantity,
+                'line_total': line_total
+            })
+            total += line_total
+        else:
+            removed.append(live_item['item_name'] if live_item else 'An item')
+    return PricedCart(lines, total, removed)
+
+
+class CartPricer:
+    """Memoizes price_cart() per (cart contents, price version).
+
+    A snapshot's price_version changes whenever the menu is reloaded, so a
+    memoized result can never outlive the prices it was computed from.
+    Students refreshing an unchanged cart get the stored result back.
+    """
+
+    def __init__(self, max_entries=CART_PRICE_MEMO_MAX):
+        self.max_entries = max_entries
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+    def price(self, pairs, snapshot):
+        key = (tuple((item_id, quantity) for item_id, quantity in pairs), snapshot.price_version)
+        with self._lock:
+            priced = self._memo.get(key)
+            if priced is not None:
+                self._memo.move_to_end(key)
+                return priced
+        priced = price_cart(pairs, snapshot)
+        with self._lock:
+            self._memo[key] = priced
+            while len(self._memo) > self.max_entries:
+                self._memo.popitem(last=False)
+        return priced
+
+
+cart_pricer = CartPricer()
@@ -0,0 +1,307 @@
+"""Incremental daily sales rollups for the admin reports page.
+
+fold_new_orders() keeps sales_daily, sales_daily_item and
+sales_daily_category (see migrations/003_daily_sales_rollups.sql) in step
+with order_info, one transaction per batch:
+
+- Order ids above the 'daily_sales' watermark are scanned in id order. The
+  scan stops below the first order younger than ROLLUP_SETTLE_SECONDS
+  (lower ids may still be mid-commit) and skips over empty id ranges.
+- Every scanned order gets a row in sales_rollup_order holding the status
+  it was folded with; orders still Pending get NULL and are folded as soon
+  as they leave Pending, without holding back the orders after them.
+- Status changes of folded orders (admin_app stamps status_changed_at on
+  every change) are found through the 'last_change_at' watermark and
+  folded as deltas, e.g. a Completed order later Canceled moves out of
+  revenue.
+
+Reports read only the rollup tables. Run it from cron or in a loop:
+
+    python sales_rollup.py            # catch up once
+    python sales_rollup.py --loop 60  # keep folding every 60s
+"""
+import argparse
+import os
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from db_config import fetch_all, fetch_one, transaction
+
+ROLLUP_NAME = 'daily_sales'
+ROLLUP_BATCH = int(os.getenv('ROLLUP_BATCH', '5000'))
+# Orders placed or changed this recently may still be mid-commit
+ROLLUP_SETTLE_SECONDS = int(os.getenv('ROLLUP_SETTLE_SECONDS', '60'))
+REPORT_DEFAULT_DAYS = 30
+
+WATERMARK_LOCK = "SELECT last_order_id, last_change_at FROM rollup_watermark WHERE name = %s FOR UPDATE"
+WATERMARK_INIT = "INSERT IGNORE INTO rollup_watermark (name, last_order_id, last_change_at) VALUES (%s, 0, NOW())"
+WATERMARK_ADVANCE = "UPDATE rollup_watermark SET last_order_id = %s, last_change_at = %s WHERE name = %s"
+
+# One primary-key range read: the newest order id in the batch and the first
+# one that is too young to scan
+BATCH_BOUNDS = """
+SELECT MAX(order_id) AS last_id,
+       MIN(CASE WHEN TIMESTAMP(order_date, order_time) > %s THEN order_id END) AS first_young
+FROM order_info
+WHERE order_id > %s AND order_id <= %s
+"""
+
+# First order after an empty id range (deleted or cleaned-up orders)
+NEXT_ORDER = """
+SELECT order_id, TIMESTAMP(order_date, order_time) > %s AS young
+FROM order_info
+WHERE order_id > %s
+ORDER BY order_id
+LIMIT 1
+"""
+
+SCANNED_ORDERS = "SELECT order_id, status FROM order_info WHERE order_id > %s AND order_id <= %s"
+
+# Scanned orders that were Pending then and have a final status now
+SETTLED_OPEN_ORDERS = """
+SELECT r.order_id, oi.status
+FROM sales_rollup_order r
+JOIN order_info oi ON oi.order_id = r.order_id
+WHERE r.folded_status IS NULL AND oi.status <> 'Pending'
+LIMIT %s
+"""
+
+# Folded orders whose status changed since the last run
+CHANGED_ORDERS = """
+SELECT oi.order_id, r.folded_status, oi.status
+FROM order_info oi
+JOIN sales_rollup_order r ON r.order_id = oi.order_id
+WHERE oi.status_changed_at > %s AND oi.status_changed_at <= %s
+  AND r.folded_status IS NOT NULL AND r.folded_status <> oi.status
+"""
+
+LEDGER_UPSERT = """
+INSERT INTO sales_rollup_order (order_id, folded_status) VALUES (%s, %s)
+ON DUPLICATE KEY UPDATE folded_status = VALUES(folded_status)
+"""
+
+DAILY_ADD = """
+INSERT INTO sales_daily (sale_date, order_count, revenue, cancelled_count) VALUES (%s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE order_count = order_count + VALUES(order_count),
+                        revenue = revenue + VALUES(revenue),
+                        cancelled_count = cancelled_count + VALUES(cancelled_count)
+"""
+
+ITEM_ADD = """
+INSERT INTO sales_daily_item (sale_date, item_id, quantity, revenue, order_count) VALUES (%s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE quantity = quantity + VALUES(quantity),
+                        revenue = revenue + VALUES(revenue),
+                        order_count = order_count + VALUES(order_count)
+"""
+
+CATEGORY_ADD = """
+INSERT INTO sales_daily_category (sale_date, category, quantity, revenue, order_count) VALUES (%s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE quantity = quantity + VALUES(quantity),
+                        revenue = revenue + VALUES(revenue),
+                        order_count = order_count + VALUES(order_count)
+"""
+
+
+def in_clause(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def scan_upper(cursor, watermark, settled_before):
+    """Highest order id that can be scanned in this batch, or None if nothing can."""
+    cursor.execute(BATCH_BOUNDS, (settled_before, watermark, watermark + ROLLUP_BATCH))
+    bounds = cursor.fetchone()
+    if bounds['first_young'] is not None:
+        upper = bounds['first_young'] - 1
+    elif bounds['last_id'] is not None:
+        upper = bounds['last_id']
+    else:
+        # Empty id range: jump to just below the next order once that one has settled
+        cursor.execute(NEXT_ORDER, (settled_before, watermark + ROLLUP_BATCH))
+        following = cursor.fetchone()
+        upper = None if following is None or following['young'] else following['order_id'] - 1
+    return upper if upper is not None and upper > watermark else None
+
+
+def contribution(status):
+    """How an order with this status counts: (completed, cancelled)."""
+    if status is None or status == 'Pending':
+        return 0, 0
+    return (1, 0) if status == 'Completed' else (0, 1)
+
+
+def apply_moves(cursor, moves):
+    """Adds the rollup deltas for {order_id: (folded_status, new_status)}."""
+    order_ids = list(moves)
+    cursor.execute(f"SELECT order_id, order_date, total_amount FROM order_info WHERE order_id IN ({in_clause(order_ids)})",
+                   order_ids)
+    orders = {row['order_id']: row for row in cursor.fetchall()}
+    # +1 / -1 per order for its Completed contribution (items only count for Completed orders)
+    signs = {}
+    daily = defaultdict(lambda: [0, Decimal('0'), 0])
+    for order_id, (old, new) in moves.items():
+        order = orders.get(order_id)
+        if order is None:
+            continue
+        old_done, old_cancelled = contribution(old)
+        new_done, new_cancelled = contribution(new)
+        totals = daily[order['order_date']]
+        totals[0] += new_done - old_done
+        totals[1] += (new_done - old_done) * Decimal(str(order['total_amount']))
+        totals[2] += new_cancelled - old_cancelled
+        if new_done != old_done:
+            signs[order_id] = new_done - old_done
+
+    if signs:
+        completed_ids = list(signs)
+        cursor.execute(f"""
+            SELECT oit.order_id, oit.item_id, i.category, oit.quantity, oit.subtotal
+            FROM order_item oit
+            JOIN item i ON i.item_id = oit.item_id
+            WHERE oit.order_id IN ({in_clause(completed_ids)})
+        """, completed_ids)
+        items = defaultdict(lambda: [0, Decimal('0'), set()])
+        categories = defaultdict(lambda: [0, Decimal('0'), set()])
+        for row in cursor.fetchall():
+            sign = signs[row['order_id']]
+            sale_date = orders[row['order_id']]['order_date']
+            for key, totals in (((sale_date, row['item_id']), items), ((sale_date, row['category']), categories)):
+                entry = totals[key]
+                entry[0] += sign * row['quantity']
+                entry[1] += sign * Decimal(str(row['subtotal']))
+                entry[2].add(row['order_id'])
+        cursor.executemany(ITEM_ADD, [key + (qty, revenue, sum(signs[o] for o in ids))
+                                      for key, (qty, revenue, ids) in items.items()])
+        cursor.executemany(CATEGORY_ADD, [key + (qty, revenue, sum(signs[o] for o in ids))
+                                          for key, (qty, revenue, ids) in categories.items()])
+
+    rows = [(sale_date,) + tuple(totals) for sale_date, totals in daily.items() if any(totals)]
+    if rows:
+        cursor.executemany(DAILY_ADD, rows)
+    cursor.executemany(LEDGER_UPSERT, [(order_id, None if new == 'Pending' else new)
+                                       for order_id, (_, new) in moves.items()])
+
+
+def fold_batch():
+    """Folds one batch; returns the number of orders folded, or None when there was nothing to do."""
+    with transaction() as cursor:
+        cursor.execute(WATERMARK_INIT, (ROLLUP_NAME,))
+        cursor.execute(WATERMARK_LOCK, (ROLLUP_NAME,))
+        mark = cursor.fetchone()
+        watermark, last_change_at = mark['last_order_id'], mark['last_change_at']
+        # Whole seconds, like the DATETIME columns it is compared with and stored in
+        settled_before = datetime.now().replace(microsecond=0) - timedelta(seconds=ROLLUP_SETTLE_SECONDS)
+
+        moves = {}  # order_id -> (status folded before, status to fold now)
+        opened = []
+        upper = scan_upper(cursor, watermark, settled_before)
+        if upper is not None:
+            cursor.execute(SCANNED_ORDERS, (watermark, upper))
+            for row in cursor.fetchall():
+                if row['status'] == 'Pending':
+                    opened.append((row['order_id'], None))
+                else:
+                    moves[row['order_id']] = (None, row['status'])
+        cursor.execute(SETTLED_OPEN_ORDERS, (ROLLUP_BATCH,))
+        for row in cursor.fetchall():
+            moves[row['order_id']] = (None, row['status'])
+        changed_until = last_change_at
+        if last_change_at is None or settled_before > last_change_at:
+            changed_until = settled_before
+            cursor.execute(CHANGED_ORDERS, (last_change_at or datetime.min, changed_until))
+            for row in cursor.fetchall():
+                moves.setdefault(row['order_id'], (row['folded_status'], row['status']))
+
+        if opened:
+            cursor.executemany(LEDGER_UPSERT, opened)
+        if moves:
+            apply_moves(cursor, moves)
+        cursor.execute(WATERMARK_ADVANCE, (watermark if upper is None else upper, changed_until, ROLLUP_NAME))
+    # Only the id scan and open orders can leave more work for another batch
+    return None if upper is None and not moves else len(moves)
+
+
+def fold_new_orders(max_batches=None):
+    """Folds batches until caught up; returns the number of orders folded or re-folded."""
+    folded = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        count = fold_batch()
+        if count is None:
+            break
+        folded += count
+        batches += 1
+    return folded
+
+
+# --- Reports (read only the rollup tables) ---
+
+def report_range(start_arg, end_arg):
+    """Parses ?start=/&end= ISO dates, defaulting to the last REPORT_DEFAULT_DAYS days."""
+    today = date.today()
+    try:
+        end = date.fromisoformat(end_arg) if end_arg else today
+    except ValueError:
+        end = today
+    try:
+        start = date.fromisoformat(start_arg) if start_arg else end - timedelta(days=REPORT_DEFAULT_DAYS - 1)
+    except ValueError:
+        start = end - timedelta(days=REPORT_DEFAULT_DAYS - 1)
+    if start > end:
+        start, end = end, start
+    return start, end
+
+
+def fetch_sales_report(start, end, top_items=20):
+    """Daily totals, top items and category split for [start, end]."""
+    days = fetch_all("""
+        SELECT sale_date, order_count, revenue, cancelled_count
+        FROM sales_daily
+        WHERE sale_date BETWEEN %s AND %s
+        ORDER BY sale_date DESC
+    """, (start, end))
+
+    items = fetch_all("""
+        SELECT s.item_id, i.item_name, i.category, SUM(s.quantity) AS quantity,
+               SUM(s.revenue) AS revenue, SUM(s.order_count) AS order_count
+        FROM sales_daily_item s
+        JOIN item i ON i.item_id = s.item_id
+        WHERE s.sale_date BETWEEN %s AND %s
+        GROUP BY s.item_id, i.item_name, i.category
+        ORDER BY revenue DESC
+        LIMIT %s
+    """, (start, end, top_items))
+
+    categories = fetch_all("""
+        SELECT category, SUM(quantity) AS quantity, SUM(revenue) AS revenue, SUM(order_count) AS order_count
+        FROM sales_daily_category
+        WHERE sale_date BETWEEN %s AND %s
+        GROUP BY category
+        ORDER BY revenue DESC
+    """, (start, end))
+
+    watermark = fetch_one("SELECT last_order_id, updated_at FROM rollup_watermark WHERE name = %s", (ROLLUP_NAME,))
+
+    totals = {
+        'order_count': sum(day['order_count'] for day in days),
+        'revenue': sum(float(day['revenue']) for day in days),
+        'cancelled_count': sum(day['cancelled_count'] for day in days),
+    }
+    # SUM() over integer columns comes back as Decimal; fetch_all turns those into floats
+    for row in items + categories:
+        row['quantity'] = int(row['quantity'])
+        row['order_count'] = int(row['order_count'])
+    return {'days': days, 'items': items, 'categories': categories, 'totals': totals, 'watermark': watermark}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Fold finalized orders into the daily sales rollups.")
+    parser.add_argument('--loop', type=float, metavar='SECONDS', help='keep running, folding every SECONDS')
+    args = parser.parse_args()
+    while True:
+        folded = fold_new_orders()
+        print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Folded {folded} orders into daily sales rollups.")
+        if not args.loop:
+            break
+        time.sleep(args.loop)
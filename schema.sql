@@ -6,6 +6,11 @@
 SET FOREIGN_KEY_CHECKS = 0;
 
 -- Drop tables if they exist (safe to run multiple times)
+DROP TABLE IF EXISTS rollup_watermark;
+DROP TABLE IF EXISTS sales_rollup_order;
+DROP TABLE IF EXISTS sales_daily_category;
+DROP TABLE IF EXISTS sales_daily_item;
+DROP TABLE IF EXISTS sales_daily;
 DROP TABLE IF EXISTS payment;
 DROP TABLE IF EXISTS order_item;
 DROP TABLE IF EXISTS order_info;
@@ -43,6 +48,7 @@ CREATE TABLE daily_special (
   discount_percentage DECIMAL(5,2) NOT NULL,
   PRIMARY KEY (special_id),
   KEY idx_daily_special_item (item_id),
+  KEY idx_daily_special_date_item (date, item_id, discount_percentage),
   CONSTRAINT fk_daily_special_item FOREIGN KEY (item_id) REFERENCES item(item_id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
@@ -67,8 +73,16 @@ CREATE TABLE order_info (
   order_time TIME NOT NULL,
   total_amount DECIMAL(10,2) NOT NULL,
   status VARCHAR(20) NOT NULL,
+  completed_at DATETIME NULL DEFAULT NULL,
+  queue_ref CHAR(32) NULL DEFAULT NULL,
+  status_changed_at DATETIME NULL DEFAULT NULL,
   PRIMARY KEY (order_id),
-  KEY idx_order_info_student (student_id),
+  UNIQUE KEY uq_order_info_queue_ref (queue_ref),
+  KEY idx_order_info_student_keyset (student_id, order_date, order_time, order_id),
+  KEY idx_order_info_status_date (status, order_date, order_time, student_id, total_amount),
+  KEY idx_order_info_completed (completed_at),
+  KEY idx_order_info_date (order_date, order_id),
+  KEY idx_order_info_status_changed (status_changed_at),
   CONSTRAINT fk_order_info_student FOREIGN KEY (student_id) REFERENCES student(student_id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
@@ -99,6 +113,53 @@ CREATE TABLE payment (
   CONSTRAINT fk_payment_order FOREIGN KEY (order_id) REFERENCES order_info(order_id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Daily sales rollups (maintained by sales_rollup.py)
+CREATE TABLE sales_daily (
+  sale_date DATE NOT NULL,
+  order_count INT NOT NULL DEFAULT 0,
+  revenue DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+  cancelled_count INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (sale_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE sales_daily_item (
+  sale_date DATE NOT NULL,
+  item_id INT NOT NULL,
+  quantity INT NOT NULL DEFAULT 0,
+  revenue DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+  order_count INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (sale_date, item_id),
+  KEY idx_sales_daily_item_item (item_id, sale_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE sales_daily_category (
+  sale_date DATE NOT NULL,
+  category VARCHAR(50) NOT NULL,
+  quantity INT NOT NULL DEFAULT 0,
+  revenue DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+  order_count INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (sale_date, category)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE rollup_watermark (
+  name VARCHAR(50) NOT NULL,
+  last_order_id INT NOT NULL DEFAULT 0,
+  last_change_at DATETIME NULL DEFAULT NULL,
+  updated_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Status each scanned order was folded with (NULL while it is still Pending)
+CREATE TABLE sales_rollup_order (
+  order_id INT NOT NULL,
+  folded_status VARCHAR(20) NULL DEFAULT NULL,
+  PRIMARY KEY (order_id),
+  KEY idx_sales_rollup_order_status (folded_status),
+  CONSTRAINT fk_sales_rollup_order FOREIGN KEY (order_id) REFERENCES order_info(order_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+INSERT INTO rollup_watermark (name, last_order_id, last_change_at) VALUES ('daily_sales', 0, NOW());
+
 -- Re-enable foreign key checks
 SET FOREIGN_KEY_CHECKS = 1;
 
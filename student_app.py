@@ -1,10 +1,26 @@
 import mysql.connector
-from flask import Flask, render_template, request, url_for, redirect, flash, session
-from datetime import datetime, date
-from decimal import Decimal
+from flask import Flask, Response, abort, jsonify, render_template, request, url_for, redirect, flash, session
+from datetime import datetime
 from functools import wraps
 import os
+import threading
 from dotenv import load_dotenv
+from markupsafe import Markup
+# Shared, pooled database helpers live in db_config.py
+from db_config import (DB_CONFIG, init_app as init_db, get_request_connection,
+                       fetch_all, fetch_one, execute_query)
+from order_service import (fetch_order_history, decode_history_cursor, place_order,
+                           InsufficientBalanceError, ORDER_HISTORY_PAGE_SIZE)
+from menu_cache import get_menu
+from http_cache import make_etag, is_not_modified, validator_headers
+from cart_store import create_cart_store
+from pricing import cart_pricer
+from invalidation import get_channel
+from pickup_eta import order_eta
+from student_auth import find_eligible_student, prewarm_student_cache
+from idempotency import create_idempotency_store, wait_for_order, DONE, PENDING, QUEUED, UNKNOWN
+from order_queue import create_order_queue, OrderDrainer, OrderQueueFull, PLACED, FAILED
+from metrics import init_metrics, metrics_token_valid, render_prometheus
 
 # Load environment variables from .env file
 load_dotenv()
@@ -13,14 +29,10 @@ load_dotenv()
 app = Flask(__name__)
 # Require FLASK_SECRET_KEY; do not embed real secrets in source
 app.secret_key = os.getenv('FLASK_SECRET_KEY', '')
-
-# MySQL Configuration from .env — password default is intentionally empty
-DB_CONFIG = {
-    'user': os.getenv('DB_USER', 'root'),
-    'password': os.getenv('DB_PASSWORD', ''),
-    'host': os.getenv('DB_HOST', 'localhost'),
-    'database': os.getenv('DB_NAME', 'canteen')
-}
+# One pooled DB connection per request, released on teardown
+init_db(app)
+# Per-endpoint query/timing aggregates, served at /metrics
+metrics_registry = init_metrics(app, 'student')
 
 # Validate required environment variables early
 missing_env = []
@@ -42,147 +54,54 @@ if missing_env:
     # In a real deployment, raise the error. For now, we print warning.
     print(f"WARNING: Missing env vars: {', '.join(missing_env)}")
 
-# --- Database Functions ---
+# --- Utility Functions ---
 
-def get_db_connection():
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
-    except mysql.connector.Error as err:
-        print(f"Error connecting to MySQL: {err}")
-        flash("Database connection error. Please contact administrator.", 'danger')
-        return None
-
-def fetch_all(query, params=None):
-    conn = get_db_connection()
-    if not conn: return []
-    
-    cursor = conn.cursor(dictionary=True)
-    try:
-        cursor.execute(query, params or ())
-        result = cursor.fetchall()
-        # Convert Decimals to float
-        for row in result:
-            for key, value in row.items():
-                if isinstance(value, Decimal):
-                    row[key] = float(value)
-        return result
-    except mysql.connector.Error as err:
-        print(f"Database error in fetch_all: {err}")
-        return []
-    finally:
-        cursor.close()
-        conn.close()
+# Carts live server-side as [item_id, quantity] pairs keyed by student_id
+cart_store = create_cart_store()
 
-def fetch_one(query, params=None):
-    conn = get_db_connection()
-    if not conn: return None
-    
-    cursor = conn.cursor(dictionary=True)
-    try:
-        cursor.execute(query, params or ())
-        result = cursor.fetchone()
-        if result:
-            for key, value in result.items():
-                if isinstance(value, Decimal):
-                    result[key] = float(value)
-        return result
-    except mysql.connector.Error as err:
-        print(f"Database error in fetch_one: {err}")
-        return None
-    finally:
-        cursor.close()
-        conn.close()
+# One-shot keys that make repeated checkout submissions harmless
+checkout_keys = create_idempotency_store()
 
-def execute_query(query, params=None, fetch_id=False):
-    conn = get_db_connection()
-    if not conn: return None
-        
-    cursor = conn.cursor()
-    try:
-        cursor.execute(query, params or ())
-        conn.commit()
-        if fetch_id:
-            last_id = cursor.lastrowid
-            return last_id
-        return True
-    except mysql.connector.Error as err:
-        print(f"Database error in execute_query: {err}")
-        conn.rollback()
-        return False
-    finally:
-        cursor.close()
-        conn.close()
+# Signals new orders to the admin app's kitchen display stream
+orders_channel = get_channel('orders')
 
-# --- Utility Functions ---
+# Optional write-behind queue (ORDER_QUEUE=sqlite): non-wallet orders are
+# accepted locally and drained to MySQL in batches by a background thread
+order_queue = create_order_queue()
+if order_queue is not None:
+    OrderDrainer(order_queue, on_placed=orders_channel.publish).start()
 
-def get_cart_data(student_id):
-    """Retrieves the current cart items and calculates the total."""
-    cart = session.get('cart', [])
-    
-    if not isinstance(cart, list):
-        cart = []
-        session['cart'] = cart
+# Fill the login cache in the background so a slow DB does not delay startup
+threading.Thread(target=prewarm_student_cache, daemon=True).start()
 
-    order_total = 0.0
-
-    if not cart:
+def get_cart_data(student_id):
+    """Prices the stored cart from the menu cache and calculates the total."""
+    pairs = cart_store.get(student_id)
+    if not pairs:
         return [], 0.0
 
-    item_ids = [item['item_id'] for item in cart]
-    if not item_ids:
-        return [], 0.0
-        
-    placeholders = ', '.join(['%s'] * len(item_ids))
-    
-    item_query = f"""
-    SELECT 
-        i.item_id, i.item_name, i.price, i.availability_status,
-        CASE WHEN ds.item_id IS NOT NULL THEN 1 ELSE 0 END AS is_special,
-        CASE WHEN ds.item_id IS NOT NULL 
-             THEN ROUND(i.price * (1 - ds.discount_percentage / 100), 2)
-             ELSE i.price 
-        END AS discounted_price
-    FROM 
-        item i
-    LEFT JOIN 
-        daily_special ds ON i.item_id = ds.item_id AND ds.date = CURDATE()
-    WHERE
-        i.item_id IN ({placeholders});
-    """
-    
-    live_items_list = fetch_all(item_query, item_ids)
-    live_items_map = {item['item_id']: item for item in live_items_list}
-    
-    updated_cart = []
-    order_total = 0.0
-    
-    for cart_item in cart:
-        item_id = cart_item['item_id']
-        if item_id in live_items_map and live_items_map[item_id]['availability_status'] == 1:
-            live_item = live_items_map[item_id]
-            
-            cart_item['item_name'] = live_item['item_name']
-            cart_item['price'] = live_item['price']
-            cart_item['is_special'] = live_item['is_special']
-            cart_item['discounted_price'] = live_item['discounted_price']
-
-            final_price = live_item['discounted_price']
-            cart_item['line_total'] = final_price * cart_item['quantity']
-            order_total += cart_item['line_total']
-            updated_cart.append(cart_item)
-        else:
-            flash(f"'{cart_item.get('item_name', 'An item')}' is no longer available and was removed.", 'warning')
+    priced = cart_pricer.price(pairs, get_menu())
+    if priced.removed:
+        for item_name in priced.removed:
+            flash(f"'{item_name}' is no longer available and was removed.", 'warning')
+        cart_store.set(student_id, [[line['item_id'], line['quantity']] for line in priced.lines])
+    return priced.lines, priced.total
 
-    session['cart'] = updated_cart 
-    session.modified = True
-    return updated_cart, order_total
+def item_name_for(item_id):
+    item = get_menu().items_by_id.get(item_id)
+    return item['item_name'] if item else 'Item'
 
 # --- Context Processor ---
 @app.context_processor
 def inject_now():
     return {'now': datetime.now()}
 
+@app.context_processor
+def inject_cart_count():
+    if 'student_id' not in session:
+        return {'cart_item_count': 0}
+    return {'cart_item_count': len(cart_store.get(session['student_id']))}
+
 # --- Decorators ---
 
 def student_required(f):
@@ -200,18 +119,14 @@ def student_required(f):
 def login():
     if request.method == 'POST':
         student_id = request.form['student_id'].strip().upper()
-        student_query = """
-        SELECT student_id, name 
-        FROM student 
-        WHERE student_id = %s AND department = %s AND year IN (%s, %s)
-        """
-        student = fetch_one(student_query, (student_id, 'IS', 2, 3))
+        # Eligible IS students (Year 2 or 3), usually answered from the login cache
+        student = find_eligible_student(student_id)
 
         if student:
             session.clear()
             session['student_id'] = student['student_id']
             session['student_name'] = student['name']
-            session['cart'] = [] 
+            cart_store.delete(student['student_id'])
             flash(f"Welcome, {student['name']}! You are logged in.", 'success')
             return redirect(url_for('index'))
         else:
@@ -221,37 +136,40 @@ def login():
 
 @app.route('/logout')
 def logout():
+    if 'student_id' in session:
+        cart_store.delete(session['student_id'])
     session.clear()
     flash("You have been logged out.", 'success')
     return redirect(url_for('login'))
 
+def menu_page(template_name, section):
+    """Renders a menu page around the menu cards cached for this menu version.
+
+    `section` names the MenuSnapshot grouping to show. The ETag covers the
+    cards and the per-student parts of the page (name, cart), so an unchanged
+    page is answered with 304 and no rendering at all. There is no
+    Last-Modified: the menu version alone says nothing about this student's
+    cart, so If-Modified-Since must not earn a 304.
+    """
+    snapshot = get_menu()
+    categories = getattr(snapshot, section)
+    html, digest = snapshot.fragment(section, lambda: render_template('_menu_cards.html', categories=categories))
+    menu_cards = Markup(html) if categories else ''
+    if session.get('_flashes'):
+        # Flashes show once; a page carrying them must not be revalidated later
+        return render_template(template_name, menu_cards=menu_cards)
+    student_id = session['student_id']
+    etag = make_etag(template_name, digest, student_id, session.get('student_name'), cart_store.get(student_id))
+    headers = validator_headers(etag)
+    if is_not_modified(request.headers.get('If-None-Match'), None, etag):
+        return Response(status=304, headers=headers)
+    return render_template(template_name, menu_cards=menu_cards), headers
+
 @app.route('/')
 @student_required
 def index():
     """Home page: Displays the digital menu."""
-    menu_query = """
-    SELECT i.item_id, i.item_name, i.price, i.category, i.availability_status,
-           ds.discount_percentage,
-           CASE WHEN ds.item_id IS NOT NULL THEN 1 ELSE 0 END AS is_special,
-           CASE WHEN ds.item_id IS NOT NULL 
-                THEN ROUND(i.price * (1 - ds.discount_percentage / 100), 2)
-                ELSE i.price 
-           END AS discounted_price
-    FROM item i
-    LEFT JOIN daily_special ds ON i.item_id = ds.item_id AND ds.date = CURDATE()
-    WHERE i.availability_status = 1
-    ORDER BY i.category, i.item_name;
-    """
-    menu_items = fetch_all(menu_query)
-
-    categories = {}
-    for item in menu_items:
-        category = item['category']
-        if category not in categories:
-            categories[category] = []
-        categories[category].append(item)
-        
-    return render_template('index.html', categories=categories)
+    return menu_page('index.html', 'categories')
 
 @app.route('/menu')
 @student_required
@@ -261,29 +179,7 @@ def menu():
 @app.route('/daily_special')
 @student_required
 def daily_special():
-    menu_query = """
-    SELECT i.item_id, i.item_name, i.price, i.category, i.availability_status,
-           ds.discount_percentage,
-           1 AS is_special,
-           ROUND(i.price * (1 - ds.discount_percentage / 100), 2) AS discounted_price
-    FROM item i
-    JOIN daily_special ds ON i.item_id = ds.item_id AND ds.date = CURDATE()
-    WHERE i.availability_status = 1
-    ORDER BY i.category, i.item_name;
-    """
-    menu_items = fetch_all(menu_query)
-
-    categories = {}
-    for item in menu_items:
-        category = item['category']
-        if category not in categories:
-            categories[category] = []
-        categories[category].append(item)
-        
-    cart = session.get('cart', [])
-    if not isinstance(cart, list): cart = []
-
-    return render_template('daily_special.html', categories=categories, cart_item_count=len(cart))
+    return menu_page('daily_special.html', 'special_categories')
 
 
 @app.route('/add_to_cart/<int:item_id>', methods=['POST'])
@@ -296,48 +192,25 @@ def add_to_cart(item_id):
         flash("Quantity must be positive.", 'danger')
         return redirect(url_for('menu'))
 
-    item_query = """
-    SELECT i.item_id, i.item_name, i.price, 
-           ds.discount_percentage,
-           CASE WHEN ds.item_id IS NOT NULL THEN 1 ELSE 0 END AS is_special,
-           CASE WHEN ds.item_id IS NOT NULL 
-                THEN ROUND(i.price * (1 - ds.discount_percentage / 100), 2)
-                ELSE i.price 
-           END AS discounted_price
-    FROM item i
-    LEFT JOIN daily_special ds ON i.item_id = ds.item_id AND ds.date = CURDATE()
-    WHERE i.item_id = %s AND i.availability_status = 1;
-    """
-    item_details = fetch_one(item_query, (item_id,))
+    item_details = get_menu().items_by_id.get(item_id)
+    if item_details and item_details['availability_status'] != 1:
+        item_details = None
     
     if not item_details:
         flash("Item not found or unavailable.", 'danger')
         return redirect(url_for('menu'))
         
-    cart = session.get('cart', [])
-    if not isinstance(cart, list): cart = []
-
-    found = False
-    for cart_item in cart:
-        if cart_item['item_id'] == item_id:
-            cart_item['quantity'] += quantity
-            found = True
+    student_id = session['student_id']
+    cart = cart_store.get(student_id)
+
+    for pair in cart:
+        if pair[0] == item_id:
+            pair[1] += quantity
             break
-            
-    if not found:
-        new_cart_item = {
-            'item_id': item_details['item_id'],
-            'item_name': item_details['item_name'],
-            'price': item_details['price'],
-            'is_special': item_details['is_special'],
-            'discounted_price': item_details['discounted_price'],
-            'quantity': quantity,
-            'line_total': item_details['discounted_price'] * quantity 
-        }
-        cart.append(new_cart_item)
+    else:
+        cart.append([item_id, quantity])
         
-    session['cart'] = cart
-    session.modified = True
+    cart_store.set(student_id, cart)
     flash(f"{quantity} x {item_details['item_name']} added to cart.", 'success')
     return redirect(url_for('menu'))
 
@@ -351,8 +224,8 @@ def cart():
 @app.route('/update_cart/<int:item_id>', methods=['POST'])
 @student_required
 def update_cart(item_id):
-    cart = session.get('cart', [])
-    if not isinstance(cart, list): cart = []
+    student_id = session['student_id']
+    cart = cart_store.get(student_id)
     
     try:
         new_quantity = int(request.form.get('quantity', 0))
@@ -361,67 +234,78 @@ def update_cart(item_id):
         return redirect(url_for('cart'))
 
     updated_cart = []
-    item_name = ""
-    for item in cart:
-        if item['item_id'] == item_id:
-            item_name = item['item_name']
+    for pair in cart:
+        if pair[0] == item_id:
+            item_name = item_name_for(item_id)
             if new_quantity > 0:
-                item['quantity'] = new_quantity
-                updated_cart.append(item)
+                updated_cart.append([item_id, new_quantity])
                 flash(f"Quantity for {item_name} updated to {new_quantity}.", 'info')
             else:
                 flash(f"{item_name} removed from cart.", 'danger')
         else:
-            updated_cart.append(item)
+            updated_cart.append(pair)
             
-    session['cart'] = updated_cart
-    session.modified = True
+    cart_store.set(student_id, updated_cart)
     return redirect(url_for('cart'))
 
 @app.route('/remove_from_cart/<int:item_id>', methods=['POST'])
 @student_required
 def remove_from_cart(item_id):
-    cart = session.get('cart', [])
-    if not isinstance(cart, list): cart = []
+    student_id = session['student_id']
+    cart = cart_store.get(student_id)
     
-    updated_cart = []
-    item_name = ""
-    for item in cart:
-        if item['item_id'] != item_id:
-            updated_cart.append(item)
-        else:
-            item_name = item['item_name']
-            
-    session['cart'] = updated_cart
-    session.modified = True
-    flash(f"{item_name} removed from cart.", 'danger')
+    updated_cart = [pair for pair in cart if pair[0] != item_id]
+    cart_store.set(student_id, updated_cart)
+    flash(f"{item_name_for(item_id)} removed from cart.", 'danger')
     return redirect(url_for('cart'))
 
 
 @app.route('/checkout', methods=['GET', 'POST'])
 @student_required
 def checkout():
-    cart, order_total = get_cart_data(session['student_id'])
+    student_id = session['student_id']
+    checkout_key = None
+
+    if request.method == 'POST':
+        # A repeated submission of the same form is answered without touching MySQL
+        checkout_key = request.form.get('checkout_key', '')
+        outcome, existing_order_id = wait_for_order(checkout_keys, checkout_key, student_id)
+        if outcome == DONE:
+            return redirect(url_for('order_success', order_id=existing_order_id))
+        if outcome == QUEUED:
+            return redirect(url_for('order_queued', queue_id=existing_order_id))
+        if outcome == PENDING:
+            flash("Your order is still being placed. It will appear under My Orders shortly.", 'info')
+            return redirect(url_for('orders'))
+        if outcome == UNKNOWN:
+            flash("This checkout page has expired. Please review your order and place it again.", 'warning')
+            return redirect(url_for('checkout'))
+
+    try:
+        return checkout_page(student_id, checkout_key)
+    finally:
+        if checkout_key is not None:
+            # No-op once the order is recorded; otherwise the same form may be resubmitted
+            checkout_keys.release(checkout_key)
+
+def checkout_page(student_id, checkout_key):
+    cart, order_total = get_cart_data(student_id)
 
     if not cart:
         flash("Your cart is empty. Please add items to place an order.", 'warning')
         return redirect(url_for('index'))
 
     # Fetch wallet balance for the GET request or POST check
-    conn = get_db_connection()
-    if not conn: return redirect(url_for('cart'))
-    cursor = conn.cursor(dictionary=True)
+    if not get_request_connection(): return redirect(url_for('cart'))
     
     # Note: Assuming column name is 'balance' based on user input. 
     # If DB uses 'wallet_balance', change this query accordingly.
-    cursor.execute("SELECT balance FROM student WHERE student_id = %s", (session['student_id'],))
-    res = cursor.fetchone()
+    res = fetch_one("SELECT balance FROM student WHERE student_id = %s", (student_id,))
     balance = float(res['balance']) if res else 0.0
 
     if request.method == 'POST':
         try:
             payment_mode = request.form['payment_mode']
-            student_id = session['student_id']
             
             # WALLET LOGIC
             if payment_mode == 'Wallet':
@@ -433,59 +317,60 @@ def checkout():
                     flash("Invalid Wallet PIN. Payment failed.", 'danger')
                     return redirect(url_for('checkout'))
 
-                # Verify Balance
+                # Verify Balance (early reject; the debit below is the real check)
                 if balance < order_total:
                     flash("Insufficient wallet balance.", 'danger')
                     return redirect(url_for('checkout'))
-                
-                # Deduct Balance
-                new_balance = balance - order_total
-                cursor.execute("UPDATE student SET balance = %s WHERE student_id = %s", (new_balance, student_id))
-                # ----------------------------------
-
-            # Insert Order
-            order_info_query = """
-            INSERT INTO order_info (student_id, order_date, order_time, total_amount, status)
-            VALUES (%s, %s, %s, %s, %s)
-            """
-            order_params = (student_id, date.today(), datetime.now().strftime('%H:%M:%S'), Decimal(order_total), 'Pending')
-            cursor.execute(order_info_query, order_params)
-            new_order_id = cursor.lastrowid
-
-            # Insert Payment
-            payment_status = 'Completed' if payment_mode in ['UPI', 'Card', 'Wallet'] else 'Pending'
-            payment_query = """
-            INSERT INTO payment (order_id, payment_mode, amount_paid, payment_status, transaction_date)
-            VALUES (%s, %s, %s, %s, %s)
-            """
-            payment_params = (new_order_id, payment_mode, Decimal(order_total), payment_status, date.today())
-            cursor.execute(payment_query, payment_params)
-            
-            # Insert Items
-            order_item_query = """
-            INSERT INTO order_item (order_id, item_id, quantity, subtotal)
-            VALUES (%s, %s, %s, %s)
-            """
-            for item in cart:
-                item_params = (new_order_id, item['item_id'], item['quantity'], Decimal(item['line_total']))
-                cursor.execute(order_item_query, item_params)
-
-            conn.commit()
-            session.pop('cart', None)
-            session.modified = True
+
+            if order_queue is not None and payment_mode != 'Wallet':
+                return queue_order(student_id, checkout_key, cart, order_total, payment_mode)
+
+            # Wallet debit, order, payment and items commit together or not at all
+            new_order_id = place_order(student_id, cart, order_total, payment_mode)
+            checkout_keys.complete(checkout_key, new_order_id)
+            orders_channel.publish()  # wake the kitchen display stream
+
+            cart_store.delete(student_id)
             flash("Order placed successfully!", 'success')
             return redirect(url_for('order_success', order_id=new_order_id))
 
+        except InsufficientBalanceError:
+            flash("Insufficient wallet balance.", 'danger')
+            return redirect(url_for('checkout'))
         except mysql.connector.Error as err:
             print(f"Checkout Error: {err}")
-            conn.rollback()
             flash(f"An error occurred during checkout: {err}", 'danger')
             return redirect(url_for('cart'))
-        finally:
-            cursor.close()
-            conn.close()
 
-    return render_template('checkout.html', cart=cart, order_total=order_total, balance=balance)
+    return render_template('checkout.html', cart=cart, order_total=order_total, balance=balance,
+                           checkout_key=checkout_keys.issue(student_id))
+
+def queue_order(student_id, checkout_key, cart, order_total, payment_mode):
+    """Hands the validated order to the write-behind queue; MySQL is written by the drainer."""
+    try:
+        queue_id = order_queue.enqueue(student_id, cart, order_total, payment_mode)
+    except OrderQueueFull:
+        flash("The canteen is very busy right now. Please try placing your order again in a minute.", 'warning')
+        return redirect(url_for('checkout'))
+    checkout_keys.complete(checkout_key, queue_id, QUEUED)
+    cart_store.delete(student_id)
+    flash("Order received! It will be confirmed in a moment.", 'success')
+    return redirect(url_for('order_queued', queue_id=queue_id))
+
+@app.route('/orders/queued/<int:queue_id>')
+@student_required
+def order_queued(queue_id):
+    """Waiting page for a queued order; forwards to order_success once it is in MySQL."""
+    status = order_queue.status(queue_id, session['student_id']) if order_queue is not None else None
+    if status is None:
+        flash("Order not found.", 'danger')
+        return redirect(url_for('orders'))
+    if status['state'] == PLACED:
+        return redirect(url_for('order_success', order_id=status['order_id']))
+    if status['state'] == FAILED:
+        flash("Sorry, your order could not be placed. Please add the items to your cart again.", 'danger')
+        return redirect(url_for('index'))
+    return render_template('order_queued.html', status=status)
 
 @app.route('/order_success/<int:order_id>')
 @student_required
@@ -510,34 +395,61 @@ def order_success(order_id):
     WHERE oit.order_id = %s
     """
     items = fetch_all(items_query, (order_id,))
+    eta = order_eta(order_id, session['student_id'])
 
-    return render_template('order_success.html', order=order, items=items)
+    return render_template('order_success.html', order=order, items=items, eta=eta)
 
+@app.route('/api/orders/<int:order_id>/eta')
+@student_required
+def order_eta_api(order_id):
+    """Cheap status/ready-time poll for order_success.html; clients wait poll_after seconds."""
+    eta = order_eta(order_id, session['student_id'])
+    if eta is None:
+        return jsonify({'error': 'Order not found.'}), 404
+    response = jsonify(eta)
+    if eta['poll_after']:
+        response.headers['Cache-Control'] = f"private, max-age={eta['poll_after']}"
+    return response
+
+
+def history_page_args():
+    """Reads the keyset cursor and page size of an order-history request."""
+    before = decode_history_cursor(request.args.get('before'))
+    page_size = request.args.get('limit', ORDER_HISTORY_PAGE_SIZE, type=int)
+    return before, page_size
 
 @app.route('/orders')
 @student_required
 def orders():
-    student_id = session['student_id']
-    orders_query = """
-    SELECT oi.order_id, oi.order_date, oi.order_time, oi.total_amount, oi.status, p.payment_mode
-    FROM order_info oi
-    LEFT JOIN payment p ON oi.order_id = p.order_id
-    WHERE oi.student_id = %s
-    ORDER BY oi.order_date DESC, oi.order_time DESC
-    """
-    orders_list = fetch_all(orders_query, (student_id,))
+    before, page_size = history_page_args()
+    orders_list, next_cursor = fetch_order_history(session['student_id'], before, page_size)
+
+    # Infinite scroll asks for just the next batch of cards
+    if request.args.get('fragment'):
+        response = app.make_response(render_template('_order_cards.html', orders=orders_list))
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
+        
+    return render_template('orders.html', orders=orders_list, next_cursor=next_cursor)
 
+@app.route('/api/orders')
+@student_required
+def api_orders():
+    """JSON variant of the order history, paginated with the same cursor."""
+    before, page_size = history_page_args()
+    orders_list, next_cursor = fetch_order_history(session['student_id'], before, page_size)
     for order in orders_list:
-        order_items_query = """
-        SELECT i.item_name, oit.quantity, oit.subtotal
-        FROM order_item oit
-        JOIN item i ON oit.item_id = i.item_id
-        WHERE oit.order_id = %s
-        """
-        order['order_items'] = fetch_all(order_items_query, (order['order_id'],)) 
-        order['total_amount'] = float(order['total_amount']) 
-        
-    return render_template('orders.html', orders=orders_list)
+        order['order_date'] = order['order_date'].isoformat()
+        order['order_time'] = str(order['order_time'])
+    return jsonify({'orders': orders_list, 'next_cursor': next_cursor})
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint; hidden unless METRICS_TOKEN is set and supplied."""
+    if not metrics_token_valid():
+        abort(404)
+    return Response(render_prometheus(metrics_registry), mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
     print("--- STUDENT APP RUNNING ON PORT 5000 ---")
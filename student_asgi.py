@@ -0,0 +1,537 @@
+# Async (ASGI) deployment of the student portal for peak-hour concurrency
+#
+# Serves the same routes and templates as student_app.py, but on Starlette
+# with a bounded aiomysql pool, so a request waiting on MySQL no longer holds
+# a server thread. Menu caching, cart storage, cart pricing and the order SQL
+# are shared with the Flask app. Install the extra dependencies and run it
+# behind an ASGI server:
+#
+#   pip install -r requirements-async.txt
+#   uvicorn student_asgi:app --port 5002
+#
+# Carts and checkout keys live in process memory by default, so more than one
+# worker needs the shared SQLite stores, or carts vanish between requests and
+# checkouts land on a worker that never issued their key:
+#
+#   CART_STORE=sqlite CHECKOUT_KEY_STORE=sqlite uvicorn student_asgi:app --port 5002 --workers 4
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime, date
+from functools import partial, wraps
+from urllib.parse import urlencode
+
+from dotenv import load_dotenv
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup
+from pymysql.err import MySQLError
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.responses import HTMLResponse, JSONResponse, PlainTextResponse, RedirectResponse, Response
+from starlette.routing import Route
+
+import async_db
+from cart_store import create_cart_store
+from idempotency import create_idempotency_store, CHECKOUT_KEY_WAIT, DONE, PENDING, QUEUED, UNKNOWN
+from http_cache import make_etag, is_not_modified, validator_headers
+from invalidation import get_channel
+from menu_cache import MenuCache, MenuSnapshot
+from order_service import (ORDER_HISTORY_PAGE_SIZE, WALLET_DEBIT_QUERY, ORDER_INFO_INSERT, PAYMENT_INSERT,
+                           ORDER_ITEM_INSERT, InsufficientBalanceError, decode_history_cursor,
+                           order_history_query, split_history_page, order_items_query, group_order_items,
+                           order_info_params, payment_params, order_item_params, wallet_amount)
+from order_queue import create_order_queue, OrderDrainer, OrderQueueFull, PLACED, FAILED
+from pricing import cart_pricer
+from student_auth import (ELIGIBLE_STUDENT_QUERY, ELIGIBLE_STUDENTS_QUERY, eligibility_params,
+                          student_auth_cache)
+
+# Load environment variables from .env file
+load_dotenv()
+
+SECRET_KEY = os.getenv('FLASK_SECRET_KEY', '') or 'dev_secret_key'
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+templates = Environment(loader=FileSystemLoader(TEMPLATE_DIR), autoescape=select_autoescape(['html']))
+cart_store = create_cart_store()
+checkout_keys = create_idempotency_store()
+orders_channel = get_channel('orders')
+# Optional write-behind queue; its drainer thread runs for the app's lifespan
+order_queue = create_order_queue()
+
+
+class AsyncMenuCache(MenuCache):
+    """MenuCache whose snapshot reloads run on the async pool."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._load_lock = asyncio.Lock()
+
+    async def get(self):
+        if self.channel is not None:
+            self.channel.poll()
+        key = (date.today(), self.version)
+        snapshot = self._snapshot
+        if self._is_stale(snapshot, key):
+            async with self._load_lock:
+                key = (date.today(), self.version)
+                snapshot = self._snapshot
+                if self._is_stale(snapshot, key):
+                    snapshot = MenuSnapshot(key, await async_db.fetch_all(self.query))
+                    if snapshot.items_by_id:
+                        self._snapshot = snapshot
+        return snapshot
+
+
+menu_cache = AsyncMenuCache(channel=get_channel('menu'))
+
+# --- Flask-compatible helpers for the shared templates ---
+
+def url_for(request, endpoint, **values):
+    """Like flask.url_for: path parameters fill the route, the rest become the query string."""
+    route = next(route for route in request.app.routes if route.name == endpoint)
+    path_params = {name: values.pop(name) for name in list(values) if name in route.param_convertors}
+    path = str(request.app.url_path_for(endpoint, **path_params))
+    return f"{path}?{urlencode(values)}" if values else path
+
+
+def flash(request, message, category='message'):
+    request.session.setdefault('_flashes', []).append([category, message])
+
+
+def get_flashed_messages(request, with_categories=False):
+    flashes = request.session.pop('_flashes', [])
+    return [tuple(entry) for entry in flashes] if with_categories else [message for _, message in flashes]
+
+
+def redirect(request, endpoint, **values):
+    return RedirectResponse(url_for(request, endpoint, **values), status_code=302)
+
+
+def render_template(request, template_name, **context):
+    student_id = request.session.get('student_id')
+    context.setdefault('cart_item_count', len(cart_store.get(student_id)) if student_id else 0)
+    html = templates.get_template(template_name).render(
+        request=request,
+        session=request.session,
+        now=datetime.now(),
+        url_for=partial(url_for, request),
+        get_flashed_messages=partial(get_flashed_messages, request),
+        **context
+    )
+    return HTMLResponse(html)
+
+
+def student_required(endpoint):
+    @wraps(endpoint)
+    async def decorated_endpoint(request):
+        if 'student_id' not in request.session:
+            flash(request, 'Please log in to access this page.', 'warning')
+            return redirect(request, 'login')
+        return await endpoint(request)
+    return decorated_endpoint
+
+# --- Data access ---
+
+async def fetch_order_items(order_ids):
+    order_ids = list(dict.fromkeys(order_ids))
+    if not order_ids:
+        return {}
+    return group_order_items(order_ids, await async_db.fetch_all(*order_items_query(order_ids)))
+
+
+async def find_eligible_student(student_id):
+    """Login lookup through the shared auth cache; misses run the same filtered query."""
+    student = student_auth_cache.get(student_id)
+    if student is not None:
+        return student
+    generation = student_auth_cache.generation
+    student = await async_db.fetch_one(ELIGIBLE_STUDENT_QUERY, (student_id,) + eligibility_params())
+    if student:
+        student_auth_cache.put(student, generation)
+    return student
+
+
+async def prewarm_student_cache():
+    generation = student_auth_cache.generation
+    rows = await async_db.fetch_all(ELIGIBLE_STUDENTS_QUERY, eligibility_params() + (student_auth_cache.max_entries,))
+    student_auth_cache.load(rows, generation)
+
+
+async def get_cart_data(request, student_id):
+    """Prices the stored cart from the menu cache and calculates the total."""
+    pairs = cart_store.get(student_id)
+    if not pairs:
+        return [], 0.0
+
+    priced = cart_pricer.price(pairs, await menu_cache.get())
+    if priced.removed:
+        for item_name in priced.removed:
+            flash(request, f"'{item_name}' is no longer available and was removed.", 'warning')
+        cart_store.set(student_id, [[line['item_id'], line['quantity']] for line in priced.lines])
+    return priced.lines, priced.total
+
+
+async def place_order(student_id, cart, order_total, payment_mode):
+    """Async twin of order_service.place_order, using the same SQL."""
+    async with async_db.transaction() as cursor:
+        if payment_mode == 'Wallet':
+            amount = wallet_amount(order_total)
+            if amount > 0:
+                await cursor.execute(WALLET_DEBIT_QUERY, (amount, student_id, amount))
+                if cursor.rowcount != 1:
+                    raise InsufficientBalanceError(f"Balance of {student_id} is below {amount}.")
+
+        await cursor.execute(ORDER_INFO_INSERT, order_info_params(student_id, order_total))
+        order_id = cursor.lastrowid
+        await cursor.execute(PAYMENT_INSERT, payment_params(order_id, order_total, payment_mode))
+        await cursor.executemany(ORDER_ITEM_INSERT, order_item_params(order_id, cart))
+    return order_id
+
+
+async def load_history_page(request):
+    before = decode_history_cursor(request.query_params.get('before'))
+    try:
+        page_size = int(request.query_params.get('limit', ORDER_HISTORY_PAGE_SIZE))
+    except ValueError:
+        page_size = ORDER_HISTORY_PAGE_SIZE
+    history_query, params, page_size = order_history_query(request.session['student_id'], before, page_size)
+    orders_list, next_cursor = split_history_page(await async_db.fetch_all(history_query, params), page_size)
+
+    items_by_order = await fetch_order_items(order['order_id'] for order in orders_list)
+    for order in orders_list:
+        order['order_items'] = items_by_order[order['order_id']]
+    return orders_list, next_cursor
+
+# --- Student Routes ---
+
+async def login(request):
+    if request.method == 'POST':
+        form = await request.form()
+        student_id = form.get('student_id', '').strip().upper()
+        student = await find_eligible_student(student_id)
+
+        if student:
+            request.session.clear()
+            request.session['student_id'] = student['student_id']
+            request.session['student_name'] = student['name']
+            cart_store.delete(student['student_id'])
+            flash(request, f"Welcome, {student['name']}! You are logged in.", 'success')
+            return redirect(request, 'index')
+        else:
+            flash(request, "Invalid Student ID, or you are not an authorized IS student (Year 2 or 3).", 'danger')
+
+    return render_template(request, 'login.html')
+
+
+async def logout(request):
+    if 'student_id' in request.session:
+        cart_store.delete(request.session['student_id'])
+    request.session.clear()
+    flash(request, "You have been logged out.", 'success')
+    return redirect(request, 'login')
+
+
+async def menu_page(request, template_name, section):
+    """Same as student_app.menu_page: cached menu cards, a per-student ETag and 304s."""
+    snapshot = await menu_cache.get()
+    categories = getattr(snapshot, section)
+    html, digest = snapshot.fragment(section, lambda: templates.get_template('_menu_cards.html').render(
+        url_for=partial(url_for, request), categories=categories))
+    menu_cards = Markup(html) if categories else ''
+    if request.session.get('_flashes'):
+        return render_template(request, template_name, menu_cards=menu_cards)
+    student_id = request.session['student_id']
+    etag = make_etag(template_name, digest, student_id, request.session.get('student_name'),
+                     cart_store.get(student_id))
+    headers = validator_headers(etag)
+    if is_not_modified(request.headers.get('if-none-match'), None, etag):
+        return Response(status_code=304, headers=headers)
+    response = render_template(request, template_name, menu_cards=menu_cards)
+    response.headers.update(headers)
+    return response
+
+
+@student_required
+async def index(request):
+    """Home page: Displays the digital menu."""
+    return await menu_page(request, 'index.html', 'categories')
+
+
+@student_required
+async def daily_special(request):
+    return await menu_page(request, 'daily_special.html', 'special_categories')
+
+
+@student_required
+async def add_to_cart(request):
+    item_id = request.path_params['item_id']
+    form = await request.form()
+    try:
+        quantity = int(form.get('quantity', 1))
+        if quantity <= 0: raise ValueError
+    except ValueError:
+        flash(request, "Quantity must be positive.", 'danger')
+        return redirect(request, 'menu')
+
+    item_details = (await menu_cache.get()).items_by_id.get(item_id)
+    if not item_details or item_details['availability_status'] != 1:
+        flash(request, "Item not found or unavailable.", 'danger')
+        return redirect(request, 'menu')
+
+    student_id = request.session['student_id']
+    cart = cart_store.get(student_id)
+    for pair in cart:
+        if pair[0] == item_id:
+            pair[1] += quantity
+            break
+    else:
+        cart.append([item_id, quantity])
+
+    cart_store.set(student_id, cart)
+    flash(request, f"{quantity} x {item_details['item_name']} added to cart.", 'success')
+    return redirect(request, 'menu')
+
+
+@student_required
+async def cart(request):
+    cart, order_total = await get_cart_data(request, request.session['student_id'])
+    return render_template(request, 'cart.html', cart=cart, order_total=order_total)
+
+
+async def item_name_for(item_id):
+    item = (await menu_cache.get()).items_by_id.get(item_id)
+    return item['item_name'] if item else 'Item'
+
+
+@student_required
+async def update_cart(request):
+    item_id = request.path_params['item_id']
+    student_id = request.session['student_id']
+    form = await request.form()
+    try:
+        new_quantity = int(form.get('quantity', 0))
+    except ValueError:
+        flash(request, "Invalid quantity value.", 'danger')
+        return redirect(request, 'cart')
+
+    updated_cart = []
+    for pair in cart_store.get(student_id):
+        if pair[0] == item_id:
+            item_name = await item_name_for(item_id)
+            if new_quantity > 0:
+                updated_cart.append([item_id, new_quantity])
+                flash(request, f"Quantity for {item_name} updated to {new_quantity}.", 'info')
+            else:
+                flash(request, f"{item_name} removed from cart.", 'danger')
+        else:
+            updated_cart.append(pair)
+
+    cart_store.set(student_id, updated_cart)
+    return redirect(request, 'cart')
+
+
+@student_required
+async def remove_from_cart(request):
+    item_id = request.path_params['item_id']
+    student_id = request.session['student_id']
+    cart_store.set(student_id, [pair for pair in cart_store.get(student_id) if pair[0] != item_id])
+    flash(request, f"{await item_name_for(item_id)} removed from cart.", 'danger')
+    return redirect(request, 'cart')
+
+
+@student_required
+async def checkout(request):
+    student_id = request.session['student_id']
+    checkout_key = None
+
+    if request.method == 'POST':
+        form = await request.form()
+        # A repeated submission of the same form is answered without touching MySQL
+        checkout_key = form.get('checkout_key', '')
+        outcome, existing_order_id = await wait_for_order(checkout_key, student_id)
+        if outcome == DONE:
+            return redirect(request, 'order_success', order_id=existing_order_id)
+        if outcome == QUEUED:
+            return redirect(request, 'order_queued', queue_id=existing_order_id)
+        if outcome == PENDING:
+            flash(request, "Your order is still being placed. It will appear under My Orders shortly.", 'info')
+            return redirect(request, 'orders')
+        if outcome == UNKNOWN:
+            flash(request, "This checkout page has expired. Please review your order and place it again.", 'warning')
+            return redirect(request, 'checkout')
+
+    try:
+        return await checkout_page(request, student_id, checkout_key)
+    finally:
+        if checkout_key is not None:
+            checkout_keys.release(checkout_key)
+
+
+async def wait_for_order(checkout_key, student_id):
+    """Async twin of idempotency.wait_for_order()."""
+    deadline = asyncio.get_running_loop().time() + CHECKOUT_KEY_WAIT
+    outcome, order_id = checkout_keys.claim(checkout_key, student_id)
+    while outcome == PENDING and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.1)
+        outcome, order_id = checkout_keys.claim(checkout_key, student_id)
+    return outcome, order_id
+
+
+async def checkout_page(request, student_id, checkout_key):
+    cart, order_total = await get_cart_data(request, student_id)
+
+    if not cart:
+        flash(request, "Your cart is empty. Please add items to place an order.", 'warning')
+        return redirect(request, 'index')
+
+    res = await async_db.fetch_one("SELECT balance FROM student WHERE student_id = %s", (student_id,))
+    balance = float(res['balance']) if res else 0.0
+
+    if request.method == 'POST':
+        form = await request.form()
+        payment_mode = form.get('payment_mode')
+        if not payment_mode:
+            return PlainTextResponse("Missing payment_mode.", status_code=400)
+
+        if payment_mode == 'Wallet':
+            if form.get('wallet_pin') != '1234':
+                flash(request, "Invalid Wallet PIN. Payment failed.", 'danger')
+                return redirect(request, 'checkout')
+            if balance < order_total:
+                flash(request, "Insufficient wallet balance.", 'danger')
+                return redirect(request, 'checkout')
+
+        if order_queue is not None and payment_mode != 'Wallet':
+            return queue_order(request, student_id, checkout_key, cart, order_total, payment_mode)
+
+        try:
+            new_order_id = await place_order(student_id, cart, order_total, payment_mode)
+        except InsufficientBalanceError:
+            flash(request, "Insufficient wallet balance.", 'danger')
+            return redirect(request, 'checkout')
+        except (MySQLError, asyncio.TimeoutError) as err:
+            print(f"Checkout Error: {err!r}")
+            flash(request, f"An error occurred during checkout: {err}", 'danger')
+            return redirect(request, 'cart')
+
+        checkout_keys.complete(checkout_key, new_order_id)
+        orders_channel.publish()  # wake the kitchen display stream
+        cart_store.delete(student_id)
+        flash(request, "Order placed successfully!", 'success')
+        return redirect(request, 'order_success', order_id=new_order_id)
+
+    return render_template(request, 'checkout.html', cart=cart, order_total=order_total, balance=balance,
+                           checkout_key=checkout_keys.issue(student_id))
+
+
+def queue_order(request, student_id, checkout_key, cart, order_total, payment_mode):
+    """Hands the validated order to the write-behind queue (a local SQLite write)."""
+    try:
+        queue_id = order_queue.enqueue(student_id, cart, order_total, payment_mode)
+    except OrderQueueFull:
+        flash(request, "The canteen is very busy right now. Please try placing your order again in a minute.", 'warning')
+        return redirect(request, 'checkout')
+    checkout_keys.complete(checkout_key, queue_id, QUEUED)
+    cart_store.delete(student_id)
+    flash(request, "Order received! It will be confirmed in a moment.", 'success')
+    return redirect(request, 'order_queued', queue_id=queue_id)
+
+
+@student_required
+async def order_queued(request):
+    queue_id = request.path_params['queue_id']
+    status = order_queue.status(queue_id, request.session['student_id']) if order_queue is not None else None
+    if status is None:
+        flash(request, "Order not found.", 'danger')
+        return redirect(request, 'orders')
+    if status['state'] == PLACED:
+        return redirect(request, 'order_success', order_id=status['order_id'])
+    if status['state'] == FAILED:
+        flash(request, "Sorry, your order could not be placed. Please add the items to your cart again.", 'danger')
+        return redirect(request, 'index')
+    return render_template(request, 'order_queued.html', status=status)
+
+
+@student_required
+async def order_success(request):
+    order_id = request.path_params['order_id']
+    order_query = """
+    SELECT oi.order_id, oi.total_amount, oi.status, p.payment_mode, s.name as student_name
+    FROM order_info oi
+    JOIN payment p ON oi.order_id = p.order_id
+    JOIN student s ON oi.student_id = s.student_id
+    WHERE oi.order_id = %s AND oi.student_id = %s
+    """
+    order = await async_db.fetch_one(order_query, (order_id, request.session['student_id']))
+
+    if not order:
+        flash(request, "Order not found.", 'danger')
+        return redirect(request, 'index')
+
+    items = (await fetch_order_items([order_id]))[order_id]
+    return render_template(request, 'order_success.html', order=order, items=items)
+
+
+@student_required
+async def orders(request):
+    orders_list, next_cursor = await load_history_page(request)
+
+    # Infinite scroll asks for just the next batch of cards
+    if request.query_params.get('fragment'):
+        response = render_template(request, '_order_cards.html', orders=orders_list)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
+
+    return render_template(request, 'orders.html', orders=orders_list, next_cursor=next_cursor)
+
+
+@student_required
+async def api_orders(request):
+    """JSON variant of the order history, paginated with the same cursor."""
+    orders_list, next_cursor = await load_history_page(request)
+    for order in orders_list:
+        order['order_date'] = order['order_date'].isoformat()
+        order['order_time'] = str(order['order_time'])
+    return JSONResponse({'orders': orders_list, 'next_cursor': next_cursor})
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await async_db.open_pool()
+    await prewarm_student_cache()
+    drainer = OrderDrainer(order_queue, on_placed=orders_channel.publish).start() if order_queue is not None else None
+    yield
+    if drainer is not None:
+        await asyncio.to_thread(drainer.stop)
+    await async_db.close_pool()
+
+
+routes = [
+    Route('/login', login, methods=['GET', 'POST'], name='login'),
+    Route('/logout', logout, name='logout'),
+    Route('/', index, name='index'),
+    Route('/menu', index, name='menu'),
+    Route('/daily_special', daily_special, name='daily_special'),
+    Route('/add_to_cart/{item_id:int}', add_to_cart, methods=['POST'], name='add_to_cart'),
+    Route('/cart', cart, name='cart'),
+    Route('/update_cart/{item_id:int}', update_cart, methods=['POST'], name='update_cart'),
+    Route('/remove_from_cart/{item_id:int}', remove_from_cart, methods=['POST'], name='remove_from_cart'),
+    Route('/checkout', checkout, methods=['GET', 'POST'], name='checkout'),
+    Route('/orders/queued/{queue_id:int}', order_queued, name='order_queued'),
+    Route('/order_success/{order_id:int}', order_success, name='order_success'),
+    Route('/orders', orders, name='orders'),
+    Route('/api/orders', api_orders, name='api_orders'),
+]
+
+app = Starlette(
+    routes=routes,
+    middleware=[Middleware(SessionMiddleware, secret_key=SECRET_KEY, session_cookie='canteen_session')],
+    lifespan=lifespan,
+)
+
+if __name__ == '__main__':
+    import uvicorn
+    print("--- ASYNC STUDENT APP RUNNING ON PORT 5002 ---")
+    uvicorn.run(app, port=5002)
@@ -0,0 +1,140 @@
+# Cache of the students allowed to log in to the student app
+#
+# Eligibility stays in SQL: the cache only remembers rows that MySQL returned
+# for ELIGIBLE_STUDENT_QUERY / ELIGIBLE_STUDENTS_QUERY, which carry the same
+# department/year filter login() always used. A miss falls through to that
+# query, so an ineligible or unknown id is never accepted from the cache.
+# Entries expire after AUTH_CACHE_TTL seconds and the least recently used
+# ones are dropped beyond AUTH_CACHE_MAX; anything that changes student rows
+# calls invalidate_students(), which clears every process via the 'students'
+# channel.
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from db_config import fetch_all, fetch_one
+from invalidation import get_channel
+
+AUTH_CACHE_TTL = float(os.getenv('AUTH_CACHE_TTL', '600'))
+AUTH_CACHE_MAX = int(os.getenv('AUTH_CACHE_MAX', '5000'))
+
+ELIGIBLE_DEPARTMENT = 'IS'
+ELIGIBLE_YEARS = (2, 3)
+
+ELIGIBLE_STUDENT_QUERY = """
+SELECT student_id, name
+FROM student
+WHERE student_id = %s AND department = %s AND year IN (%s, %s)
+"""
+
+ELIGIBLE_STUDENTS_QUERY = """
+SELECT student_id, name
+FROM student
+WHERE department = %s AND year IN (%s, %s)
+LIMIT %s
+"""
+
+
+def eligibility_params():
+    return (ELIGIBLE_DEPARTMENT,) + ELIGIBLE_YEARS
+
+
+def cache_key(student_id):
+    # student_id compares case-insensitively and ignores trailing spaces in
+    # MySQL (utf8mb4_unicode_ci), so the cache matches ids the same way
+    return student_id.rstrip(' ').upper()
+
+
+class StudentAuthCache:
+    """TTL + LRU map of eligible student_id -> {'student_id', 'name'} rows.
+
+    Loaders read `generation` before querying and pass it to put()/load();
+    rows loaded across an invalidation are discarded instead of cached.
+    """
+
+    def __init__(self, max_entries=AUTH_CACHE_MAX, ttl=AUTH_CACHE_TTL, channel=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.channel = channel
+        self.generation = 0
+        self._entries = OrderedDict()  # key -> (row, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if channel is not None:
+            channel.subscribe(self.invalidate)
+
+    def get(self, student_id):
+        """Cached row of an eligible student, or None when MySQL must be asked."""
+        if self.channel is not None:
+            self.channel.poll()
+        key = cache_key(student_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, row, generation):
+        self.load([row], generation)
+
+    def load(self, rows, generation):
+        """Caches eligible rows unless an invalidation happened since `generation` was read."""
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            if generation != self.generation:
+                return
+            for row in rows:
+                key = cache_key(row['student_id'])
+                self._entries[key] = ({'student_id': row['student_id'], 'name': row['name']}, expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token=None):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+student_auth_cache = StudentAuthCache(channel=get_channel('students'))
+
+
+def find_eligible_student(student_id):
+    """Login lookup: the cached row, else the filtered student query (then cached)."""
+    student = student_auth_cache.get(student_id)
+    if student is not None:
+        return student
+    generation = student_auth_cache.generation
+    student = fetch_one(ELIGIBLE_STUDENT_QUERY, (student_id,) + eligibility_params())
+    if student:
+        student_auth_cache.put(student, generation)
+    return student
+
+
+def prewarm_student_cache():
+    """Loads up to AUTH_CACHE_MAX eligible students in one query; returns how many."""
+    generation = student_auth_cache.generation
+    rows = fetch_all(ELIGIBLE_STUDENTS_QUERY, eligibility_params() + (student_auth_cache.max_entries,))
+    student_auth_cache.load(rows, generation)
+    return len(rows)
+
+
+def invalidate_students():
+    """Call after any write to student rows (name, department, year or the row itself)."""
+    student_auth_cache.channel.publish()
+
+
+if __name__ == '__main__':
+    # For manual edits to the student table: tell running apps to drop their caches
+    invalidate_students()
+    print("Student login caches invalidated.")
@@ -0,0 +1,69 @@
+# Test setup: both apps on the in-memory SQLite backend (db_dialect.py) with
+# seed.sql loaded. The settings must be in place before db_config and the
+# apps are imported, since they read the environment at import time.
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.update(
+    DB_BACKEND='sqlite',
+    DB_SQLITE_PATH=':memory:',
+    DB_SQLITE_SEED='1',
+    ADMIN_USERNAME='admin',
+    ADMIN_PASSWORD='admin',
+    FLASK_SECRET_KEY='test',
+    CART_STORE='memory',
+    CHECKOUT_KEY_STORE='memory',
+    ORDER_QUEUE='off',
+    CACHE_INVALIDATION_DIR=tempfile.mkdtemp(prefix='canteen-invalidation-'),
+)
+
+import admin_app  # noqa: E402
+import student_app  # noqa: E402
+from db_config import transaction  # noqa: E402
+
+STUDENT_ID = 'IS2101'
+
+
+def _place_orders(count):
+    """Inserts `count` Pending orders of two items each, one minute apart."""
+    started = datetime.now() - timedelta(hours=1)
+    with transaction() as cursor:
+        for n in range(count):
+            placed = started + timedelta(minutes=n)
+            cursor.execute("INSERT INTO order_info (student_id, order_date, order_time, total_amount, status) "
+                           "VALUES (%s, %s, %s, %s, 'Pending')",
+                           (STUDENT_ID, placed.date(), placed.strftime('%H:%M:%S'), 30))
+            order_id = cursor.lastrowid
+            cursor.executemany("INSERT INTO order_item (order_id, item_id, quantity, subtotal) VALUES (%s, %s, 1, 15)",
+                               [(order_id, 1), (order_id, 2)])
+            cursor.execute("INSERT INTO payment (order_id, payment_mode, amount_paid, payment_status, transaction_date) "
+                           "VALUES (%s, 'Cash', 30, 'Pending', %s)", (order_id, placed))
+
+
+@pytest.fixture
+def place_orders():
+    """Starts from an empty order_info and returns the function that adds orders."""
+    with transaction() as cursor:
+        cursor.execute("DELETE FROM order_info")
+    return _place_orders
+
+
+@pytest.fixture
+def student():
+    client = student_app.app.test_client()
+    client.post('/login', data={'student_id': STUDENT_ID})
+    return client
+
+
+@pytest.fixture
+def admin():
+    client = admin_app.app.test_client()
+    client.post('/admin/login', data={'username': 'admin', 'password': 'admin'})
+    return client
@@ -0,0 +1,45 @@
+"""SQLite carts expire after CART_STORE_TTL and the file stays bounded like the memory store."""
+import time
+
+import pytest
+
+from cart_store import SQLiteCartStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteCartStore(str(tmp_path / 'carts.sqlite3'), ttl=60, max_entries=3)
+
+
+def rows(store):
+    return store._connect().execute("SELECT cart_key FROM cart ORDER BY updated_at").fetchall()
+
+
+def test_expired_cart_is_not_returned(store, monkeypatch):
+    store.set('IS2101', [[4, 2]])
+    assert store.get('IS2101') == [[4, 2]]
+
+    later = time.time() + 61
+    monkeypatch.setattr(time, 'time', lambda: later)
+    assert store.get('IS2101') == []
+
+
+def test_writes_sweep_expired_and_excess_carts(store, monkeypatch):
+    monkeypatch.setattr(SQLiteCartStore, 'PURGE_EVERY', 1)
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now)
+    store.set('stale', [[1, 1]])
+
+    now += 120
+    for n in range(5):
+        now += 1
+        store.set(f'student-{n}', [[1, 1]])
+    assert [key for key, in rows(store)] == ['student-2', 'student-3', 'student-4']
+    assert store.get('student-4') == [[1, 1]]
+
+
+def test_reopening_an_existing_file_keeps_its_carts(tmp_path):
+    path = str(tmp_path / 'old.sqlite3')
+    SQLiteCartStore(path).set('IS2101', [[4, 1]])
+    reopened = SQLiteCartStore(path)
+    assert reopened.get('IS2101') == [[4, 1]]
@@ -0,0 +1,32 @@
+"""Submitting the same checkout form twice places one order and debits the wallet once."""
+import re
+
+from db_config import fetch_all, fetch_one
+
+STUDENT_ID = 'IS2101'
+
+
+def balance():
+    return fetch_one("SELECT balance FROM student WHERE student_id = %s", (STUDENT_ID,))['balance']
+
+
+def test_repeated_checkout_post_places_one_order(student, place_orders):
+    student.post('/add_to_cart/4', data={'quantity': 2})
+    page = student.get('/checkout').get_data(as_text=True)
+    checkout_key = re.search(r'name="checkout_key" value="([^"]+)"', page).group(1)
+    form = {'payment_mode': 'Wallet', 'wallet_pin': '1234', 'checkout_key': checkout_key}
+    before = balance()
+
+    first = student.post('/checkout', data=form)
+    # Refill the cart so only the key, not the emptied cart, can stop a second order
+    student.post('/add_to_cart/4', data={'quantity': 2})
+    second = student.post('/checkout', data=form)  # double click / browser retry
+
+    assert first.status_code == second.status_code == 302
+    assert '/order_success/' in first.headers['Location']
+    assert second.headers['Location'] == first.headers['Location']
+    orders = fetch_all("SELECT order_id, total_amount FROM order_info WHERE student_id = %s", (STUDENT_ID,))
+    assert len(orders) == 1
+    assert first.headers['Location'].endswith(f"/{orders[0]['order_id']}")
+    assert len(fetch_all("SELECT payment_id FROM payment")) == 1
+    assert before - balance() == orders[0]['total_amount']
@@ -0,0 +1,45 @@
+"""Bad numbers and database failures on the admin item forms are flashed, not turned into 500s."""
+from decimal import Decimal
+
+import mysql.connector
+import pytest
+
+import admin_app
+from db_config import fetch_one
+from menu_admin import MenuImportError, parse_discount, parse_price
+
+
+@pytest.mark.parametrize('value', ['nan', 'NaN', 'sNaN', 'inf', '-Infinity'])
+def test_non_finite_numbers_are_rejected(value):
+    with pytest.raises(MenuImportError):
+        parse_price(value, 'row 2')
+    with pytest.raises(MenuImportError):
+        parse_discount(value, 'row 2')
+
+
+def test_valid_numbers_are_rounded_to_cents():
+    assert parse_price(' 12.5 ', 'row 2') == Decimal('12.50')
+    assert parse_discount('15', 'row 2') == Decimal('15.00')
+
+
+def test_nan_discount_is_flashed(admin):
+    response = admin.post('/admin/items/bulk', data={'item_ids': ['4'], 'action': 'special', 'discount': 'nan'})
+    assert response.status_code == 302
+    assert 'not a number' in admin.get('/admin/dashboard').get_data(as_text=True)
+
+
+def test_nan_price_is_flashed(admin):
+    before = fetch_one("SELECT price FROM item WHERE item_id = 4")['price']
+    response = admin.post('/admin/items/prices', data={'price-4': 'nan', 'was-4': str(before)})
+    assert response.status_code == 302
+    assert fetch_one("SELECT price FROM item WHERE item_id = 4")['price'] == before
+
+
+def test_database_error_in_bulk_update_is_flashed(admin, monkeypatch):
+    def fail(*args):
+        raise mysql.connector.errors.OperationalError("Lost connection to MySQL server")
+    monkeypatch.setattr(admin_app, 'set_availability', fail)
+
+    response = admin.post('/admin/items/bulk', data={'item_ids': ['4'], 'action': 'hide'})
+    assert response.status_code == 302
+    assert 'Update failed' in admin.get('/admin/dashboard').get_data(as_text=True)
@@ -0,0 +1,28 @@
+"""The menu page is revalidated by an ETag that follows the student's cart, never by date alone."""
+
+
+def test_if_modified_since_alone_is_not_enough(student):
+    student.get('/')  # shows the login flash
+    first = student.get('/')
+    assert first.status_code == 200
+    assert 'Last-Modified' not in first.headers
+
+    again = student.get('/', headers={'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+    assert again.status_code == 200
+
+
+def test_etag_changes_with_the_cart(student):
+    student.get('/')  # shows the login flash
+    etag = student.get('/').headers['ETag']
+    assert student.get('/', headers={'If-None-Match': etag}).status_code == 304
+
+    student.post('/add_to_cart/4', data={'quantity': 1})
+    student.get('/cart')  # show the "added to cart" flash so the page is revalidatable again
+    changed = student.get('/', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+    # Same number of lines, different quantity: still a different page state
+    student.post('/add_to_cart/4', data={'quantity': 1})
+    student.get('/cart')
+    assert student.get('/', headers={'If-None-Match': changed.headers['ETag']}).status_code == 200
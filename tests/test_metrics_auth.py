@@ -0,0 +1,23 @@
+"""The metrics endpoints take METRICS_TOKEN only as a Bearer header."""
+import pytest
+
+import metrics
+
+
+@pytest.fixture
+def token(monkeypatch):
+    monkeypatch.setattr(metrics, 'METRICS_TOKEN', 's3cret')
+    return 's3cret'
+
+
+def test_bearer_token_is_accepted(student, token):
+    assert student.get('/metrics', headers={'Authorization': f'Bearer {token}'}).status_code == 200
+
+
+@pytest.mark.parametrize('headers, query', [
+    ({}, '?token=s3cret'),
+    ({'Authorization': 'Bearer wrong'}, ''),
+    ({'Authorization': 's3cret'}, ''),
+])
+def test_other_credentials_are_rejected(student, token, headers, query):
+    assert student.get('/metrics' + query, headers=headers).status_code != 200
@@ -0,0 +1,15 @@
+"""SQL text never becomes a metric label; the slowest-statement gauge is per endpoint only."""
+import re
+
+import metrics
+
+
+def test_slowest_statement_gauge_has_no_statement_label(student, monkeypatch):
+    monkeypatch.setattr(metrics, 'METRICS_TOKEN', 's3cret')
+    student.get('/orders')
+    body = student.get('/metrics', headers={'Authorization': 'Bearer s3cret'}).get_data(as_text=True)
+
+    gauges = re.findall(r'^canteen_db_slowest_statement_seconds\{(.*)\} ', body, re.M)
+    assert gauges
+    assert all('statement=' not in labels for labels in gauges)
+    assert 'SELECT' not in body
@@ -0,0 +1,30 @@
+"""Accounting exports stream real rows, return their connection, and fail loudly."""
+import db_config
+from db_config import get_pool
+
+EXPORT = '/admin/reports/export/order_item.csv?start=2000-01-01&end=2100-12-31'
+
+
+def test_export_streams_rows_and_returns_connection(admin, place_orders):
+    place_orders(3)
+    response = admin.get(EXPORT)
+    assert response.status_code == 200
+    lines = response.get_data(as_text=True).splitlines()
+    assert lines[0].startswith('order_item_id,order_id,order_date')
+    assert len(lines) == 1 + 3 * 2
+    assert get_pool().stats()['in_use'] == 0
+
+
+def test_head_request_returns_connection(admin, place_orders):
+    place_orders(1)
+    response = admin.head(EXPORT)
+    assert response.status_code == 200
+    response.close()  # what the WSGI server does; the body is never iterated
+    assert get_pool().stats()['in_use'] == 0
+
+
+def test_export_without_connection_is_503(admin, monkeypatch):
+    monkeypatch.setattr(db_config, 'get_db_connection', lambda: None)
+    response = admin.get(EXPORT)
+    assert response.status_code == 503
+    assert 'order_item_id' not in response.get_data(as_text=True)
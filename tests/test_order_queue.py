@@ -0,0 +1,45 @@
+"""A drain that crashes after its MySQL commit does not place the orders twice."""
+import time
+
+import pytest
+
+import order_queue
+from db_config import fetch_all
+from order_queue import PLACED, OrderQueue, drain_batch
+
+CART = [{'item_id': 1, 'quantity': 2, 'line_total': '60.00'}]
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch, place_orders):
+    # A short lease stands in for the 30s a crashed drainer's batch stays claimed
+    monkeypatch.setattr(order_queue, 'ORDER_QUEUE_LEASE', 0.2)
+    return OrderQueue(path=str(tmp_path / 'order_queue.sqlite3'))
+
+
+def test_retried_batch_after_crash_places_each_order_once(queue, monkeypatch):
+    queue_ids = [queue.enqueue('IS2101', CART, '60.00', 'Cash') for _ in range(3)]
+    mark_placed = queue.mark_placed
+
+    def crash_after_commit(placed):
+        if placed:
+            raise RuntimeError("worker died before updating the queue")
+        mark_placed(placed)
+
+    monkeypatch.setattr(queue, 'mark_placed', crash_after_commit)
+    with pytest.raises(RuntimeError):
+        drain_batch(queue, 'drainer-1')
+    assert len(fetch_all("SELECT order_id FROM order_info WHERE queue_ref IS NOT NULL")) == 3
+
+    # The restarted worker takes the batch over once the lease runs out
+    monkeypatch.setattr(queue, 'mark_placed', mark_placed)
+    time.sleep(0.3)
+    assert drain_batch(queue, 'drainer-2') == 3
+
+    rows = fetch_all("SELECT order_id, queue_ref FROM order_info WHERE queue_ref IS NOT NULL")
+    assert len(rows) == 3
+    assert len({row['queue_ref'] for row in rows}) == 3
+    statuses = [queue.status(queue_id, 'IS2101') for queue_id in queue_ids]
+    assert {status['state'] for status in statuses} == {PLACED}
+    assert sorted(status['order_id'] for status in statuses) == sorted(row['order_id'] for row in rows)
+    assert len(fetch_all("SELECT payment_id FROM payment")) == 3
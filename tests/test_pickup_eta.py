@@ -0,0 +1,83 @@
+"""TurnaroundWindow keeps its running totals right as completions enter and leave the window."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from pickup_eta import ETA_DEFAULT_SECONDS, PickupEstimator, TurnaroundWindow
+
+START = datetime(2026, 3, 31, 12, 0)
+
+
+def at(minutes):
+    return START + timedelta(minutes=minutes)
+
+
+def test_evicts_completions_older_than_the_window():
+    window = TurnaroundWindow(size=100, max_age=600)
+    window.add(at(0), 300, (1,))
+    window.add(at(5), 600, (1, 2))
+    window.add(at(10), 900, (2,))
+    assert window.mean() == 600
+
+    window.evict_expired(at(10))  # cutoff 12:00 exactly: the 12:00 completion is not older, so it stays
+    assert len(window) == 3
+
+    window.evict_expired(at(10) + timedelta(seconds=1))
+    assert len(window) == 2
+    assert window.mean() == 750
+
+    window.evict_expired(at(16))
+    assert len(window) == 1
+    assert window.mean() == 900
+    assert window._items == {2: [900.0, 1]}  # item 1 left the window entirely
+
+    window.evict_expired(at(30))
+    assert len(window) == 0
+    assert window.mean() is None
+    assert window._items == {}
+
+
+def test_size_bound_drops_the_oldest():
+    window = TurnaroundWindow(size=2, max_age=3600)
+    for minute, seconds in enumerate((100, 200, 300)):
+        window.add(at(minute), seconds, (7,))
+    assert len(window) == 2
+    assert window.mean() == 250
+    assert window._items[7] == [500.0, 2]
+
+
+def test_item_mean_needs_enough_samples():
+    window = TurnaroundWindow(size=100, max_age=3600)
+    window.add(at(0), 200, (1,))
+    window.add(at(1), 400, (1,))
+    assert window.item_mean(1) is None
+    window.add(at(2), 600, (1,))
+    assert window.item_mean(1) == 400
+    assert window.item_mean(99) is None
+
+
+def test_completion_interval():
+    window = TurnaroundWindow(size=100, max_age=3600)
+    window.add(at(0), 60, ())
+    assert window.completion_interval() is None
+    window.add(at(2), 60, ())
+    window.add(at(6), 60, ())
+    assert window.completion_interval() == 180
+
+
+def test_estimate_uses_slowest_item_then_window_mean_then_default():
+    window = TurnaroundWindow(size=100, max_age=3600)
+    estimator = PickupEstimator(channel=None, window=window)
+    assert estimator.estimate_seconds((1,), ahead=0) == ETA_DEFAULT_SECONDS
+
+    for minute in range(3):
+        window.add(at(minute), 300, (1,))       # fast item
+        window.add(at(minute), 900, (2,))       # slow item
+    assert estimator.estimate_seconds((1, 2), ahead=0) == 900
+    assert estimator.estimate_seconds((3,), ahead=0) == pytest.approx(600)  # unknown item: window mean
+
+    # Six completions over two minutes: 24 s apart, so 50 orders ahead outweigh the baseline
+    assert estimator.estimate_seconds((1,), ahead=50) == pytest.approx(50 * 24)
+
+    window.evict_expired(at(62) + timedelta(seconds=1))
+    assert estimator.estimate_seconds((1, 2), ahead=0) == ETA_DEFAULT_SECONDS
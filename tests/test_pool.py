@@ -0,0 +1,18 @@
+"""ConnectionPool.close_all() also closes connections that were borrowed at the time."""
+import pytest
+from mysql.connector import errors
+
+import db_dialect
+from db_config import ConnectionPool
+
+
+def test_close_all_closes_borrowed_connections_on_release():
+    pool = ConnectionPool({'database': ':memory:'}, size=2, connect=db_dialect.connect)
+    idle, borrowed = pool.acquire(), pool.acquire()
+    idle.close()
+    pool.close_all()
+    borrowed.close()
+    assert pool.stats()['idle'] == 0
+    assert pool.stats()['in_use'] == 0
+    with pytest.raises(errors.PoolError):
+        pool.acquire()
@@ -0,0 +1,22 @@
+"""The order pages must issue the same number of queries for 1 order as for 50 (no N+1)."""
+import pytest
+from flask import g
+
+
+def query_count(client, path):
+    with client:
+        response = client.get(path)
+        assert response.status_code == 200
+        return g.db_query_count
+
+
+@pytest.mark.parametrize('app_client, path', [('student', '/orders?limit=50'), ('admin', '/admin/dashboard')])
+def test_query_count_does_not_grow_with_orders(request, place_orders, app_client, path):
+    client = request.getfixturevalue(app_client)
+    place_orders(1)
+    query_count(client, path)  # warm the menu, login and pickup-time caches
+    one = query_count(client, path)
+
+    place_orders(49)
+    fifty = query_count(client, path)
+    assert fifty == one
@@ -0,0 +1,70 @@
+"""convert_rows' compiled row builders give the same rows as the plain dict(zip()) loop they replaced."""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from mysql.connector import FieldType
+
+from db_config import convert_rows
+
+
+def plain_rows(description, rows):
+    names = [column[0] for column in description]
+    return [dict(zip(names, [float(value) if isinstance(value, Decimal) else value for value in row]))
+            for row in rows]
+
+
+def column(name, type_code):
+    return (name, type_code, None, None, None, None, True)
+
+
+MYSQL_DESCRIPTION = [
+    column('order_id', FieldType.LONG),
+    column('total_amount', FieldType.NEWDECIMAL),
+    column('order_date', FieldType.DATE),
+    column('order_time', FieldType.TIME),
+    column('completed_at', FieldType.DATETIME),
+    column('note', FieldType.VAR_STRING),
+]
+ROWS = [
+    (1, Decimal('30.50'), date(2026, 3, 31), timedelta(hours=12, minutes=5), datetime(2026, 3, 31, 12, 20), "it's"),
+    (2, None, None, None, None, None),
+    (3, Decimal('0.10'), date(2026, 4, 1), timedelta(0), None, ''),
+]
+
+
+@pytest.mark.parametrize('description', [MYSQL_DESCRIPTION,
+                                         [column(name, None) for name, *_ in MYSQL_DESCRIPTION]],
+                         ids=['mysql-type-codes', 'no-type-codes'])
+def test_dict_rows_match_dict_zip(description):
+    assert convert_rows(description, ROWS) == plain_rows(description, ROWS)
+
+
+def test_null_in_first_row_still_converts_later_decimals():
+    description = [column('amount', None)]
+    rows = [(None,), (Decimal('12.25'),)]
+    result = convert_rows(description, rows)
+    assert result == plain_rows(description, rows)
+    assert type(result[1]['amount']) is float
+
+
+def test_duplicate_column_names_keep_the_last_value_like_dict_zip():
+    # e.g. SELECT oi.*, p.* where both tables have order_id
+    description = [column('order_id', FieldType.LONG), column('amount', FieldType.NEWDECIMAL),
+                   column('order_id', FieldType.LONG)]
+    rows = [(1, Decimal('5.00'), 99), (2, None, None)]
+    assert convert_rows(description, rows) == plain_rows(description, rows)
+
+
+def test_tuple_and_namedtuple_rows_hold_the_same_values():
+    plain = [tuple(row.values()) for row in plain_rows(MYSQL_DESCRIPTION, ROWS)]
+    assert convert_rows(MYSQL_DESCRIPTION, ROWS, 'tuple') == plain
+    named = convert_rows(MYSQL_DESCRIPTION, ROWS, 'namedtuple')
+    assert [tuple(row) for row in named] == plain
+    assert named[0].total_amount == 30.5
+
+
+def test_awkward_column_names_are_quoted():
+    description = [column("it's", None), column('a b', None), column('1st', None)]
+    rows = [(1, 2, 3)]
+    assert convert_rows(description, rows) == plain_rows(description, rows)
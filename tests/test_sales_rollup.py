@@ -0,0 +1,41 @@
+"""Daily sales rollups follow an order that is completed, folded, then canceled."""
+import time
+
+import pytest
+
+import sales_rollup
+from db_config import fetch_all, fetch_one, transaction
+
+
+@pytest.fixture
+def rollups(monkeypatch):
+    # Changes stamped within the last second may still be mid-commit, so folds wait one second
+    monkeypatch.setattr(sales_rollup, 'ROLLUP_SETTLE_SECONDS', 1)
+    with transaction() as cursor:
+        for table in ('sales_daily', 'sales_daily_item', 'sales_daily_category'):
+            cursor.execute(f"DELETE FROM {table}")
+
+
+def fold_after_settling():
+    time.sleep(2.1)
+    return sales_rollup.fold_new_orders()
+
+
+def daily_totals():
+    return fetch_one("SELECT COALESCE(SUM(order_count), 0) AS orders, COALESCE(SUM(revenue), 0) AS revenue, "
+                     "COALESCE(SUM(cancelled_count), 0) AS cancelled FROM sales_daily")
+
+
+def test_completed_then_canceled_order_leaves_revenue(admin, place_orders, rollups):
+    place_orders(1)
+    order_id = fetch_one("SELECT MAX(order_id) AS order_id FROM order_info")['order_id']
+
+    admin.post(f'/admin/update_order_status/{order_id}', data={'status': 'Completed'})
+    assert fold_after_settling() == 1
+    assert daily_totals() == {'orders': 1, 'revenue': 30, 'cancelled': 0}
+    assert [row['quantity'] for row in fetch_all("SELECT quantity FROM sales_daily_item")] == [1, 1]
+
+    admin.post(f'/admin/update_order_status/{order_id}', data={'status': 'Canceled'})
+    assert fold_after_settling() == 1
+    assert daily_totals() == {'orders': 0, 'revenue': 0, 'cancelled': 1}
+    assert [row['quantity'] for row in fetch_all("SELECT quantity FROM sales_daily_item")] == [0, 0]
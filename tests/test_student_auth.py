@@ -0,0 +1,72 @@
+"""A change to student rows bumps the auth cache generation, and the stale entry is never served again."""
+import pytest
+
+import student_auth
+from db_config import execute_query, fetch_one
+from invalidation import InvalidationChannel
+from student_auth import StudentAuthCache, find_eligible_student, invalidate_students
+
+STUDENT_ID = 'IS2101'
+
+
+@pytest.fixture
+def seeded_student():
+    """Puts IS2101 back as seeded once the test has edited it."""
+    invalidate_students()
+    yield
+    execute_query("UPDATE student SET name = 'John Doe', year = 2, balance = 100 WHERE student_id = %s", (STUDENT_ID,))
+    invalidate_students()
+
+
+def test_row_change_bumps_generation_and_drops_the_stale_entry(seeded_student):
+    assert find_eligible_student(STUDENT_ID)['name'] == 'John Doe'
+    assert student_auth.student_auth_cache.get(STUDENT_ID) is not None
+    generation = student_auth.student_auth_cache.generation
+
+    execute_query("UPDATE student SET name = 'Jane Doe' WHERE student_id = %s", (STUDENT_ID,))
+    assert find_eligible_student(STUDENT_ID)['name'] == 'John Doe'  # not yet told
+    invalidate_students()
+
+    assert student_auth.student_auth_cache.generation == generation + 1
+    assert student_auth.student_auth_cache.get(STUDENT_ID) is None
+    assert find_eligible_student(STUDENT_ID)['name'] == 'Jane Doe'
+
+
+def test_student_who_becomes_ineligible_is_refused(seeded_student):
+    assert find_eligible_student(STUDENT_ID) is not None
+    execute_query("UPDATE student SET year = 4 WHERE student_id = %s", (STUDENT_ID,))
+    invalidate_students()
+    assert find_eligible_student(STUDENT_ID) is None
+
+
+def test_balance_is_never_cached(seeded_student):
+    # Wallet debits don't invalidate the cache, so the cache must not hold the balance at all
+    cached = find_eligible_student(STUDENT_ID)
+    assert set(cached) == {'student_id', 'name'}
+    execute_query("UPDATE student SET balance = 7 WHERE student_id = %s", (STUDENT_ID,))
+    assert fetch_one("SELECT balance FROM student WHERE student_id = %s", (STUDENT_ID,))['balance'] == 7
+
+
+def test_rows_loaded_across_an_invalidation_are_discarded():
+    cache = StudentAuthCache(max_entries=10, ttl=60)
+    generation = cache.generation
+    # ... the login query runs here, then an admin edit lands before put()
+    cache.invalidate()
+    cache.put({'student_id': STUDENT_ID, 'name': 'Old Name'}, generation)
+    assert cache.get(STUDENT_ID) is None
+
+    cache.put({'student_id': STUDENT_ID, 'name': 'New Name'}, cache.generation)
+    assert cache.get('is2101 ')['name'] == 'New Name'
+
+
+def test_invalidation_reaches_other_processes(tmp_path):
+    # Two channels on one directory stand in for the two app processes
+    here = StudentAuthCache(channel=InvalidationChannel('students', str(tmp_path), poll_interval=0))
+    there = InvalidationChannel('students', str(tmp_path), poll_interval=0)
+    here.put({'student_id': STUDENT_ID, 'name': 'John Doe'}, here.generation)
+    generation = here.generation
+
+    there.publish()
+
+    assert here.get(STUDENT_ID) is None
+    assert here.generation == generation + 1
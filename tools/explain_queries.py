@@ -0,0 +1,113 @@
+"""Runs EXPLAIN on every SQL statement in the app modules and flags slow plans.
+
+Collects the SQL string literals (including f-strings, whose {...} parts are
+rendered as a single %s) from student_app.py, admin_app.py and the modules
+they query through, runs EXPLAIN for each SELECT/UPDATE/DELETE against the
+database configured in .env, and reports full table scans (type=ALL), full
+index scans (type=index), filesorts and temporary tables.
+
+    python tools/explain_queries.py                 # default module list
+    python tools/explain_queries.py student_app.py  # specific files
+
+Every %s is bound to the string '1', which keeps index lookups usable for
+both INT and VARCHAR columns. MySQL prefers scans on near-empty tables, so
+run this against a realistically sized database (see the bench seeders).
+Exits with status 1 if any statement was flagged.
+"""
+import ast
+import os
+import re
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_FILES = ('student_app.py', 'admin_app.py', 'order_service.py', 'menu_cache.py', 'sales_rollup.py', 'pickup_eta.py', 'menu_admin.py',
+                 'order_export.py')
+SQL_START = re.compile(r'^\s*(SELECT|UPDATE|DELETE|INSERT)\b', re.IGNORECASE)
+EXPLAINABLE = ('SELECT', 'UPDATE', 'DELETE')
+
+
+def literal_sql(node):
+    """Returns the SQL text of a str/f-string node, or None."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        text = node.value
+    elif isinstance(node, ast.JoinedStr):
+        text = ''.join(part.value if isinstance(part, ast.Constant) else '%s' for part in node.values)
+    else:
+        return None
+    return text if SQL_START.match(text) else None
+
+
+def collect_queries(path):
+    with open(path) as f:
+        tree = ast.parse(f.read(), filename=path)
+    queries = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.JoinedStr):
+            # Skip the Constant pieces of f-strings; the JoinedStr itself is collected
+            for part in node.values:
+                part._in_fstring = True
+        sql = None if getattr(node, '_in_fstring', False) else literal_sql(node)
+        if sql:
+            queries.append((node.lineno, ' '.join(sql.split()).rstrip(';')))
+    return sorted(queries)
+
+
+def bind_sample_params(sql):
+    return sql.replace('%s', "'1'")
+
+
+def plan_warnings(plan_rows):
+    warnings = []
+    for row in plan_rows:
+        table = row.get('table')
+        access = row.get('type')
+        extra = row.get('Extra') or ''
+        if access == 'ALL':
+            warnings.append(f"full table scan on {table}")
+        elif access == 'index':
+            warnings.append(f"full index scan on {table}")
+        if 'Using filesort' in extra:
+            warnings.append(f"filesort on {table}")
+        if 'Using temporary' in extra:
+            warnings.append(f"temporary table for {table}")
+    return warnings
+
+
+def main(argv):
+    import mysql.connector
+    from db_config import DB_CONFIG
+
+    files = argv or [os.path.join(ROOT, name) for name in DEFAULT_FILES]
+    conn = mysql.connector.connect(**DB_CONFIG)
+    cursor = conn.cursor(dictionary=True)
+    flagged = 0
+    try:
+        for path in files:
+            for lineno, sql in collect_queries(path):
+                verb = sql.split(None, 1)[0].upper()
+                location = f"{os.path.relpath(path, ROOT)}:{lineno}"
+                if verb not in EXPLAINABLE:
+                    continue
+                try:
+                    cursor.execute('EXPLAIN ' + bind_sample_params(sql))
+                    warnings = plan_warnings(cursor.fetchall())
+                except mysql.connector.Error as err:
+                    print(f"ERROR {location}: {err}\n      {sql[:120]}")
+                    flagged += 1
+                    continue
+                if warnings:
+                    flagged += 1
+                    print(f"WARN  {location}: {'; '.join(warnings)}\n      {sql[:120]}")
+                else:
+                    print(f"OK    {location}")
+    finally:
+        cursor.close()
+        conn.close()
+    print(f"\n{flagged} statement(s) flagged.")
+    return 1 if flagged else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))